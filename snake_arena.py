@@ -0,0 +1,378 @@
+import json
+import math
+import os
+
+import numpy as np
+
+# ----------------- ARENAS -----------------
+# La arena es un polígono cualquiera (convexo o cóncavo) en coords locales,
+# con el origen dentro: ahí nace la serpiente. Los lados se indexan en una
+# jerarquía de círculos envolventes (BVH) para que las consultas de un
+# círculo (cabeza, recompensa, spawn) solo miren los lados cercanos.
+#
+# Ficheros de nivel (levels/*.json):
+#   {"name": "Cruz", "vertices": [[x, y], [x, y], ...]}
+
+LEVELS_DIR = "levels"
+LEVEL_EXTENSION = ".json"
+BVH_LEAF_SIZE = 4          # lados por hoja del BVH
+CONTACT_SLOP = 1e-9        # un círculo apoyado en una pared (por redondeo) cuenta como dentro
+
+
+class Arena:
+    """
+    Polígono de la arena con lados precalculados (origen, normal hacia
+    fuera, vector del lado) y un BVH sobre ellos. edges tiene el mismo
+    formato que hex_edges: [(v0, [nx, ny]), ...].
+    """
+
+    def __init__(self, vertices, name="", level=""):
+        if len(vertices) < 3:
+            raise ValueError("Una arena necesita al menos 3 vértices")
+        vertices = [(float(x), float(y)) for x, y in vertices]
+        # Orientación antihoraria: así (ey, -ex) es siempre la normal hacia fuera
+        signed_area = sum(
+            x0 * y1 - x1 * y0
+            for (x0, y0), (x1, y1) in zip(vertices, vertices[1:] + vertices[:1])
+        )
+        if signed_area < 0:
+            vertices.reverse()
+
+        self.name = name
+        self.level = level  # nombre o ruta con la que se cargó ("" = arena por defecto)
+        self.vertices = vertices
+        self.edges = []
+        n_vertices = len(vertices)
+        for i in range(n_vertices):
+            v0 = vertices[i]
+            v1 = vertices[(i + 1) % n_vertices]
+            nx = v1[1] - v0[1]
+            ny = -(v1[0] - v0[0])
+            length = math.hypot(nx, ny)
+            if length == 0:
+                continue
+            self.edges.append((v0, [nx / length, ny / length]))
+
+        self.edge_a = np.array([v0 for v0, _ in self.edges])
+        self.edge_normals = np.array([n for _, n in self.edges])
+        self.edge_b = np.roll(self.edge_a, -1, axis=0)
+        self.edge_dir = self.edge_b - self.edge_a
+        self.edge_len2 = (self.edge_dir ** 2).sum(axis=1)
+        # Copias en listas para las consultas escalares (más rápidas que indexar arrays)
+        self._a = self.edge_a.tolist()
+        self._b = self.edge_b.tolist()
+        self._dir = self.edge_dir.tolist()
+        self._len2 = self.edge_len2.tolist()
+        self._normal = self.edge_normals.tolist()
+
+        # Convexa si ningún vértice es reflejo (giro siempre a la izquierda)
+        self.convex = all(
+            dx0 * dy1 - dy0 * dx1 >= 0
+            for (dx0, dy0), (dx1, dy1) in zip(self._dir, self._dir[1:] + self._dir[:1])
+        )
+
+        # Radio envolvente (caja de spawn)
+        self.bounds_radius = max(math.hypot(x, y) for x, y in vertices)
+        self._build_bvh()
+
+        if not self.contains(0.0, 0.0):
+            raise ValueError("El origen (0, 0) tiene que estar dentro de la arena")
+        # Círculo libre de paredes alrededor del origen (atajo de is_inside)
+        self.inner_radius = self.nearest(0.0, 0.0)[0]
+
+    @classmethod
+    def regular(cls, radius, sides=6, name=""):
+        """Polígono regular centrado en el origen (el hexágono clásico con sides=6)."""
+        vertices = []
+        for i in range(sides):
+            angle = math.radians(360 / sides * i)
+            vertices.append((radius * math.cos(angle), radius * math.sin(angle)))
+        arena = cls(vertices, name)
+        arena.bounds_radius = radius  # exacto, sin el redondeo de cos/sin
+        return arena
+
+    # ----------------- BVH -----------------
+
+    def _build_bvh(self):
+        """Árbol binario de círculos envolventes sobre los lados, en arrays planos."""
+        self.node_x = []
+        self.node_y = []
+        self.node_radius = []
+        self.node_children = []  # (izq, der) o None si es hoja
+        self.node_edges = []     # índices de lados de cada hoja
+        mid = (self.edge_a + self.edge_b) / 2
+        self._build_node(list(range(len(self.edges))), mid)
+
+    def _build_node(self, edges, mid):
+        points = np.concatenate([self.edge_a[edges], self.edge_b[edges]])
+        low = points.min(axis=0)
+        high = points.max(axis=0)
+        center = (low + high) / 2
+        radius = float(np.sqrt(((points - center) ** 2).sum(axis=1)).max())
+
+        node = len(self.node_x)
+        self.node_x.append(float(center[0]))
+        self.node_y.append(float(center[1]))
+        self.node_radius.append(radius)
+        self.node_children.append(None)
+        self.node_edges.append(edges)
+        if len(edges) <= BVH_LEAF_SIZE:
+            return node
+
+        # Partir por la mediana de los puntos medios en el eje más largo
+        axis = int(np.argmax(high - low))
+        edges = sorted(edges, key=lambda e: mid[e, axis])
+        half = len(edges) // 2
+        left = self._build_node(edges[:half], mid)
+        right = self._build_node(edges[half:], mid)
+        self.node_children[node] = (left, right)
+        self.node_edges[node] = None
+        return node
+
+    def query(self, x, y, radius):
+        """Lados cuyo círculo envolvente toca el círculo (x, y, radius)."""
+        found = []
+        stack = [0]
+        node_x = self.node_x
+        node_y = self.node_y
+        node_radius = self.node_radius
+        while stack:
+            node = stack.pop()
+            dx = x - node_x[node]
+            dy = y - node_y[node]
+            reach = radius + node_radius[node]
+            if dx * dx + dy * dy > reach * reach:
+                continue
+            children = self.node_children[node]
+            if children is None:
+                found.extend(self.node_edges[node])
+            else:
+                stack.extend(children)
+        return found
+
+    # ----------------- CONSULTAS -----------------
+
+    def _closest_on_edge(self, edge, x, y):
+        """Punto del lado más cercano a (x, y) y su distancia al cuadrado."""
+        ax, ay = self._a[edge]
+        dx, dy = self._dir[edge]
+        u = ((x - ax) * dx + (y - ay) * dy) / self._len2[edge]
+        u = min(max(u, 0.0), 1.0)
+        cx = ax + dx * u
+        cy = ay + dy * u
+        return cx, cy, (x - cx) ** 2 + (y - cy) ** 2
+
+    def contains(self, x, y):
+        """Punto dentro del polígono (regla par-impar con un rayo hacia +X)."""
+        inside = False
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            # Solo los nodos que cortan la recta horizontal a la derecha del punto
+            if abs(y - self.node_y[node]) > self.node_radius[node]:
+                continue
+            if self.node_x[node] + self.node_radius[node] < x:
+                continue
+            children = self.node_children[node]
+            if children is not None:
+                stack.extend(children)
+                continue
+            for edge in self.node_edges[node]:
+                ax, ay = self._a[edge]
+                bx, by = self._b[edge]
+                if (ay > y) != (by > y):
+                    cross_x = ax + (y - ay) * (bx - ax) / (by - ay)
+                    if cross_x > x:
+                        inside = not inside
+        return inside
+
+    def nearest(self, x, y, max_distance=None):
+        """
+        (distancia, cx, cy, lado) al lado más cercano. Con max_distance solo
+        se buscan lados a esa distancia o menos (None si no hay ninguno).
+        """
+        radius = max_distance
+        if radius is None:
+            # Todos los lados están a menos de esto del punto
+            radius = math.hypot(x, y) + self.bounds_radius
+        best = None
+        for edge in self.query(x, y, radius):
+            cx, cy, dist2 = self._closest_on_edge(edge, x, y)
+            if best is None or dist2 < best[0]:
+                best = (dist2, cx, cy, edge)
+        if best is None:
+            return None
+        dist2, cx, cy, edge = best
+        if max_distance is not None and dist2 > max_distance * max_distance:
+            return None
+        return math.sqrt(dist2), cx, cy, edge
+
+    def is_inside(self, x, y, radius=0.0):
+        """Círculo (x, y, radius) completamente dentro de la arena."""
+        # Atajo: dentro del círculo libre alrededor del origen no hay paredes
+        free = self.inner_radius - radius
+        if free > 0 and x * x + y * y < free * free:
+            return True
+        if not self.contains(x, y):
+            return False
+        return self.nearest(x, y, radius - CONTACT_SLOP) is None if radius > 0 else True
+
+    def inside_mask(self, points, radius=0.0):
+        """
+        is_inside para muchos puntos (m, 2) a la vez contra todos los lados
+        con NumPy (sin BVH): para rasterizar la arena, no para cada paso.
+        """
+        px = points[:, 0:1]
+        py = points[:, 1:2]
+        ax, ay = self.edge_a[:, 0], self.edge_a[:, 1]
+        bx, by = self.edge_b[:, 0], self.edge_b[:, 1]
+        crosses = (ay > py) != (by > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cross_x = ax + (py - ay) * (bx - ax) / (by - ay)
+        inside = (crosses & (cross_x > px)).sum(axis=1) % 2 == 1
+        if radius <= 0:
+            return inside
+
+        dx, dy = self.edge_dir[:, 0], self.edge_dir[:, 1]
+        u = np.clip(((px - ax) * dx + (py - ay) * dy) / self.edge_len2, 0.0, 1.0)
+        dist2 = (px - ax - dx * u) ** 2 + (py - ay - dy * u) ** 2
+        return inside & (dist2.min(axis=1) >= (radius - CONTACT_SLOP) ** 2)
+
+    def resolve(self, x, y, vx, vy, radius, bounce_factor=1.0):
+        """
+        Corrige la penetración de un círculo en las paredes (o su salida del
+        polígono) y refleja la velocidad. Devuelve (x, y, vx, vy, contacto)
+        donde contacto es None o (punto_de_pared, normal_hacia_fuera).
+        """
+        inside = self.contains(x, y)
+        hit = self.nearest(x, y, radius if inside else None)
+        if hit is None:
+            return x, y, vx, vy, None
+        dist, cx, cy, edge = hit
+        if inside and dist >= radius - CONTACT_SLOP:
+            return x, y, vx, vy, None
+
+        # Normal hacia dentro de la arena en el punto de contacto
+        if dist > 0:
+            nx = (x - cx) / dist
+            ny = (y - cy) / dist
+            if not inside:
+                nx, ny = -nx, -ny
+        else:
+            nx, ny = self._normal[edge]
+            nx, ny = -nx, -ny
+        x = cx + nx * radius
+        y = cy + ny * radius
+
+        dot = vx * nx + vy * ny
+        if dot < 0:
+            vx = (vx - 2 * dot * nx) * bounce_factor
+            vy = (vy - 2 * dot * ny) * bounce_factor
+        return x, y, vx, vy, ((cx, cy), (-nx, -ny))
+
+    def time_of_impact(self, x, y, vx, vy, radius, duration):
+        """
+        Primer instante t en [0, duration] en que el círculo que se mueve a
+        (vx, vy) toca una pared. Devuelve (t, nx, ny) con la normal hacia
+        dentro en el contacto, o None si no toca ninguna.
+        """
+        speed = math.hypot(vx, vy)
+        # Atajo: todo el recorrido cabe en el círculo libre alrededor del origen
+        if math.hypot(x, y) + speed * duration + radius < self.inner_radius:
+            return None
+        half = speed * duration / 2
+        candidates = self.query(x + vx * duration / 2, y + vy * duration / 2, radius + half)
+        best = None
+        speed2 = vx * vx + vy * vy
+        for edge in candidates:
+            ax, ay = self._a[edge]
+            onx, ony = self._normal[edge]
+            # Cara del lado: distancia con signo (positiva hacia dentro)
+            approach = vx * onx + vy * ony
+            if approach > 0:
+                inside_dist = -((x - ax) * onx + (y - ay) * ony)
+                t = max(inside_dist - radius, 0.0) / approach
+                if t <= duration and (best is None or t < best[0]):
+                    qx = x + vx * t
+                    qy = y + vy * t
+                    dx, dy = self._dir[edge]
+                    u = ((qx - ax) * dx + (qy - ay) * dy) / self._len2[edge]
+                    if 0.0 <= u <= 1.0 and inside_dist >= 0.0:
+                        best = (t, -onx, -ony)
+            # Extremo del lado (esquinas cóncavas que entran en la arena)
+            if speed2 == 0:
+                continue
+            px = x - ax
+            py = y - ay
+            b = px * vx + py * vy
+            if b >= 0:
+                continue  # se aleja del vértice
+            c = px * px + py * py - radius * radius
+            disc = b * b - speed2 * c
+            if disc < 0:
+                continue
+            t = max((-b - math.sqrt(disc)) / speed2, 0.0)
+            if t <= duration and (best is None or t < best[0]):
+                qx = x + vx * t - ax
+                qy = y + vy * t - ay
+                length = math.hypot(qx, qy) or 1.0
+                best = (t, qx / length, qy / length)
+        return best
+
+    def sweep(self, x, y, vx, vy, radius, duration, bounce_factor=1.0, max_bounces=4):
+        """
+        Movimiento continuo con rebotes durante duration segundos. Devuelve
+        (x, y, vx, vy, contactos) con contactos = [(centro, punto_de_pared,
+        normal_hacia_fuera, velocidad_antes)].
+        """
+        contacts = []
+        remaining = duration
+        for _ in range(max_bounces):
+            hit = self.time_of_impact(x, y, vx, vy, radius, remaining)
+            if hit is None:
+                x += vx * remaining
+                y += vy * remaining
+                return x, y, vx, vy, contacts
+            t, nx, ny = hit
+            x += vx * t
+            y += vy * t
+            remaining -= t
+            contacts.append(((x, y), (x - nx * radius, y - ny * radius), (-nx, -ny), (vx, vy)))
+            dot = vx * nx + vy * ny
+            if dot < 0:
+                vx = (vx - 2 * dot * nx) * bounce_factor
+                vy = (vy - 2 * dot * ny) * bounce_factor
+
+        # Sin rebotes libres: avanzar lo que queda y corregir por penetración
+        x += vx * remaining
+        y += vy * remaining
+        x, y, vx, vy, _ = self.resolve(x, y, vx, vy, radius, bounce_factor)
+        return x, y, vx, vy, contacts
+
+
+# ----------------- NIVELES -----------------
+
+def level_path(level):
+    """Nombre de nivel ("cruz") o ruta a un .json -> ruta del fichero."""
+    if os.path.exists(level):
+        return level
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), LEVELS_DIR)
+    return os.path.join(folder, level + LEVEL_EXTENSION)
+
+
+def load_arena(level):
+    """Carga una arena desde un fichero de nivel (nombre o ruta)."""
+    with open(level_path(level)) as f:
+        data = json.load(f)
+    name = data.get("name") or os.path.splitext(os.path.basename(level))[0]
+    return Arena(data["vertices"], name=name, level=level)
+
+
+def list_levels():
+    """Nombres de los niveles de levels/."""
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), LEVELS_DIR)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        os.path.splitext(f)[0] for f in os.listdir(folder) if f.endswith(LEVEL_EXTENSION)
+    )
@@ -0,0 +1,310 @@
+import argparse
+import functools
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+import pygame
+
+# ----------------- ASSETS -----------------
+# Los sprites se preparan (escalado y filtro verde del cuerpo) con
+# operaciones de array enteras, y el resultado se guarda en una caché en
+# disco: en los arranques siguientes se leen los píxeles ya procesados y no
+# se decodifica ningún PNG. La clave de cada entrada es el hash del fichero
+# original, la versión procesada que se pidió y ASSET_CACHE_VERSION, así que
+# cambiar un PNG o una transformación invalida solo lo que toca. La caché se
+# puede borrar en cualquier momento.
+#
+# Para distribuir, `python snake_assets.py` construye el bundle: un único
+# fichero con los sprites del juego ya procesados, en el formato de píxel de
+# la pantalla, más un índice. Se mapea en memoria al arrancar y cada sprite
+# es una superficie sobre el propio mapa (pygame.image.frombuffer), sin
+# decodificar PNG ni copiar píxeles. Orden de búsqueda: bundle, caché, PNG.
+#
+# Versiones de un sprite (variants):
+#   {"size": (w, h)}             escalado exacto
+#   {"fit": n}                   lado mayor n px, manteniendo el aspecto
+#   {"fit": n, "green": True}    además, filtro verde con máscara circular
+
+ASSETS_DIR = "assets"
+CACHE_DIR = ".cache"             # dentro de assets/
+CACHE_EXTENSION = ".rgba"
+ASSET_CACHE_VERSION = 1          # subir si cambia cualquier transformación
+
+# Filtro verde del cuerpo de la serpiente
+GREEN_FACTOR = 0.8               # cuánto se mezcla hacia verde
+GREEN_SATURATION = 1.3           # saturación del canal verde
+
+# Cabecera de una entrada: magic, versión, ancho y alto; luego RGBA
+_CACHE_HEADER = struct.Struct("<4sBHH")
+_CACHE_MAGIC = b"HXSC"
+
+# Bundle: magic, versión y tamaño del índice (JSON); luego el índice y los
+# píxeles de cada sprite alineados a BUNDLE_ALIGNMENT bytes
+ASSET_BUNDLE = "sprites.hxab"    # dentro de assets/
+BUNDLE_ALIGNMENT = 64
+_BUNDLE_HEADER = struct.Struct("<4sBI")
+_BUNDLE_MAGIC = b"HXAB"
+
+# Órdenes de bytes que entiende frombuffer para píxeles de 32 bits con alpha
+PIXEL_FORMATS = ("BGRA", "RGBA", "ARGB")
+
+
+def asset_path(filename):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), ASSETS_DIR, filename)
+
+
+# ----------------- TRANSFORMACIONES -----------------
+
+def fit_size(size, fit):
+    """Tamaño con el lado mayor a fit px, manteniendo el aspecto."""
+    width, height = size
+    if width > height:
+        return fit, int(height * (fit / width))
+    return int(width * (fit / height)), fit
+
+
+def green_filter(surface):
+    """
+    Filtro verde saturado preservando el alpha, recortado a un círculo
+    centrado para eliminar los bordes cuadrados. Devuelve una superficie nueva.
+    """
+    width, height = surface.get_size()
+    mask = pygame.Surface((width, height), pygame.SRCALPHA)
+    pygame.draw.circle(mask, (255, 255, 255, 255), (width // 2, height // 2), min(width, height) // 2)
+
+    rgb = pygame.surfarray.array3d(surface).astype(float)
+    alpha = pygame.surfarray.array_alpha(surface)
+    # Solo cuentan los píxeles dentro del círculo y con alpha; el resto queda transparente
+    inside = (pygame.surfarray.array_alpha(mask) > 0) & (alpha > 0)
+
+    filtered = pygame.Surface((width, height), pygame.SRCALPHA)
+    pixels = pygame.surfarray.pixels3d(filtered)
+    pixels[..., 0] = np.where(inside, rgb[..., 0] * (1 - GREEN_FACTOR) + 50 * GREEN_FACTOR, 0)
+    pixels[..., 1] = np.where(
+        inside, np.minimum(255, rgb[..., 1] * GREEN_SATURATION * GREEN_FACTOR + 200 * GREEN_FACTOR), 0
+    )
+    pixels[..., 2] = np.where(inside, rgb[..., 2] * (1 - GREEN_FACTOR) + 50 * GREEN_FACTOR, 0)
+    pygame.surfarray.pixels_alpha(filtered)[...] = np.where(inside, alpha, 0)
+    del pixels  # suelta el lock de la superficie
+    return filtered
+
+
+def process_sprite(source, variant):
+    """Aplica a source (ya convertida con convert_alpha) una versión de la cabecera."""
+    if "size" in variant:
+        size = tuple(variant["size"])
+    else:
+        size = fit_size(source.get_size(), variant["fit"])
+    sprite = pygame.transform.scale(source, size)
+    if variant.get("green"):
+        sprite = green_filter(sprite)
+    return sprite
+
+
+# ----------------- CACHÉ EN DISCO -----------------
+
+def _cache_path(filename, digest, variant):
+    key = repr((ASSET_CACHE_VERSION, digest, sorted(variant.items()))).encode()
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    name = f"{stem}-{hashlib.sha1(key).hexdigest()[:16]}{CACHE_EXTENSION}"
+    return os.path.join(os.path.dirname(asset_path(filename)), CACHE_DIR, name)
+
+
+def _read_cached(path):
+    """Superficie guardada en path, o None si no está o no vale."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _CACHE_HEADER.size:
+        return None
+    magic, version, width, height = _CACHE_HEADER.unpack_from(data, 0)
+    pixels = data[_CACHE_HEADER.size:]
+    if magic != _CACHE_MAGIC or version != ASSET_CACHE_VERSION or len(pixels) != width * height * 4:
+        return None
+    return pygame.image.frombytes(pixels, (width, height), "RGBA").convert_alpha()
+
+
+def _write_cached(path, sprite):
+    """Guarda sprite en path; si no se puede escribir (instalación de solo lectura), se sigue sin caché."""
+    width, height = sprite.get_size()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Escritura atómica: un arranque a medias no deja entradas cortadas
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, ASSET_CACHE_VERSION, width, height))
+            f.write(pygame.image.tobytes(sprite, "RGBA"))
+        os.replace(temporary, path)
+    except OSError:
+        pass
+
+
+# ----------------- BUNDLE -----------------
+
+def sprite_key(filename, variant):
+    """Clave de una versión de un sprite en el índice del bundle."""
+    return filename + ":" + json.dumps(variant, sort_keys=True)
+
+
+def display_pixel_format():
+    """Orden de bytes de las superficies convert_alpha() de la pantalla actual."""
+    masks = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha().get_masks()
+    for pixel_format in PIXEL_FORMATS:
+        if pygame.image.frombuffer(bytearray(4), (1, 1), pixel_format).get_masks() == masks:
+            return pixel_format
+    return "RGBA"
+
+
+def build_bundle(sprites, path=None):
+    """
+    Escribe el bundle con las versiones de sprites [(fichero, versión)] y
+    devuelve su ruta. Los píxeles van en el formato de la pantalla actual.
+    """
+    path = path or asset_path(ASSET_BUNDLE)
+    pixel_format = display_pixel_format()
+
+    by_file = {}
+    for filename, variant in sprites:
+        by_file.setdefault(filename, []).append(variant)
+    index = {}
+    blobs = []
+    offset = 0
+    for filename, variants in by_file.items():
+        source = pygame.image.load(asset_path(filename)).convert_alpha()
+        for variant in variants:
+            sprite = process_sprite(source, variant)
+            pixels = pygame.image.tobytes(sprite, pixel_format)
+            index[sprite_key(filename, variant)] = [offset, *sprite.get_size()]
+            padding = -len(pixels) % BUNDLE_ALIGNMENT
+            blobs.append(pixels + bytes(padding))
+            offset += len(pixels) + padding
+
+    header = json.dumps({"format": pixel_format, "sprites": index}).encode("utf-8")
+    header += b" " * (-(_BUNDLE_HEADER.size + len(header)) % BUNDLE_ALIGNMENT)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(_BUNDLE_HEADER.pack(_BUNDLE_MAGIC, ASSET_CACHE_VERSION, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temporary, path)
+    return path
+
+
+@functools.lru_cache(maxsize=1)
+def _open_bundle(path):
+    """
+    (mapa, índice, inicio de los píxeles, formato, mtime) del bundle, o None
+    si no hay o no vale. El mapa queda abierto mientras viva el proceso: las
+    superficies del bundle apuntan a él.
+    """
+    try:
+        with open(path, "rb") as f:
+            # Copia en escritura: nadie escribe en los sprites, pero si pasara
+            # no tocaría el fichero
+            bundle = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        mtime = os.path.getmtime(path)
+    except (OSError, ValueError):
+        return None
+    if len(bundle) < _BUNDLE_HEADER.size:
+        return None
+    magic, version, index_size = _BUNDLE_HEADER.unpack_from(bundle, 0)
+    if magic != _BUNDLE_MAGIC or version != ASSET_CACHE_VERSION:
+        return None
+    start = _BUNDLE_HEADER.size + index_size
+    index = json.loads(bundle[_BUNDLE_HEADER.size:start])
+    return bundle, index["sprites"], start, index["format"], mtime
+
+
+def _bundle_sprite(filename, variant):
+    """Sprite del bundle sin copiar píxeles, o None si no está o su PNG es más nuevo."""
+    bundle = _open_bundle(asset_path(ASSET_BUNDLE))
+    if bundle is None:
+        return None
+    data, sprites, start, pixel_format, mtime = bundle
+    entry = sprites.get(sprite_key(filename, variant))
+    if entry is None:
+        return None
+    try:
+        if os.path.getmtime(asset_path(filename)) > mtime:
+            return None  # se cambió el PNG después de construir el bundle
+    except OSError:
+        pass  # distribución sin los PNG sueltos
+    offset, width, height = entry
+    offset += start
+    sprite = pygame.image.frombuffer(
+        memoryview(data)[offset:offset + width * height * 4], (width, height), pixel_format
+    )
+    if pixel_format != display_pixel_format():
+        # Bundle hecho para otra pantalla: se convierte (copia) para blitear rápido
+        sprite = sprite.convert_alpha()
+    return sprite
+
+
+# ----------------- CARGA -----------------
+
+def load_sprites(filename, *variants):
+    """
+    Versiones procesadas de assets/filename, en el orden de variants: del
+    bundle si están, si no de la caché, y si tampoco se procesan a partir de
+    una sola decodificación del PNG y se guardan para el próximo arranque.
+    Necesita la ventana ya creada (convert_alpha).
+    """
+    sprites = [_bundle_sprite(filename, variant) for variant in variants]
+    if all(sprite is not None for sprite in sprites):
+        return sprites
+
+    path = asset_path(filename)
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+
+    source = None
+    for i, variant in enumerate(variants):
+        if sprites[i] is not None:
+            continue
+        cache_path = _cache_path(filename, digest, variant)
+        sprite = _read_cached(cache_path)
+        if sprite is None:
+            if source is None:
+                source = pygame.image.load(io.BytesIO(data), filename).convert_alpha()
+            sprite = process_sprite(source, variant)
+            _write_cached(cache_path, sprite)
+        sprites[i] = sprite
+    return sprites
+
+
+# ----------------- BUILD -----------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Construye el bundle de sprites de Hex Snake a partir de assets/."
+    )
+    parser.add_argument("--out", default=None, help=f"ruta del bundle (por defecto assets/{ASSET_BUNDLE})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Sin ventana visible: en una máquina de build basta el driver dummy
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    from snake_pygame import GAME_SPRITES
+
+    path = build_bundle(GAME_SPRITES, args.out)
+    print(f"{len(GAME_SPRITES)} sprites ({display_pixel_format()}) -> {path} "
+          f"({os.path.getsize(path) / 1024:.0f} KiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+import math
+import time
+
+import numpy as np
+
+from snake_sim import (
+    HEX_RADIUS,
+    SNAKE_SPEED,
+    SNAKE_RADIUS,
+    INITIAL_SEGMENTS,
+    SEGMENTS_PER_FOOD,
+    SEGMENT_SPACING,
+    NUM_REWARDS,
+    REWARD_RADIUS,
+    GRAVITY,
+    REWARD_BOUNCE,
+    HEX_ROTATION_SPEED,
+    HEX_ROTATION_CHANGE_MIN,
+    HEX_ROTATION_CHANGE_MAX,
+    HEX_ROTATION_SPEED_MIN,
+    HEX_ROTATION_SPEED_MAX,
+    FIXED_TIMESTEP,
+)
+
+# ----------------- ENTORNO VECTORIZADO -----------------
+# N partidas avanzando a la vez con arrays de NumPy: cada paso es una
+# operación por array sobre todas las partidas, sin bucles de Python por
+# partida. Es una aproximación de SnakeSimulation para entrenar agentes, no
+# una copia exacta. Comparte con ella la rotación del hexágono, el giro de
+# las acciones (set_direction), el movimiento libre de la cabeza y la
+# gravedad de las recompensas, pero difiere en:
+#
+#   - Cuerpo: el path guarda una muestra cada SEGMENT_SPACING * 0.8 y el
+#     segmento i está en la muestra i + 2, sin interpolar por longitud de arco.
+#   - Paredes: sin barrido continuo (colisión por penetración al final del
+#     paso, cabeza y recompensas) y sin puntos de rebote en el path.
+#   - Comer y chocar con el cuerpo: solo miran la posición final de la
+#     cabeza (y de las recompensas), no el barrido del paso.
+#   - Spawn: SPAWN_CANDIDATES candidatos al azar por recompensa en vez del
+#     raster de celdas libres (SpawnSampler).
+#   - Solo el hexágono de HEX_RADIUS y las constantes del módulo snake_sim:
+#     no admite params ni arenas.
+#   - Sin partículas, semillas por partida ni replays.
+#   - El cuerpo no puede pasar de max_segments: step() lanza RuntimeError
+#     en vez de recortarlo.
+
+# Acciones: igual que las teclas del juego, en coordenadas de pantalla
+ACTION_NONE = 0
+ACTION_UP = 1
+ACTION_DOWN = 2
+ACTION_LEFT = 3
+ACTION_RIGHT = 4
+NUM_ACTIONS = 5
+
+ACTION_DIRECTIONS = np.array([
+    [0.0, 0.0],
+    [0.0, -1.0],
+    [0.0, 1.0],
+    [-1.0, 0.0],
+    [1.0, 0.0],
+])
+
+MAX_SEGMENTS = 256         # tope de segmentos por partida (tamaño de los arrays; pasarlo es un error)
+SPAWN_CANDIDATES = 50      # candidatos por recompensa (como los 50 intentos de _create_reward)
+
+
+def _hex_half_planes(radius):
+    """Normales de salida (6, 2) y desplazamientos (6,) de los lados: dist = p·n - c."""
+    angles = np.radians(60.0 * np.arange(6))
+    vertices = np.stack([np.cos(angles), np.sin(angles)], axis=1) * radius
+    edges = np.roll(vertices, -1, axis=0) - vertices
+    normals = np.stack([edges[:, 1], -edges[:, 0]], axis=1)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    offsets = np.einsum("ij,ij->i", vertices, normals)
+    # La normal debe apuntar hacia fuera: el centro queda con dist <= 0
+    flip = offsets < 0
+    normals[flip] *= -1
+    offsets[flip] *= -1
+    return normals, offsets
+
+
+class BatchSnakeEnv:
+    """
+    num_envs partidas en paralelo (lockstep) con API reset/step.
+    step(actions) recibe un array (N,) de ACTION_* y devuelve
+    (obs, reward, done, info). Las partidas que terminan se reinician solas;
+    info["final_score"] guarda el score con el que terminaron (-1 si no).
+
+    Observación por partida (float32), normalizada:
+      cabeza / HEX_RADIUS (2), velocidad / SNAKE_SPEED (2),
+      cos y sin del ángulo del hexágono (2),
+      posición relativa de cada recompensa / HEX_RADIUS (2 * R),
+      velocidad de cada recompensa / SNAKE_SPEED (2 * R).
+    """
+
+    def __init__(self, num_envs, seed=None, num_rewards=NUM_REWARDS,
+                 max_segments=MAX_SEGMENTS, delta_time=FIXED_TIMESTEP):
+        self.num_envs = num_envs
+        self.num_rewards = num_rewards
+        self.max_segments = max_segments
+        self.delta_time = delta_time
+        self.rng = np.random.default_rng(seed)
+
+        self.edge_normals, self.edge_offsets = _hex_half_planes(HEX_RADIUS)
+
+        n = num_envs
+        # Rotación del escenario
+        self.hex_angle = np.zeros(n)
+        self.hex_rotation_speed = np.zeros(n)
+        self.hex_rotation_timer = np.zeros(n)
+        self.hex_rotation_change_time = np.zeros(n)
+
+        # Serpiente: el path es un buffer circular de muestras de la cabeza
+        # (una cada SEGMENT_SPACING * 0.8) y el segmento i está en la muestra
+        # i + 2 contando desde la más nueva (ver diferencias arriba)
+        self.path_capacity = max_segments + 2
+        self.head = np.zeros((n, 2))
+        self.velocity = np.zeros((n, 2))
+        self.path = np.zeros((n, self.path_capacity, 2))
+        self.path_index = np.zeros(n, dtype=np.int64)  # próxima posición a escribir
+        self.body_length = np.zeros(n, dtype=np.int64)
+
+        # Recompensas
+        self.reward_pos = np.zeros((n, num_rewards, 2))
+        self.reward_vel = np.zeros((n, num_rewards, 2))
+
+        self.score = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+
+        self._env_index = np.arange(n)
+        self._segment_index = np.arange(max_segments)
+
+    # ----------------- RESET -----------------
+
+    def reset(self):
+        """Reinicia todas las partidas y devuelve la observación inicial."""
+        self._reset_envs(self._env_index)
+        return self._observe()
+
+    def _reset_envs(self, envs):
+        """Reinicia solo las partidas indicadas (array de índices)."""
+        if len(envs) == 0:
+            return
+        count = len(envs)
+
+        self.hex_angle[envs] = 0.0
+        self.hex_rotation_speed[envs] = HEX_ROTATION_SPEED
+        self.hex_rotation_timer[envs] = 0.0
+        self.hex_rotation_change_time[envs] = self.rng.uniform(
+            HEX_ROTATION_CHANGE_MIN, HEX_ROTATION_CHANGE_MAX, count
+        )
+
+        self.head[envs] = 0.0
+        self.velocity[envs] = (SNAKE_SPEED, 0.0)
+
+        # Path inicial: línea recta detrás de la cabeza, la muestra más nueva
+        # en (0, 0) y el segmento i en -(i + 1) * SEGMENT_SPACING
+        age = (self.path_capacity - 1) - np.arange(self.path_capacity)
+        self.path[envs, :, 0] = -age * SEGMENT_SPACING
+        self.path[envs, :, 1] = 0.0
+        self.path_index[envs] = 0
+        self.body_length[envs] = INITIAL_SEGMENTS
+
+        self.score[envs] = 0
+        self.ticks[envs] = 0
+
+        env_rows = np.repeat(envs, self.num_rewards)
+        slots = np.tile(np.arange(self.num_rewards), count)
+        self._spawn_rewards(env_rows, slots)
+
+    # ----------------- GEOMETRÍA -----------------
+
+    def _edge_distances(self, points):
+        """Distancia con signo a cada lado (..., 6); > 0 es fuera del hexágono."""
+        # Producto explícito: matmul con dimensión interna 2 es más lento
+        x = points[..., 0, None]
+        y = points[..., 1, None]
+        return x * self.edge_normals[:, 0] + y * self.edge_normals[:, 1] - self.edge_offsets
+
+    def _resolve_walls(self, pos, vel, radius, bounce_factor):
+        """Versión vectorizada de _handle_collision: empuja fuera de la pared más penetrada y refleja."""
+        penetration = self._edge_distances(pos) + radius
+        deepest = np.argmax(penetration, axis=-1)
+        max_penetration = np.take_along_axis(penetration, deepest[..., None], axis=-1)[..., 0]
+        hit = max_penetration > 0.0
+        normal = self.edge_normals[deepest]
+
+        push = np.where(hit, max_penetration, 0.0)[..., None]
+        pos = pos - normal * push
+        dot = np.einsum("...i,...i->...", vel, normal)[..., None]
+        reflected = (vel - 2.0 * dot * normal) * bounce_factor
+        vel = np.where(hit[..., None], reflected, vel)
+        return pos, vel, hit
+
+    def body_positions(self, envs=None):
+        """
+        Posiciones de los segmentos (E, L, 2) y máscara de segmentos vivos (E, L)
+        para las partidas envs (todas por defecto). L es el cuerpo más largo
+        entre ellas, así que partidas cortas no pagan por MAX_SEGMENTS.
+        """
+        if envs is None:
+            envs = self._env_index
+        lengths = self.body_length[envs]
+        width = int(lengths.max()) if len(envs) else 0
+        segments = self._segment_index[:width]
+        index = (self.path_index[envs][:, None] - 2 - segments[None, :]) % self.path_capacity
+        body = self.path[envs[:, None], index]
+        alive = segments[None, :] < lengths[:, None]
+        return body, alive
+
+    def _spawn_rewards(self, envs, slots):
+        """Coloca recompensas nuevas (envs[k], slots[k]) lejos de la cabeza y el cuerpo."""
+        count = len(envs)
+        if count == 0:
+            return
+        candidates = self.rng.uniform(
+            -HEX_RADIUS * 0.75, HEX_RADIUS * 0.75, (count, SPAWN_CANDIDATES, 2)
+        )
+        inside = np.all(self._edge_distances(candidates) + (REWARD_RADIUS + 2) <= 0, axis=-1)
+
+        head = self.head[envs][:, None, :]
+        far_from_head = np.sum((candidates - head) ** 2, axis=-1) > (SNAKE_RADIUS + 50) ** 2
+
+        body, alive = self.body_positions(envs)
+        diff = candidates[:, :, None, :] - body[:, None, :, :]
+        too_close = (np.sum(diff * diff, axis=-1) < (SNAKE_RADIUS + 30) ** 2) & alive[:, None, :]
+        valid = inside & far_from_head & ~np.any(too_close, axis=-1)
+
+        first = np.argmax(valid, axis=1)
+        pos = candidates[np.arange(count), first]
+
+        # Sin candidato válido: posición segura a media distancia del centro
+        fallback = ~np.any(valid, axis=1)
+        if np.any(fallback):
+            k = int(np.count_nonzero(fallback))
+            angle = self.rng.uniform(0, 2 * math.pi, k)
+            dist = self.rng.uniform(HEX_RADIUS * 0.3, HEX_RADIUS * 0.6, k)
+            pos[fallback] = np.stack([np.cos(angle), np.sin(angle)], axis=1) * dist[:, None]
+
+        angle = self.rng.uniform(0, 2 * math.pi, count)
+        speed = self.rng.uniform(60.0, 120.0, count)
+        self.reward_pos[envs, slots] = pos
+        self.reward_vel[envs, slots] = np.stack([np.cos(angle), np.sin(angle)], axis=1) * speed[:, None]
+
+    # ----------------- STEP -----------------
+
+    def _update_rotation(self, dt):
+        self.hex_rotation_timer += dt
+        change = self.hex_rotation_timer >= self.hex_rotation_change_time
+        k = int(np.count_nonzero(change))
+        if k:
+            speed = HEX_ROTATION_SPEED_MIN + self.rng.random(k) * (HEX_ROTATION_SPEED_MAX - HEX_ROTATION_SPEED_MIN)
+            speed = np.where(self.rng.random(k) < 0.5, -speed, speed)
+            self.hex_rotation_speed[change] = speed
+            self.hex_rotation_timer[change] = 0.0
+            self.hex_rotation_change_time[change] = self.rng.uniform(
+                HEX_ROTATION_CHANGE_MIN, HEX_ROTATION_CHANGE_MAX, k
+            )
+        self.hex_angle = (self.hex_angle + self.hex_rotation_speed * dt) % 360.0
+
+    def _apply_actions(self, actions):
+        """Versión vectorizada de set_direction (pantalla -> coords locales, sin giros de 180º)."""
+        screen = ACTION_DIRECTIONS[actions]
+        angle = np.radians(-self.hex_angle)
+        cos_a = np.cos(angle)
+        sin_a = np.sin(angle)
+        local = np.stack([
+            screen[:, 0] * cos_a - screen[:, 1] * sin_a,
+            screen[:, 0] * sin_a + screen[:, 1] * cos_a,
+        ], axis=1)
+
+        speed = np.linalg.norm(self.velocity, axis=1)
+        speed = np.where(speed == 0, SNAKE_SPEED, speed)
+        current = self.velocity / speed[:, None]
+        dot = np.sum(current * local, axis=1)
+        turn = (actions != ACTION_NONE) & (dot >= -0.5)
+        self.velocity[turn] = local[turn] * speed[turn, None]
+
+    def _update_snake(self, dt):
+        self.head += self.velocity * dt
+        self.head, self.velocity, _ = self._resolve_walls(self.head, self.velocity, SNAKE_RADIUS, 1.0)
+
+        last = self.path[self._env_index, (self.path_index - 1) % self.path_capacity]
+        moved = np.sum((self.head - last) ** 2, axis=1) >= (SEGMENT_SPACING * 0.8) ** 2
+        envs = self._env_index[moved]
+        self.path[envs, self.path_index[envs]] = self.head[envs]
+        self.path_index[envs] = (self.path_index[envs] + 1) % self.path_capacity
+
+    def _update_rewards(self, dt):
+        self.reward_vel[..., 1] += GRAVITY * dt
+        self.reward_pos += self.reward_vel * dt
+        self.reward_pos, self.reward_vel, hit = self._resolve_walls(
+            self.reward_pos, self.reward_vel, REWARD_RADIUS, REWARD_BOUNCE
+        )
+        # Re-comprobaciones (como las 5 iteraciones de _update_rewards); solo
+        # las recompensas que tocaron pared pueden seguir fuera
+        envs, slots = np.nonzero(hit)
+        for _ in range(5):
+            outside = np.any(self._edge_distances(self.reward_pos[envs, slots]) + REWARD_RADIUS > 0, axis=-1)
+            envs = envs[outside]
+            slots = slots[outside]
+            if len(envs) == 0:
+                return
+            pos, vel, _ = self._resolve_walls(
+                self.reward_pos[envs, slots], self.reward_vel[envs, slots], REWARD_RADIUS, 0.5
+            )
+            self.reward_pos[envs, slots] = pos
+            self.reward_vel[envs, slots] = vel
+        outside = np.any(self._edge_distances(self.reward_pos[envs, slots]) + REWARD_RADIUS > 0, axis=-1)
+        self._spawn_rewards(envs[outside], slots[outside])
+
+    def step(self, actions):
+        """Avanza un paso todas las partidas. Devuelve (obs, reward, done, info)."""
+        dt = self.delta_time
+        actions = np.asarray(actions, dtype=np.int64)
+
+        # Como en el juego: la acción llega antes del paso y se interpreta con
+        # el ángulo del hexágono que ve el jugador
+        self._apply_actions(actions)
+        self._update_rotation(dt)
+        self._update_snake(dt)
+        self._update_rewards(dt)
+
+        # Comer recompensas
+        diff = self.reward_pos - self.head[:, None, :]
+        eaten = np.sum(diff * diff, axis=-1) <= (SNAKE_RADIUS + REWARD_RADIUS) ** 2
+        eaten_count = np.count_nonzero(eaten, axis=1)
+        body_length = self.body_length + eaten_count * SEGMENTS_PER_FOOD
+        if body_length.max(initial=0) > self.max_segments:
+            raise RuntimeError(
+                f"Una partida pasó de max_segments={self.max_segments} segmentos; "
+                "crea el entorno con un max_segments mayor"
+            )
+        self.score += eaten_count
+        self.body_length = body_length
+        envs, slots = np.nonzero(eaten)
+        self._spawn_rewards(envs, slots)
+
+        # Choque con el propio cuerpo
+        body, alive = self.body_positions()
+        diff = body - self.head[:, None, :]
+        hit = (np.sum(diff * diff, axis=-1) < (SNAKE_RADIUS * 1.5) ** 2) & alive
+        done = np.any(hit, axis=1)
+
+        self.ticks += 1
+        final_score = np.where(done, self.score, -1)
+        self._reset_envs(self._env_index[done])
+
+        reward = eaten_count.astype(np.float32)
+        return self._observe(), reward, done, {"final_score": final_score}
+
+    def _observe(self):
+        rel = (self.reward_pos - self.head[:, None, :]) / HEX_RADIUS
+        angle = np.radians(self.hex_angle)
+        obs = np.concatenate([
+            self.head / HEX_RADIUS,
+            self.velocity / SNAKE_SPEED,
+            np.cos(angle)[:, None],
+            np.sin(angle)[:, None],
+            rel.reshape(self.num_envs, -1),
+            (self.reward_vel / SNAKE_SPEED).reshape(self.num_envs, -1),
+        ], axis=1)
+        return obs.astype(np.float32)
+
+
+# ----------------- BENCHMARK -----------------
+
+def benchmark(sizes=(1, 64, 1024), seconds=2.0, seed=0):
+    """Mide pasos-partida por segundo con acciones aleatorias para cada N."""
+    results = {}
+    for num_envs in sizes:
+        env = BatchSnakeEnv(num_envs, seed=seed)
+        env.reset()
+        rng = np.random.default_rng(seed)
+        steps = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            # Cambiar de dirección de vez en cuando, como un jugador
+            actions = rng.integers(0, NUM_ACTIONS, num_envs) * (rng.random(num_envs) < 0.05)
+            env.step(actions)
+            steps += 1
+        elapsed = time.perf_counter() - start
+        results[num_envs] = steps * num_envs / elapsed
+        print(f"N={num_envs:5d}: {results[num_envs]:12,.0f} partidas-paso/s ({steps / elapsed:,.0f} steps/s)")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,37 +1,41 @@
+import time
+
+# Origen de la traza de arranque (ver StartupTrace): antes de importar pygame,
+# que es con diferencia lo más lento de arrancar
+_IMPORT_START = time.perf_counter()
+
+import argparse
+import functools
+from collections import OrderedDict, deque
 import math
 import random
 import pygame
 import json
 import os
 
-# Inicializar pygame
-pygame.init()
+import numpy as np
+
+from snake_sim import (
+    SnakeSimulation,
+    STORM_PARAMS,
+    PARTICLE_SPARK,
+    PARTICLE_FLASH,
+    HEX_RADIUS,
+    SNAKE_RADIUS,
+    REWARD_RADIUS,
+    SPARKS_PER_REWARD,
+)
+from snake_arena import load_arena, list_levels
+from snake_assets import load_sprites
+from snake_replay import save_replay
 
 # ----------------- CONSTANTES GENERALES -----------------
+# Las constantes de juego (velocidades, física, partículas) viven en snake_sim.py
 
 SCREEN_WIDTH = 400   # Ancho para móviles (vertical)
 SCREEN_HEIGHT = 800  # Alto para móviles (vertical)
 SCREEN_TITLE = "Hex Snake - Mobile"
-
-HEX_RADIUS = 150.0   # Radio ajustado para formato vertical
-
-SNAKE_SPEED = 200.0          # píxeles / segundo
-SNAKE_RADIUS = 10.0          # tamaño base "pixel art"
-
-INITIAL_SEGMENTS = 3         # nº inicial de segmentos (esferas) del cuerpo
-SEGMENTS_PER_FOOD = 1         # segmentos que se agregan por cada comida
-SEGMENT_SPACING = SNAKE_RADIUS * 2.2  # distancia entre segmentos
-
-NUM_REWARDS = 5
-REWARD_RADIUS = 8.0
-GRAVITY = -150.0             # hacia abajo en coords locales (más suave)
-REWARD_BOUNCE = 0.85         # rebote con pérdida de energía (más suave)
-
-HEX_ROTATION_SPEED = 20.0    # grados / segundo (velocidad base)
-HEX_ROTATION_CHANGE_MIN = 2.0   # tiempo mínimo entre cambios de rotación (segundos)
-HEX_ROTATION_CHANGE_MAX = 5.0   # tiempo máximo entre cambios de rotación (segundos)
-HEX_ROTATION_SPEED_MIN = 10.0   # velocidad mínima de rotación (grados/segundo)
-HEX_ROTATION_SPEED_MAX = 40.0   # velocidad máxima de rotación (grados/segundo)
+TARGET_FPS = 60
 
 # Parallax y fondo (ajustado para móviles)
 NUM_STARS = 100  # Menos estrellas para mejor rendimiento en móviles
@@ -40,17 +44,9 @@ GRID_SPACING = 30  # Grid más pequeño para móviles
 GRID_COLOR = (30, 30, 50, 100)
 NUM_BACKGROUND_SHAPES = 8  # Menos formas para mejor rendimiento
 PARALLAX_FACTOR = 0.15  # Factor de parallax para el fondo
+PARALLAX_MARGIN = 4     # píxeles extra de la capa de estrellas más allá del parallax máximo
 HEX_NOISE_POINTS = 120  # Menos puntos naranjas para móviles
 
-# Partículas
-PARTICLE_LIFETIME = 0.4  # segundos de vida de las partículas
-SPARKS_PER_REWARD = 12   # número de chispas al recoger recompensa
-SPARK_SPEED_MIN = 80.0   # velocidad mínima de chispas
-SPARK_SPEED_MAX = 200.0  # velocidad máxima de chispas
-SPARK_SIZE = 3.0         # tamaño de las chispas
-FLASH_LIFETIME = 0.3     # duración del flash de rebote
-FLASH_SIZE = 15.0        # tamaño del flash
-
 # Efectos visuales: Glow, Luces y Sombras
 REWARD_GLOW_LAYERS = 5   # número de capas para el glow de recompensas
 REWARD_GLOW_SIZE = 10.0  # tamaño del glow de recompensas
@@ -61,6 +57,70 @@ SHADOW_OFFSET_X = 3.0    # offset de sombra en X
 SHADOW_OFFSET_Y = -3.0   # offset de sombra en Y
 SHADOW_ALPHA = 80        # opacidad de las sombras
 
+# Glow y luces (ver _draw_glow / _draw_lights): sprites de gradiente radial
+# pre-horneados una vez por tamaño/color y sumados con BLEND_RGB_ADD
+REWARD_GLOW_COLOR = (255, 190, 60)   # dorado, como bonificacion.png
+REWARD_GLOW_INTENSITY = 0.35         # fracción del color sumada en el centro
+HEX_GLOW_COLOR = (100, 150, 255)     # el del borde del hexágono
+HEX_GLOW_INTENSITY = 0.3             # fracción del color sumada sobre el borde
+LIGHT_COLOR = (110, 200, 120)        # luz verdosa alrededor de la cabeza
+LIGHT_INTENSITY = 0.18
+LIGHT_LAYERS = 12                    # anillos del gradiente de las luces
+FLASH_LIGHT_RADIUS = LIGHT_RADIUS / 2  # luz de los flashes al rebotar contra la pared
+FLASH_LIGHT_STEPS = 4                # niveles de fundido pre-horneados del flash
+
+# Niveles de calidad del glow. low: glow de recompensas y del borde con pocos
+# sprites; high: borde más denso y luces dinámicas (cabeza y flashes)
+GLOW_QUALITIES = ("off", "low", "high")
+GLOW_QUALITY = "high"
+HEX_GLOW_SPACING = {"low": 12.0, "high": 6.0}  # px entre sprites del glow del borde
+# En low, con más recompensas que esto (lluvia) no se pinta su glow: miles de
+# glows solapados solo aclaran la arena y cuestan más que las propias recompensas
+GLOW_MAX_REWARDS = {"low": 64, "high": None}
+
+# Calidad adaptativa (ver QualityController): niveles de mejor a peor, cada
+# uno recorta algo más que el anterior. stars es la fracción de estrellas
+# que se pintan y flash_rays los rayos de cada flash (0 = solo el círculo)
+QUALITY_LEVELS = (
+    {"glow": "high", "shadows": True, "stars": 1.0, "sparks": SPARKS_PER_REWARD, "flash_rays": 8},
+    {"glow": "low", "shadows": True, "stars": 1.0, "sparks": SPARKS_PER_REWARD, "flash_rays": 8},
+    {"glow": "low", "shadows": False, "stars": 1.0, "sparks": SPARKS_PER_REWARD, "flash_rays": 8},
+    {"glow": "low", "shadows": False, "stars": 0.5, "sparks": SPARKS_PER_REWARD // 2, "flash_rays": 4},
+    {"glow": "off", "shadows": False, "stars": 0.25, "sparks": SPARKS_PER_REWARD // 4, "flash_rays": 0},
+)
+FRAME_BUDGET_MS = 1000.0 / TARGET_FPS
+QUALITY_WINDOW = 60        # frames de juego en la ventana (deslizante) del percentil
+QUALITY_PERCENTILE = 90
+QUALITY_COOLDOWN = QUALITY_WINDOW  # frames sin cambiar tras un cambio: la ventana se renueva entera
+QUALITY_DOWN_RATIO = 0.9   # baja de nivel si el percentil pasa del 90% del presupuesto
+QUALITY_UP_RATIO = 0.5     # sube si queda por debajo del 50%...
+QUALITY_UP_DELAY = 300     # ...y lleva al menos estos frames en el nivel actual
+
+# Sprites procesados (ver snake_assets): imagen de presentación a pantalla
+# completa y recompensa / cuerpo un poco más grandes que su radio
+PRESENTATION_SPRITE = {"size": (SCREEN_WIDTH, SCREEN_HEIGHT)}
+BONUS_SPRITE = {"fit": int(REWARD_RADIUS * 2.5)}
+BODY_SPRITE = {"fit": int(SNAKE_RADIUS * 2.5), "green": True}
+# Lo que `python snake_assets.py` mete en el bundle
+GAME_SPRITES = [
+    ("presentacion.png", PRESENTATION_SPRITE),
+    ("bonificacion.png", BONUS_SPRITE),
+    ("bonificacion.png", BODY_SPRITE),
+]
+
+# HUD: dos franjas cacheadas (ver _draw_hud)
+HUD_TOP_HEIGHT = 56      # franja superior con SCORE / BEST / REWARDS
+HUD_BAR_HEIGHT = 65      # barra inferior (fondo + controles)
+
+# Modo dirty-rects: margen extra (px) alrededor de lo que se mueve en el mundo
+DIRTY_MARGIN = 4
+
+# Modo local: el contenido fijo de la arena (relleno, borde, puntos naranjas) se
+# pinta una vez en coords locales y se rota como superficie, cacheada por ángulo
+LOCAL_ANGLE_STEP = 1.0            # grados por cubo de ángulo (la vista gira a saltos)
+LOCAL_ROTATION_CACHE_SIZE = 64    # arenas rotadas que se guardan (LRU)
+LOCAL_PADDING = 4                 # px alrededor de la arena en la superficie local
+
 STATE_PRESENTATION = "presentation"
 STATE_MENU = "menu"
 STATE_PLAYING = "playing"
@@ -76,28 +136,11 @@ COLOR_AMAZON = (59, 122, 87)
 COLOR_AQUAMARINE = (127, 255, 212)
 
 
-# ----------------- HELPERS DE VECTORES -----------------
-
-def vec_dot(a, b):
-    return a[0] * b[0] + a[1] * b[1]
-
-
-def vec_scale(a, s):
-    return [a[0] * s, a[1] * s]
-
-
-def vec_length(a):
-    return math.hypot(a[0], a[1])
-
-
-def vec_reflect(v, n):
-    """Refleja el vector v contra una normal n (unitaria)."""
-    dot = vec_dot(v, n)
-    return [v[0] - 2 * dot * n[0], v[1] - 2 * dot * n[1]]
-
-
 # ----------------- HELPERS DE PIXEL ART TEXT -----------------
 
+TEXT_CACHE_SIZE = 64   # textos renderizados que se guardan (LRU)
+GLYPH_ATLAS_CACHE_SIZE = 16  # atlas de glifos por (pixel_size, color)
+
 # Fuente pixel art simple 5x7 (solo números y algunas letras básicas)
 PIXEL_FONT = {
     '0': ['11110', '10001', '10001', '10001', '10001', '10001', '11110'],
@@ -140,6 +183,46 @@ PIXEL_FONT = {
     '↓': ['00100', '00100', '00100', '00100', '10101', '01110', '00100'],
 }
 
+# Orden de los glifos en el atlas: columna i = PIXEL_GLYPHS[i]
+PIXEL_GLYPHS = "".join(PIXEL_FONT)
+PIXEL_GLYPH_INDEX = {char: i for i, char in enumerate(PIXEL_GLYPHS)}
+
+
+@functools.lru_cache(maxsize=GLYPH_ATLAS_CACHE_SIZE)
+def _glyph_atlas(pixel_size, color):
+    """Todos los glifos de PIXEL_FONT rasterizados en fila, para un tamaño y color."""
+    char_width = 6 * pixel_size
+    atlas = pygame.Surface((len(PIXEL_GLYPHS) * char_width, 7 * pixel_size), pygame.SRCALPHA)
+    for i, char in enumerate(PIXEL_GLYPHS):
+        for row_idx, row in enumerate(PIXEL_FONT[char]):
+            for col_idx, pixel in enumerate(row):
+                if pixel == '1':
+                    px = i * char_width + col_idx * pixel_size
+                    py = row_idx * pixel_size
+                    pygame.draw.rect(atlas, color, (px, py, pixel_size, pixel_size))
+    return atlas
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_pixel_text(text, color, pixel_size=3):
+    """
+    Texto completo en una superficie con transparencia, montado con blits
+    del atlas de glifos. Se cachea por (texto, color, tamaño): las
+    etiquetas fijas ("SCORE", "GAME OVER"...) quedan en un solo blit.
+    La superficie es compartida: no modificarla.
+    """
+    char_width = 6 * pixel_size
+    height = 7 * pixel_size
+    atlas = _glyph_atlas(pixel_size, color)
+    rendered = pygame.Surface((max(len(text), 1) * char_width, height), pygame.SRCALPHA)
+    for i, char in enumerate(text.upper()):
+        index = PIXEL_GLYPH_INDEX.get(char)
+        # Si el carácter no está en la fuente, queda el espacio
+        if index is not None:
+            rendered.blit(atlas, (i * char_width, 0), (index * char_width, 0, char_width, height))
+    return rendered
+
+
 def draw_pixel_text(surface, text, x, y, color, pixel_size=3):
     """
     Dibuja texto en estilo pixel art.
@@ -149,34 +232,73 @@ def draw_pixel_text(surface, text, x, y, color, pixel_size=3):
     color: tupla RGB o RGBA
     pixel_size: tamaño de cada píxel
     """
-    char_width = 6 * pixel_size  # Ancho de cada carácter (5 píxeles + 1 espacio)
-    current_x = x
-    
     # Convertir color RGBA a RGB si es necesario
-    if len(color) == 4:
-        color_rgb = color[:3]
-    else:
-        color_rgb = color
-    
-    for char in text.upper():
-        if char in PIXEL_FONT:
-            pattern = PIXEL_FONT[char]
-            # Dibujar filas normalmente de arriba hacia abajo
-            for row_idx, row in enumerate(pattern):
-                for col_idx, pixel in enumerate(row):
-                    if pixel == '1':
-                        px = current_x + col_idx * pixel_size
-                        # En pygame Y va hacia abajo, empezamos desde y y vamos sumando
-                        py = y + row_idx * pixel_size
-                        pygame.draw.rect(
-                            surface,
-                            color_rgb,
-                            (int(px), int(py), pixel_size, pixel_size)
-                        )
-            current_x += char_width
-        else:
-            # Si el carácter no está en la fuente, dejar espacio
-            current_x += char_width
+    color_rgb = tuple(color[:3])
+    surface.blit(render_pixel_text(text, color_rgb, pixel_size), (int(x), int(y)))
+
+
+# ----------------- HELPERS DE SOMBRAS Y RECTÁNGULOS -----------------
+
+def _shadow_circle(radius):
+    """
+    Sprite de sombra circular: (superficie, desplazamiento). Se blitea en
+    centro - desplazamiento y cubre los mismos píxeles que draw.circle.
+    """
+    offset = radius + 1
+    sprite = pygame.Surface((2 * offset, 2 * offset), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, (0, 0, 0, SHADOW_ALPHA), (offset, offset), radius)
+    return sprite, offset
+
+
+def _glow_profile(dist, inner, size, layers):
+    """
+    Intensidad (0..1) a distancia dist: layers anillos concéntricos de inner
+    a inner + size, cada uno suma 1 / layers con el borde suavizado.
+    """
+    radii = inner + size * np.arange(1, layers + 1) / layers
+    dist = np.asarray(dist, dtype=float)
+    return np.clip(radii.reshape((-1,) + (1,) * dist.ndim) - dist + 0.5, 0.0, 1.0).mean(axis=0)
+
+
+@functools.lru_cache(maxsize=None)
+def _radial_glow(inner, size, layers, color, intensity):
+    """
+    Sprite de glow pre-horneado, uno por tamaño/color: RGB sin alpha para
+    sumarlo con BLEND_RGB_ADD. Devuelve (superficie, desplazamiento) como
+    _shadow_circle: se blitea en centro - desplazamiento.
+    """
+    offset = math.ceil(inner + size) + 1
+    coords = np.arange(-offset, offset + 1)
+    dist = np.hypot(coords[:, None], coords[None, :])
+    level = _glow_profile(dist, inner, size, layers) * intensity
+    pixels = np.rint(level[..., None] * np.array(color, dtype=float)).clip(0, 255).astype(np.uint8)
+    return pygame.surfarray.make_surface(pixels).convert(), offset
+
+
+def _contour_points(vertices, spacing):
+    """Puntos cada ~spacing px a lo largo del contorno cerrado, vértices incluidos."""
+    vertices = np.asarray(vertices, dtype=float)
+    points = []
+    for start, end in zip(vertices, np.roll(vertices, -1, axis=0)):
+        steps = max(1, math.ceil(math.hypot(*(end - start)) / spacing))
+        points.append(start + (end - start) * (np.arange(steps)[:, None] / steps))
+    return np.concatenate(points)
+
+
+def _bounding_rect(groups, bounds):
+    """
+    Rectángulo (recortado a bounds) que cubre todos los sprites: groups es
+    una lista de (centros (N, 2), media anchura del sprite).
+    """
+    rect = None
+    for points, half in groups:
+        if len(points) == 0:
+            continue
+        x0, y0 = np.floor(points.min(axis=0) - half) - 1
+        x1, y1 = np.ceil(points.max(axis=0) + half) + 1
+        part = pygame.Rect(int(x0), int(y0), int(x1 - x0) + 1, int(y1 - y0) + 1)
+        rect = part if rect is None else rect.union(part)
+    return bounds.clip(rect) if rect is not None else pygame.Rect(0, 0, 0, 0)
 
 
 # ----------------- FUNCIONES DE GUARDADO -----------------
@@ -206,15 +328,122 @@ def save_best_score(score):
     except Exception as e:
         print(f"Error al guardar mejor score: {e}")
 
+# ----------------- TRAZA DE ARRANQUE -----------------
+
+class StartupTrace:
+    """
+    Milisegundos por fase de arranque, desde la importación del módulo hasta
+    que el mundo está listo. Siempre se mide (es barato); report() lo imprime.
+    """
+
+    def __init__(self, origin=_IMPORT_START):
+        self.origin = origin
+        self.phases = []  # (nombre, ms)
+        self._last = origin
+        self.first_frame_ms = None
+
+    def mark(self, name):
+        """Cierra la fase name: tiempo desde la marca anterior."""
+        now = time.perf_counter()
+        self.phases.append((name, (now - self._last) * 1000.0))
+        self._last = now
+
+    def first_frame(self):
+        """Marca el instante en que el primer frame llegó a la ventana."""
+        self.mark("primer frame")
+        self.first_frame_ms = (self._last - self.origin) * 1000.0
+
+    def total_ms(self):
+        return (self._last - self.origin) * 1000.0
+
+    def report(self):
+        print("Traza de arranque:")
+        for name, ms in self.phases:
+            print(f"  {name:<14} {ms:8.1f} ms")
+        if self.first_frame_ms is not None:
+            print(f"  primer frame a {self.first_frame_ms:.1f} ms")
+        print(f"  total          {self.total_ms():8.1f} ms")
+
+
+# ----------------- CALIDAD ADAPTATIVA -----------------
+
+class QualityController:
+    """
+    Elige el nivel de QUALITY_LEVELS a partir del percentil QUALITY_PERCENTILE
+    del tiempo de frame de los últimos QUALITY_WINDOW frames. Con histéresis:
+    baja cuando la ventana pasa de QUALITY_DOWN_RATIO del presupuesto y solo
+    sube tras QUALITY_UP_DELAY frames por debajo de QUALITY_UP_RATIO. La
+    ventana nunca se vacía; tras cada cambio (y al empezar) no se decide nada
+    durante QUALITY_COOLDOWN frames, así el percentil siempre sale de una
+    ventana llena y, tras un cambio, solo con frames del nivel nuevo.
+    """
+
+    def __init__(self, budget_ms=FRAME_BUDGET_MS, num_levels=len(QUALITY_LEVELS), level=0):
+        self.budget_ms = budget_ms
+        self.max_level = num_levels - 1
+        self.level = level
+        self.samples = deque(maxlen=QUALITY_WINDOW)
+        self.frame_time = None  # último percentil calculado (ms)
+        self._since_change = 0
+
+    def percentile(self):
+        """
+        Percentil QUALITY_PERCENTILE de la ventana, por rango: con tan pocas
+        muestras ordenarlas es mucho más barato que np.percentile.
+        """
+        ordered = sorted(self.samples)
+        return ordered[max(0, math.ceil(len(ordered) * QUALITY_PERCENTILE / 100) - 1)]
+
+    def add(self, frame_ms):
+        """Registra un frame (ms de trabajo); devuelve el nivel nuevo si cambia, si no None."""
+        self.samples.append(frame_ms)
+        self._since_change += 1
+        if self._since_change < QUALITY_COOLDOWN:
+            return None
+        frame_time = self.frame_time = self.percentile()
+        if frame_time > self.budget_ms * QUALITY_DOWN_RATIO and self.level < self.max_level:
+            return self._change(self.level + 1)
+        if (frame_time < self.budget_ms * QUALITY_UP_RATIO and self.level > 0
+                and self._since_change >= QUALITY_UP_DELAY):
+            return self._change(self.level - 1)
+        return None
+
+    def _change(self, level):
+        self.level = level
+        self._since_change = 0
+        return level
+
+
 # ----------------- CLASE PRINCIPAL -----------------
 
 class SnakeGame:
-    def __init__(self):
-        # Crear ventana de pygame
+    """
+    Adaptador de pygame sobre SnakeSimulation: ventana, input, estados de
+    pantalla y dibujo. Toda la lógica de la partida vive en self.sim.
+    """
+
+    def __init__(self, fixed_timestep=True, params=None, arena=None, dirty_rects=False,
+                 local_render=False, startup_trace=False, glow=GLOW_QUALITY,
+                 adaptive_quality=True):
+        # Traza de arranque (ver StartupTrace); con startup_trace se imprime
+        # cuando el mundo queda listo
+        self.startup_trace = StartupTrace()
+        self._print_startup_trace = startup_trace
+        self.startup_trace.mark("importación")
+
+        # Solo el subsistema de vídeo (trae consigo los eventos): pygame.init()
+        # arrancaría también audio y joystick, que el juego no usa
+        pygame.display.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption(SCREEN_TITLE)
         self.clock = pygame.time.Clock()
         self.running = True
+        # Las cachés de superficies son del módulo y sobreviven a pygame.quit():
+        # las de una ventana anterior (.convert() a su formato) no valen aquí
+        _radial_glow.cache_clear()
+        render_pixel_text.cache_clear()
+        _glyph_atlas.cache_clear()
+        self.startup_trace.mark("ventana")
         
         # Color de fondo
         self.bg_color = (15, 10, 25)  # Azul-púrpura oscuro
@@ -222,40 +451,46 @@ class SnakeGame:
         # centro de la escena
         self.cx = SCREEN_WIDTH / 2
         self.cy = SCREEN_HEIGHT / 2
-
-        # Geometría del hexágono en coords locales (centro = (0,0))
-        self.hex_vertices_local = self._create_hexagon(HEX_RADIUS)
-        self.hex_edges = self._compute_edges(self.hex_vertices_local)
-
-        # Rotación visual del escenario
-        self.hex_angle = 0.0
-        self.hex_rotation_speed = HEX_ROTATION_SPEED  # Velocidad actual de rotación
-        self.hex_rotation_timer = 0.0  # Temporizador para cambios aleatorios
-        self.hex_rotation_change_time = random.uniform(HEX_ROTATION_CHANGE_MIN, HEX_ROTATION_CHANGE_MAX)
+        # Rotación de la vista (cos/sin del ángulo del escenario, ver _view_rotation)
+        self._view_angle = None
+        self._view_cos = 1.0
+        self._view_sin = 0.0
+
+        # Simulación (estado de la partida, sin pygame), creada en setup_world.
+        # Con fixed_timestep la física avanza en pasos de FIXED_TIMESTEP sin
+        # importar los FPS; si no, se usa el delta de cada frame tal cual.
+        # params cambia el balance de la partida (p. ej. STORM_PARAMS) y arena
+        # la forma del escenario (ver snake_arena.py; por defecto el hexágono).
+        self.sim = None
+        self._sim_params = params
+        self._sim_arena = arena
+        self.fixed_timestep = fixed_timestep
+        self._world_ready = False
 
         # HUD / estado
         self.state = STATE_PRESENTATION  # Empezar en pantalla de presentación
-        self.score = 0
         self.best_score = load_best_score()  # Cargar mejor score guardado
-        
-        self.snake_head_pos = [0.0, 0.0]
-        self.snake_velocity = [SNAKE_SPEED, 0.0]
-        self.snake_body = []  # Lista de posiciones de segmentos (esferas)
-        self.last_head_pos = [0.0, 0.0]  # Para rastrear movimiento
-        self.snake_path = []  # Historial de posiciones de la cabeza para que los segmentos sigan
-        self.next_direction = None  # Dirección pendiente para cambiar
-
-        self.rewards = []
-        self.game_over_reason = ""
 
         # Fondo: estrellas y formas
         self.stars = []
         self.background_shapes = []
+        # Franjas cacheadas del HUD y los valores con los que se pintaron
+        self._hud_top = None
+        self._hud_bottom = None
+        self._hud_values = None
+
+        # Capas cacheadas del fondo (grid y estrellas), ver _background_layers
+        self._background_key = None
+        self._grid_layer = None
+        self._star_layer = None
+        self._star_margin = 0
         self.hex_noise_points = []  # Puntos naranjas dentro del hexágono
-        self._init_background()
 
-        # Partículas
-        self.particles = []  # Lista de partículas activas
+        # Modo local (ver _rotated_arena): arena pre-pintada y rotada por cubos
+        # de ángulo; las superficies locales se rehacen con los puntos naranjas
+        self.local_render = local_render
+        self._arena_local = None
+        self._arena_rotations = OrderedDict()
 
         # Botón de reinicio: (left, top, width, height) - ajustado para móviles
         self.restart_button_rect = (
@@ -273,206 +508,92 @@ class SnakeGame:
             45,
         )
 
-        # Cargar imagen de presentación para la pantalla inicial
+        # Sprites ya procesados (escalado, filtro verde) del bundle o la caché de
+        # assets. Aquí solo el de la presentación; el resto en setup_world
         try:
-            presentation_image_path = os.path.join(os.path.dirname(__file__), "assets", "presentacion.png")
-            presentation_image = pygame.image.load(presentation_image_path).convert_alpha()
-            # Escalar imagen para que llene toda la pantalla (ajustar a tamaño completo)
-            self.presentation_image = pygame.transform.scale(presentation_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            self.presentation_image = load_sprites("presentacion.png", PRESENTATION_SPRITE)[0]
         except Exception as e:
             print(f"Error al cargar imagen presentacion.png: {e}")
             self.presentation_image = None
+        self.startup_trace.mark("presentación")
 
-        # Cargar imagen de bonificación para las recompensas
-        try:
-            bonus_image_path = os.path.join(os.path.dirname(__file__), "assets", "bonificacion.png")
-            bonus_image = pygame.image.load(bonus_image_path).convert_alpha()
-            # Escalar imagen al tamaño de las recompensas (basado en REWARD_RADIUS)
-            # Usar aproximadamente 2 * REWARD_RADIUS como tamaño
-            reward_size = int(REWARD_RADIUS * 2.5)  # Tamaño un poco más grande que el radio
-            img_width, img_height = bonus_image.get_size()
-            # Mantener aspecto de la imagen
-            if img_width > img_height:
-                new_width = reward_size
-                new_height = int(img_height * (reward_size / img_width))
-            else:
-                new_height = reward_size
-                new_width = int(img_width * (reward_size / img_height))
-            self.bonus_image = pygame.transform.scale(bonus_image, (new_width, new_height))
-        except Exception as e:
-            print(f"Error al cargar imagen bonificacion.png: {e}")
-            self.bonus_image = None
+        # Modo dirty-rects (ver _draw_dirty): fondo sin parallax y solo se
+        # repintan y presentan las zonas que cambian entre frames
+        self.dirty_rects = dirty_rects
+        self._update_rects = None  # rects a presentar; None = pantalla entera
+        self._dirty_prev = None    # (rect del mundo, cruces) del frame anterior
 
-        # Cargar imagen del cuerpo de la serpiente (bonificacion.png con filtro verde)
-        try:
-            snake_body_image_path = os.path.join(os.path.dirname(__file__), "assets", "bonificacion.png")
-            snake_body_image = pygame.image.load(snake_body_image_path).convert_alpha()
-            # Escalar imagen al tamaño de los segmentos (basado en SNAKE_RADIUS)
-            body_size = int(SNAKE_RADIUS * 2.5)  # Tamaño un poco más grande que el radio
-            img_width, img_height = snake_body_image.get_size()
-            # Mantener aspecto de la imagen
-            if img_width > img_height:
-                new_width = body_size
-                new_height = int(img_height * (body_size / img_width))
-            else:
-                new_height = body_size
-                new_width = int(img_width * (body_size / img_height))
-            scaled_image = pygame.transform.scale(snake_body_image, (new_width, new_height))
-            
-            # Aplicar filtro verde con saturación preservando transparencia
-            # Crear una nueva superficie con transparencia
-            green_filtered = pygame.Surface((new_width, new_height), pygame.SRCALPHA)
-            
-            # Crear una máscara circular para eliminar bordes cuadrados
-            mask = pygame.Surface((new_width, new_height), pygame.SRCALPHA)
-            center_x, center_y = new_width // 2, new_height // 2
-            radius = min(new_width, new_height) // 2
-            pygame.draw.circle(mask, (255, 255, 255, 255), (center_x, center_y), radius)
-            
-            # Aplicar filtro verde usando pixelarray para mejor control
-            pixel_array = pygame.surfarray.pixels3d(scaled_image)
-            alpha_array = pygame.surfarray.pixels_alpha(scaled_image)
-            mask_array = pygame.surfarray.pixels_alpha(mask)
-            
-            # Crear array para la imagen filtrada
-            filtered_pixels = pygame.surfarray.pixels3d(green_filtered)
-            filtered_alpha = pygame.surfarray.pixels_alpha(green_filtered)
-            
-            for y in range(new_height):
-                for x in range(new_width):
-                    # Solo procesar píxeles dentro de la máscara circular y con alpha
-                    if mask_array[x, y] > 0 and alpha_array[x, y] > 0:
-                        r, g, b = pixel_array[x, y]
-                        # Aplicar filtro verde manteniendo la luminosidad
-                        # Mezclar hacia verde con saturación
-                        green_factor = 0.8  # Factor de verde
-                        saturation = 1.3   # Factor de saturación
-                        
-                        # Calcular nuevo color verde saturado
-                        new_r = int(r * (1 - green_factor) + 50 * green_factor)
-                        new_g = int(min(255, g * saturation * green_factor + 200 * green_factor))
-                        new_b = int(b * (1 - green_factor) + 50 * green_factor)
-                        
-                        filtered_pixels[x, y] = (new_r, new_g, new_b)
-                        filtered_alpha[x, y] = alpha_array[x, y]  # Preservar alpha original
-                    else:
-                        # Fuera de la máscara o transparente
-                        filtered_alpha[x, y] = 0
-            
-            del pixel_array
-            del alpha_array
-            del mask_array
-            del filtered_pixels
-            del filtered_alpha
-            
-            self.snake_body_image = green_filtered
-        except Exception as e:
-            print(f"Error al cargar imagen bonificacion.png para cuerpo: {e}")
-            self.snake_body_image = None
+        # Calidad del glow y las luces (GLOW_QUALITIES); los sprites se
+        # preparan en setup_world con set_glow_quality. glow es el máximo: la
+        # calidad adaptativa puede bajarlo
+        self.max_glow_quality = glow
+        self.glow_quality = glow
 
-        # Inicializamos mundo pero arrancamos en presentación
-        self.start_new_game()
+        # Calidad adaptativa: run() pasa al controlador el tiempo de cada frame
+        # de juego y aplica el nivel que elija (ver set_quality_level)
+        self.quality = QualityController() if adaptive_quality else None
+        self.quality_level = 0
 
     # ----------------- SETUP MUNDO -----------------
 
-    def _create_hexagon(self, radius):
-        """Crea vértices de un hex regular centrado en (0,0)."""
-        vertices = []
-        for i in range(6):
-            angle = math.radians(60 * i)
-            x = radius * math.cos(angle)
-            y = radius * math.sin(angle)
-            vertices.append((x, y))
-        return vertices
-
-    def _compute_edges(self, vertices):
+    def setup_world(self):
         """
-        Para cada lado del hex: devuelve (v0, normal_salida).
-        La normal apunta HACIA FUERA del polígono.
+        Simulación, sprites del juego, sombras y fondo. No hace falta para la
+        pantalla de presentación, así que run() lo difiere hasta después del
+        primer frame; draw() y start_new_game() lo llaman si aún no se hizo.
         """
-        edges = []
-        center = (0.0, 0.0)
-        n_vertices = len(vertices)
+        if self._world_ready:
+            return
+        self._world_ready = True
+        trace = self.startup_trace
 
-        for i in range(n_vertices):
-            v0 = vertices[i]
-            v1 = vertices[(i + 1) % n_vertices]
+        self.sim = SnakeSimulation(params=self._sim_params, arena=self._sim_arena)
+        trace.mark("simulación")
 
-            ex = v1[0] - v0[0]
-            ey = v1[1] - v0[1]
+        self._init_background()
+        trace.mark("fondo")
 
-            # Candidata a normal
-            nx = ey
-            ny = -ex
-            length = math.hypot(nx, ny)
-            if length == 0:
-                continue
-            nx /= length
-            ny /= length
+        # bonificacion.png para las recompensas y, con filtro verde, para el cuerpo
+        try:
+            self.bonus_image, self.snake_body_image = load_sprites(
+                "bonificacion.png", BONUS_SPRITE, BODY_SPRITE
+            )
+        except Exception as e:
+            print(f"Error al cargar imagen bonificacion.png: {e}")
+            self.bonus_image = None
+            self.snake_body_image = None
+        trace.mark("sprites")
 
-            # Asegurar que el centro está del lado interior (dist <= 0)
-            dist_center = (center[0] - v0[0]) * nx + (center[1] - v0[1]) * ny
-            if dist_center > 0:
-                nx = -nx
-                ny = -ny
+        # Sombras: sprites pre-horneados y una capa persistente que se limpia
+        # solo en la zona que se pintó la pasada anterior
+        self._init_shadow_sprites()
+        self._shadow_layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        self._shadow_dirty = pygame.Rect(0, 0, 0, 0)
+        trace.mark("sombras")
 
-            edges.append((v0, [nx, ny]))
+        self.set_quality_level(self.quality_level)
+        trace.mark("glow")
 
-        return edges
+        # Inicializamos mundo pero seguimos en el estado actual (presentación)
+        self.start_new_game()
+        trace.mark("partida")
+        if self._print_startup_trace:
+            trace.report()
 
     def start_new_game(self):
         """Resetea partida (pero no toca el estado/menu)."""
+        self.setup_world()
         # actualiza best_score si venimos de una partida jugada
         old_best = self.best_score
-        self.best_score = max(self.best_score, self.score)
+        self.best_score = max(self.best_score, self.sim.score)
         # Guardar si se superó el mejor score
         if self.best_score > old_best:
             save_best_score(self.best_score)
 
-        self.score = 0
-        self.hex_angle = 0.0
-
-        self.snake_head_pos = [0.0, 0.0]
-        self.snake_velocity = [SNAKE_SPEED, 0.0]
-        self.last_head_pos = [0.0, 0.0]
-        self.next_direction = None
-        # Inicializar con algunos segmentos iniciales
-        self.snake_body = []
-        for i in range(INITIAL_SEGMENTS):
-            offset = -(i + 1) * SEGMENT_SPACING
-            self.snake_body.append([offset, 0.0])
-        
-        # Inicializar path de la serpiente
-        self.snake_path = []
-        # Agregar posiciones iniciales al path
-        for i in range(INITIAL_SEGMENTS + 1):
-            offset = -i * SEGMENT_SPACING
-            self.snake_path.append([offset, 0.0])
-
-        self.rewards = []
-        self.game_over_reason = ""
-        
-        # Limpiar partículas al iniciar nuevo juego
-        self.particles = []
-        
-        # Reinicializar puntos naranjas dentro del hexágono
-        self.hex_noise_points = []
-        for _ in range(HEX_NOISE_POINTS):
-            while True:
-                x = random.uniform(-HEX_RADIUS * 0.9, HEX_RADIUS * 0.9)
-                y = random.uniform(-HEX_RADIUS * 0.9, HEX_RADIUS * 0.9)
-                if self._is_inside_hex([x, y], 0):
-                    brightness = random.randint(150, 255)
-                    self.hex_noise_points.append({
-                        "x": x,
-                        "y": y,
-                        "size": random.uniform(1.0, 2.0),
-                        "brightness": brightness
-                    })
-                    break
+        self.sim.reset()
 
-        for _ in range(NUM_REWARDS):
-            self.rewards.append(self._create_reward())
+        # Reinicializar puntos naranjas dentro del hexágono
+        self._init_hex_noise_points()
 
     def _init_background(self):
         """Inicializa estrellas y formas de fondo."""
@@ -516,13 +637,21 @@ class SnakeGame:
                 )
             })
         
+        # Las estrellas cambiaron: las capas cacheadas ya no valen
+        self._background_key = None
+
         # Crear puntos naranjas dentro del hexágono (ruido/estrellas)
+        self._init_hex_noise_points()
+
+    def _init_hex_noise_points(self):
+        """Puntos naranjas dentro de la arena (ruido/estrellas)."""
         self.hex_noise_points = []
+        bounds = self.sim.arena.bounds_radius
         for _ in range(HEX_NOISE_POINTS):
             while True:
-                x = random.uniform(-HEX_RADIUS * 0.9, HEX_RADIUS * 0.9)
-                y = random.uniform(-HEX_RADIUS * 0.9, HEX_RADIUS * 0.9)
-                if self._is_inside_hex([x, y], 0):
+                x = random.uniform(-bounds * 0.9, bounds * 0.9)
+                y = random.uniform(-bounds * 0.9, bounds * 0.9)
+                if self.sim._is_inside_hex([x, y], 0):
                     brightness = random.randint(150, 255)
                     self.hex_noise_points.append({
                         "x": x,
@@ -532,108 +661,37 @@ class SnakeGame:
                     })
                     break
 
-    # ----------------- PARTÍCULAS -----------------
-
-    def _create_sparks(self, pos, count=SPARKS_PER_REWARD):
-        """Crea chispas en la posición dada cuando se recoge una recompensa."""
-        for _ in range(count):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(SPARK_SPEED_MIN, SPARK_SPEED_MAX)
-            vel_x = math.cos(angle) * speed
-            vel_y = math.sin(angle) * speed
-            
-            # Color amarillo/dorado para las chispas
-            color_brightness = random.randint(200, 255)
-            self.particles.append({
-                "type": "spark",
-                "pos": [pos[0], pos[1]],
-                "vel": [vel_x, vel_y],
-                "size": random.uniform(SPARK_SIZE * 0.7, SPARK_SIZE * 1.3),
-                "color": (color_brightness, color_brightness, random.randint(100, 200), 255),
-                "lifetime": PARTICLE_LIFETIME,
-                "age": 0.0
-            })
+        # Los puntos cambiaron: la arena local y sus rotaciones ya no valen
+        self._arena_local = None
+        self._arena_rotations.clear()
 
-    def _create_bounce_flash(self, pos, normal):
-        """Crea un flash en el punto de impacto cuando rebota contra la pared."""
-        nx, ny = normal
-        # Crear flash radial desde el punto de impacto
-        self.particles.append({
-            "type": "flash",
-            "pos": [pos[0], pos[1]],
-            "normal": [nx, ny],  # Dirección de la normal para el flash radial
-            "size": FLASH_SIZE,
-            "color": (255, 255, 200, 255),  # Color blanco/amarillo brillante
-            "lifetime": FLASH_LIFETIME,
-            "age": 0.0
-        })
-
-    def _update_particles(self, delta_time):
-        """Actualiza todas las partículas activas."""
-        particles_to_remove = []
-        
-        for i, particle in enumerate(self.particles):
-            particle["age"] += delta_time
-            
-            # Calcular alpha basado en la edad
-            life_ratio = particle["age"] / particle["lifetime"]
-            if life_ratio >= 1.0:
-                particles_to_remove.append(i)
-                continue
-            
-            alpha = int(255 * (1.0 - life_ratio))
-            
-            if particle["type"] == "spark":
-                # Mover chispa
-                particle["pos"][0] += particle["vel"][0] * delta_time
-                particle["pos"][1] += particle["vel"][1] * delta_time
-                # Aplicar fricción ligera
-                particle["vel"][0] *= 0.98
-                particle["vel"][1] *= 0.98
-                # Actualizar color con alpha
-                particle["color"] = (
-                    particle["color"][0],
-                    particle["color"][1],
-                    particle["color"][2],
-                    alpha
-                )
-            elif particle["type"] == "flash":
-                # El flash solo cambia de tamaño y alpha
-                particle["color"] = (
-                    particle["color"][0],
-                    particle["color"][1],
-                    particle["color"][2],
-                    alpha
-                )
-        
-        # Eliminar partículas expiradas (de atrás hacia adelante para mantener índices)
-        for i in reversed(particles_to_remove):
-            self.particles.pop(i)
+    # ----------------- PARTÍCULAS -----------------
 
     def _draw_particles(self):
         """Dibuja todas las partículas activas."""
-        for particle in self.particles:
-            if particle["type"] == "spark":
+        pool = self.sim.particles
+        n = pool.count
+        if not n:
+            return
+        rows = zip(
+            pool.kind[:n].tolist(), self.screen_particles.tolist(), pool.size[:n].tolist(),
+            pool.color[:n].tolist(), pool.age[:n].tolist(), pool.lifetime[:n].tolist(),
+        )
+        for kind, (sx, sy), size, color, age, lifetime in rows:
+            if kind == PARTICLE_SPARK:
                 # Dibujar chispa como círculo
-                sx, sy = self.world_to_screen(particle["pos"][0], particle["pos"][1])
-                color = particle["color"][:3]  # Solo RGB para pygame
-                pygame.draw.circle(self.screen, color, (int(sx), int(sy)), int(particle["size"]))
-            elif particle["type"] == "flash":
-                # Dibujar flash como círculo radial o líneas
-                sx, sy = self.world_to_screen(particle["pos"][0], particle["pos"][1])
-                nx, ny = particle["normal"]
-                
+                pygame.draw.circle(self.screen, color, (int(sx), int(sy)), int(size))
+            elif kind == PARTICLE_FLASH:
                 # Dibujar círculo brillante
-                life_ratio = particle["age"] / particle["lifetime"]
-                current_size = particle["size"] * (1.0 - life_ratio * 0.5)
-                color = particle["color"][:3]
+                life_ratio = age / lifetime
+                current_size = size * (1.0 - life_ratio * 0.5)
                 pygame.draw.circle(self.screen, color, (int(sx), int(sy)), int(current_size))
                 
                 # Dibujar líneas radiales para efecto de flash
-                num_rays = 8
+                num_rays = self.flash_rays
                 ray_length = current_size * 1.5
                 for i in range(num_rays):
-                    angle = (2 * math.pi * i / num_rays) + particle["age"] * 2.0
+                    angle = (2 * math.pi * i / num_rays) + age * 2.0
                     end_x = sx + math.cos(angle) * ray_length
                     end_y = sy + math.sin(angle) * ray_length
                     pygame.draw.line(
@@ -644,172 +702,56 @@ class SnakeGame:
                         2
                     )
 
-    # ----------------- GEOMETRÍA / COLISIONES -----------------
-
-    def _is_inside_hex(self, pos, radius=0.0):
-        px, py = pos
-        for v0, n in self.hex_edges:
-            nx, ny = n
-            dist = (px - v0[0]) * nx + (py - v0[1]) * ny
-            if dist + radius > 0:
-                return False
-        return True
-
-    def _handle_collision(self, pos, vel, radius, bounce_factor=1.0, create_flash=False):
-        """Colisión círculo–hexágono. Devuelve (pos_corregida, vel_reflejada)."""
-        px, py = pos
-        max_penetration = 0.0
-        collision_normal = None
-        collision_point = None
-
-        for v0, n in self.hex_edges:
-            nx, ny = n
-            dist = (px - v0[0]) * nx + (py - v0[1]) * ny
-            penetration = dist + radius
-
-            if penetration > max_penetration:
-                max_penetration = penetration
-                collision_normal = n
-                # Calcular punto de impacto aproximado
-                collision_point = [px - nx * radius, py - ny * radius]
-
-        if collision_normal is not None and max_penetration > 0.0:
-            nx, ny = collision_normal
-
-            # Reposicionar dentro
-            px -= nx * max_penetration
-            py -= ny * max_penetration
-            pos = [px, py]
-
-            # Reflejar velocidad
-            old_vel = vel.copy()
-            vel = vec_reflect(vel, collision_normal)
-            vel = vec_scale(vel, bounce_factor)
-            
-            # Crear flash si hay rebote significativo y se solicita
-            if create_flash and vec_length(old_vel) > 50.0:
-                self._create_bounce_flash(collision_point, collision_normal)
-
-        return pos, vel
-
-    def _create_reward(self):
-        """Crea una recompensa en posición aleatoria dentro del hex."""
-        max_attempts = 50
-        attempts = 0
-        
-        while attempts < max_attempts:
-            x = random.uniform(-HEX_RADIUS * 0.75, HEX_RADIUS * 0.75)
-            y = random.uniform(-HEX_RADIUS * 0.75, HEX_RADIUS * 0.75)
-            pos = [x, y]
-            
-            # Verificar que esté dentro del hexágono
-            if self._is_inside_hex(pos, REWARD_RADIUS + 2):
-                # Evitar spawn justo encima de la cabeza o del cuerpo
-                dx = pos[0] - self.snake_head_pos[0]
-                dy = pos[1] - self.snake_head_pos[1]
-                dist_to_head = dx * dx + dy * dy
-                
-                # Verificar distancia mínima a la cabeza
-                if dist_to_head > (SNAKE_RADIUS + 50) ** 2:
-                    # Verificar distancia mínima a los segmentos del cuerpo
-                    too_close = False
-                    for segment in self.snake_body:
-                        dx_seg = pos[0] - segment[0]
-                        dy_seg = pos[1] - segment[1]
-                        if dx_seg * dx_seg + dy_seg * dy_seg < (SNAKE_RADIUS + 30) ** 2:
-                            too_close = True
-                            break
-                    
-                    if not too_close:
-                        # Crear velocidad inicial aleatoria
-                        angle = random.uniform(0, 2 * math.pi)
-                        speed = random.uniform(60.0, 120.0)
-                        vel = [math.cos(angle) * speed, math.sin(angle) * speed]
-                        return {"pos": pos, "vel": vel}
-            
-            attempts += 1
-        
-        # Si no se encontró posición válida después de muchos intentos,
-        # usar una posición segura lejos del centro
-        angle_pos = random.uniform(0, 2 * math.pi)
-        dist_from_center = random.uniform(HEX_RADIUS * 0.3, HEX_RADIUS * 0.6)
-        pos = [math.cos(angle_pos) * dist_from_center, math.sin(angle_pos) * dist_from_center]
-        
-        # Verificar que esté dentro
-        if not self._is_inside_hex(pos, REWARD_RADIUS):
-            # Ajustar hacia adentro si está fuera
-            for _ in range(10):
-                pos[0] *= 0.9
-                pos[1] *= 0.9
-                if self._is_inside_hex(pos, REWARD_RADIUS):
-                    break
-        
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(60.0, 120.0)
-        vel = [math.cos(angle) * speed, math.sin(angle) * speed]
-        
-        return {"pos": pos, "vel": vel}
-
     # ----------------- COORDENADAS -----------------
 
+    def _view_rotation(self):
+        """(cos, sin) del ángulo del escenario; solo se recalcula cuando el ángulo cambia."""
+        angle = self.sim.hex_angle
+        if self.local_render:
+            # Todo gira al ángulo del cubo, igual que la arena rotada
+            angle = self._angle_bucket() * LOCAL_ANGLE_STEP
+        if angle != self._view_angle:
+            angle_rad = math.radians(angle)
+            self._view_cos = math.cos(angle_rad)
+            self._view_sin = math.sin(angle_rad)
+            self._view_angle = angle
+        return self._view_cos, self._view_sin
+
     def world_to_screen(self, x, y):
         """
         Coord. locales (hex) -> pantalla, aplicando rotación del escenario.
         Física siempre en coords locales, solo la vista gira.
         """
-        angle_rad = math.radians(self.hex_angle)
-        cos_a = math.cos(angle_rad)
-        sin_a = math.sin(angle_rad)
-
+        cos_a, sin_a = self._view_rotation()
         sx = self.cx + x * cos_a - y * sin_a
         sy = self.cy + x * sin_a + y * cos_a
         return sx, sy
 
-    # ----------------- INPUT -----------------
-
-    def _set_direction(self, screen_direction):
+    def world_to_screen_array(self, points):
+        """world_to_screen para un array de puntos (n, 2) de una pasada -> (n, 2)."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        cos_a, sin_a = self._view_rotation()
+        x = points[:, 0]
+        y = points[:, 1]
+        screen = np.empty_like(points)
+        screen[:, 0] = self.cx + x * cos_a - y * sin_a
+        screen[:, 1] = self.cy + x * sin_a + y * cos_a
+        return screen
+
+    def _project_frame(self):
         """
-        Establece la dirección deseada de la serpiente (Snake clásico).
-        screen_direction es en coordenadas de pantalla (arriba = +Y).
-        La dirección cambia inmediatamente si no es opuesta a la actual.
+        Pasa a pantalla, una vez por frame, todo lo que se dibuja en coords
+        locales. Las sombras reutilizan estas posiciones más su offset.
         """
-        # Normalizar el vector de dirección de pantalla
-        length = vec_length(screen_direction)
-        if length == 0:
-            return
-        
-        # Convertir dirección de pantalla a coordenadas locales del hexágono
-        angle_rad = math.radians(-self.hex_angle)
-        cos_a = math.cos(angle_rad)
-        sin_a = math.sin(angle_rad)
-        
-        # Rotar el vector de dirección de pantalla a coordenadas locales
-        local_x = screen_direction[0] * cos_a - screen_direction[1] * sin_a
-        local_y = screen_direction[0] * sin_a + screen_direction[1] * cos_a
-        
-        # Normalizar
-        local_length = math.hypot(local_x, local_y)
-        if local_length > 0:
-            local_x /= local_length
-            local_y /= local_length
-        
-        # Obtener dirección actual normalizada
-        current_vel = self.snake_velocity
-        speed = vec_length(current_vel)
-        if speed == 0:
-            speed = SNAKE_SPEED
-        
-        current_dir_x = current_vel[0] / speed if speed > 0 else 1.0
-        current_dir_y = current_vel[1] / speed if speed > 0 else 0.0
-        
-        # Verificar si la dirección es opuesta (producto punto negativo)
-        dot_product = current_dir_x * local_x + current_dir_y * local_y
-        if dot_product < -0.5:  # Dirección opuesta (no permitir)
-            return
-        
-        # Cambiar dirección inmediatamente (Snake clásico)
-        self.snake_velocity = [local_x * speed, local_y * speed]
-        self.next_direction = None  # Limpiar dirección pendiente
+        sim = self.sim
+        pool = sim.particles
+        self.screen_vertices = self.world_to_screen_array(sim.hex_vertices_local)
+        self.screen_body = self.world_to_screen_array(sim.snake_body)
+        self.screen_head = self.world_to_screen(*sim.snake_head_pos)
+        self.screen_rewards = self.world_to_screen_array(sim.reward_pos)
+        self.screen_particles = self.world_to_screen_array(pool.pos[:pool.count])
+
+    # ----------------- INPUT -----------------
 
     def _handle_key_press(self, key):
         """Maneja eventos de teclado."""
@@ -844,16 +786,16 @@ class SnakeGame:
         if self.state == STATE_PLAYING:
             # Arriba: W o flecha arriba (invertir Y porque en pygame Y positivo es hacia abajo)
             if key in (pygame.K_w, pygame.K_UP):
-                self._set_direction([0.0, -1.0])
+                self.sim.set_direction([0.0, -1.0])
             # Abajo: S o flecha abajo
             elif key in (pygame.K_s, pygame.K_DOWN):
-                self._set_direction([0.0, 1.0])
+                self.sim.set_direction([0.0, 1.0])
             # Izquierda: A o flecha izquierda
             elif key in (pygame.K_a, pygame.K_LEFT):
-                self._set_direction([-1.0, 0.0])
+                self.sim.set_direction([-1.0, 0.0])
             # Derecha: D o flecha derecha
             elif key in (pygame.K_d, pygame.K_RIGHT):
-                self._set_direction([1.0, 0.0])
+                self.sim.set_direction([1.0, 0.0])
 
     def _point_in_rect(self, x, y, rect):
         """Verifica si un punto (x, y) está dentro de un rectángulo.
@@ -880,248 +822,27 @@ class SnakeGame:
 
     # ----------------- UPDATE -----------------
 
-    def _update_snake(self, delta_time):
-        # Guardar posición anterior de la cabeza
-        self.last_head_pos = self.snake_head_pos.copy()
-        
-        # Mover cabeza
-        self.snake_head_pos[0] += self.snake_velocity[0] * delta_time
-        self.snake_head_pos[1] += self.snake_velocity[1] * delta_time
-
-        # Rebote con paredes (con flash de impacto)
-        self.snake_head_pos, self.snake_velocity = self._handle_collision(
-            self.snake_head_pos, self.snake_velocity, SNAKE_RADIUS, bounce_factor=1.0, create_flash=True
-        )
-
-        # Agregar posición actual al path (solo si se movió suficiente distancia)
-        if len(self.snake_path) == 0:
-            self.snake_path.append(self.snake_head_pos.copy())
-        else:
-            last_path_pos = self.snake_path[-1]
-            dx = self.snake_head_pos[0] - last_path_pos[0]
-            dy = self.snake_head_pos[1] - last_path_pos[1]
-            dist = math.hypot(dx, dy)
-            
-            # Agregar punto al path cada vez que avance la distancia de espaciado
-            if dist >= SEGMENT_SPACING * 0.8:
-                self.snake_path.append(self.snake_head_pos.copy())
-                # Mantener solo los puntos necesarios (uno por segmento + algunos extras)
-                max_path_length = len(self.snake_body) + 5
-                if len(self.snake_path) > max_path_length:
-                    self.snake_path.pop(0)
-
-        # Mover segmentos del cuerpo siguiendo el path exacto (Snake clásico)
-        if len(self.snake_body) > 0 and len(self.snake_path) > 1:
-            # Cada segmento sigue un punto específico del path
-            for i, segment in enumerate(self.snake_body):
-                # Índice en el path para este segmento (desde el final hacia atrás)
-                path_index = len(self.snake_path) - 2 - i
-                if path_index >= 0 and path_index < len(self.snake_path):
-                    # El segmento va directamente a su posición en el path
-                    target_pos = self.snake_path[path_index]
-                    segment[0] = target_pos[0]
-                    segment[1] = target_pos[1]
-                elif path_index < 0:
-                    # Si no hay suficientes puntos en el path, calcular posición detrás del anterior
-                    if i == 0:
-                        # Primer segmento sigue a la cabeza
-                        dx = self.snake_head_pos[0] - segment[0]
-                        dy = self.snake_head_pos[1] - segment[1]
-                        dist = math.hypot(dx, dy)
-                        if dist > SEGMENT_SPACING:
-                            if dist > 0:
-                                dx /= dist
-                                dy /= dist
-                            segment[0] = self.snake_head_pos[0] - dx * SEGMENT_SPACING
-                            segment[1] = self.snake_head_pos[1] - dy * SEGMENT_SPACING
-                    else:
-                        # Otros segmentos siguen al anterior
-                        prev_seg = self.snake_body[i - 1]
-                        dx = prev_seg[0] - segment[0]
-                        dy = prev_seg[1] - segment[1]
-                        dist = math.hypot(dx, dy)
-                        if dist > SEGMENT_SPACING:
-                            if dist > 0:
-                                dx /= dist
-                                dy /= dist
-                            segment[0] = prev_seg[0] - dx * SEGMENT_SPACING
-                            segment[1] = prev_seg[1] - dy * SEGMENT_SPACING
-
-    def _update_rewards(self, delta_time):
-        for reward in self.rewards:
-            # Gravedad en coordenadas locales (hacia abajo en Y negativo)
-            reward["vel"][1] += GRAVITY * delta_time
-
-            # Movimiento
-            reward["pos"][0] += reward["vel"][0] * delta_time
-            reward["pos"][1] += reward["vel"][1] * delta_time
-
-            # Verificar y manejar colisión con las paredes del hexágono
-            # Esto reposiciona y refleja la velocidad correctamente
-            reward["pos"], reward["vel"] = self._handle_collision(
-                reward["pos"], reward["vel"], REWARD_RADIUS, bounce_factor=REWARD_BOUNCE
-            )
-            
-            # Asegurar que siempre esté dentro del hexágono (sin reposicionar en centro)
-            # Si se sale, usar la función de colisión múltiples veces para empujarla dentro
-            max_iterations = 5
-            iteration = 0
-            while not self._is_inside_hex(reward["pos"], REWARD_RADIUS) and iteration < max_iterations:
-                reward["pos"], reward["vel"] = self._handle_collision(
-                    reward["pos"], reward["vel"], REWARD_RADIUS, bounce_factor=0.5
-                )
-                iteration += 1
-            
-            # Si aún está fuera después de intentos, reposicionarla aleatoriamente dentro del hexágono
-            if not self._is_inside_hex(reward["pos"], REWARD_RADIUS):
-                # Buscar posición aleatoria válida dentro del hexágono
-                attempts = 0
-                while attempts < 20:
-                    x = random.uniform(-HEX_RADIUS * 0.7, HEX_RADIUS * 0.7)
-                    y = random.uniform(-HEX_RADIUS * 0.7, HEX_RADIUS * 0.7)
-                    new_pos = [x, y]
-                    if self._is_inside_hex(new_pos, REWARD_RADIUS):
-                        reward["pos"] = new_pos
-                        # Dar velocidad aleatoria
-                        angle = random.uniform(0, 2 * math.pi)
-                        speed = random.uniform(60.0, 100.0)
-                        reward["vel"] = [math.cos(angle) * speed, math.sin(angle) * speed]
-                        break
-                    attempts += 1
-
-    def _check_reward_collisions(self):
-        head = self.snake_head_pos
-        eaten = []
-
-        for reward in self.rewards:
-            dx = head[0] - reward["pos"][0]
-            dy = head[1] - reward["pos"][1]
-            if dx * dx + dy * dy <= (SNAKE_RADIUS + REWARD_RADIUS) ** 2:
-                eaten.append(reward)
-                self.score += 1
-                # Crear chispas cuando se come una recompensa
-                self._create_sparks(reward["pos"])
-                # Agregar nuevos segmentos cuando se come comida
-                for _ in range(SEGMENTS_PER_FOOD):
-                    if len(self.snake_body) > 0:
-                        # Agregar al final usando el path o la dirección del último segmento
-                        last_seg = self.snake_body[-1]
-                        
-                        # Intentar usar el path si está disponible
-                        if len(self.snake_path) > len(self.snake_body):
-                            # Usar posición del path correspondiente
-                            path_idx = len(self.snake_path) - len(self.snake_body) - 1
-                            if path_idx >= 0:
-                                new_seg = self.snake_path[path_idx].copy()
-                            else:
-                                # Calcular desde el último segmento
-                                speed = vec_length(self.snake_velocity)
-                                if speed > 0:
-                                    dx_dir = -self.snake_velocity[0] / speed
-                                    dy_dir = -self.snake_velocity[1] / speed
-                                else:
-                                    dx_dir = -1.0
-                                    dy_dir = 0.0
-                                new_seg = [
-                                    last_seg[0] + dx_dir * SEGMENT_SPACING,
-                                    last_seg[1] + dy_dir * SEGMENT_SPACING
-                                ]
-                        else:
-                            # Calcular dirección hacia atrás desde el último segmento
-                            if len(self.snake_body) > 1:
-                                prev_seg = self.snake_body[-2]
-                                dx_seg = last_seg[0] - prev_seg[0]
-                                dy_seg = last_seg[1] - prev_seg[1]
-                            else:
-                                dx_seg = last_seg[0] - self.snake_head_pos[0]
-                                dy_seg = last_seg[1] - self.snake_head_pos[1]
-                            
-                            dist_seg = math.hypot(dx_seg, dy_seg)
-                            if dist_seg > 0:
-                                dx_seg /= dist_seg
-                                dy_seg /= dist_seg
-                            else:
-                                speed = vec_length(self.snake_velocity)
-                                if speed > 0:
-                                    dx_seg = -self.snake_velocity[0] / speed
-                                    dy_seg = -self.snake_velocity[1] / speed
-                                else:
-                                    dx_seg = -1.0
-                                    dy_seg = 0.0
-                            
-                            new_seg = [
-                                last_seg[0] + dx_seg * SEGMENT_SPACING,
-                                last_seg[1] + dy_seg * SEGMENT_SPACING
-                            ]
-                        self.snake_body.append(new_seg)
-                    else:
-                        # Si no hay segmentos, agregar detrás de la cabeza usando el path
-                        if len(self.snake_path) > 0:
-                            new_seg = self.snake_path[0].copy()
-                        else:
-                            speed = vec_length(self.snake_velocity)
-                            if speed > 0:
-                                dx_dir = -self.snake_velocity[0] / speed
-                                dy_dir = -self.snake_velocity[1] / speed
-                            else:
-                                dx_dir = -1.0
-                                dy_dir = 0.0
-                            new_seg = [
-                                self.snake_head_pos[0] + dx_dir * SEGMENT_SPACING,
-                                self.snake_head_pos[1] + dy_dir * SEGMENT_SPACING
-                            ]
-                        self.snake_body.append(new_seg)
-
-        for r in eaten:
-            self.rewards.remove(r)
-
-        # Mantener siempre NUM_REWARDS recompensas
-        while len(self.rewards) < NUM_REWARDS:
-            self.rewards.append(self._create_reward())
-
-    def _set_game_over(self, reason: str):
+    def _handle_game_over(self):
+        """La simulación terminó: pasar a pantalla de Game Over y guardar récord."""
         self.state = STATE_GAME_OVER
-        self.game_over_reason = reason
         old_best = self.best_score
-        self.best_score = max(self.best_score, self.score)
+        self.best_score = max(self.best_score, self.sim.score)
         # Guardar si se superó el mejor score
         if self.best_score > old_best:
             save_best_score(self.best_score)
+        self._save_replay()
 
-    def _check_self_collision(self):
-        """Si la cabeza toca el cuerpo => game over."""
-        head = self.snake_head_pos
-        radius2 = (SNAKE_RADIUS * 1.5) ** 2  # Radio de colisión
-
-        for segment in self.snake_body:
-            dx = head[0] - segment[0]
-            dy = head[1] - segment[1]
-            if dx * dx + dy * dy < radius2:
-                self._set_game_over("Te has chocado con tu propio cuerpo.")
-                return
+    def _save_replay(self):
+        """Guarda el replay de la partida (solo con paso fijo: si no, no es reproducible)."""
+        if not self.fixed_timestep:
+            return
+        try:
+            path = save_replay(self.sim)
+            print(f"Replay guardado: {path}")
+        except Exception as e:
+            print(f"Error al guardar replay: {e}")
 
     def update(self, delta_time: float):
-        # el hexágono rota siempre (visual) con velocidad variable
-        # Actualizar temporizador para cambios aleatorios
-        self.hex_rotation_timer += delta_time
-        
-        # Cambiar velocidad/dirección de rotación aleatoriamente
-        if self.hex_rotation_timer >= self.hex_rotation_change_time:
-            # Cambiar a nueva velocidad aleatoria (puede ser positiva o negativa)
-            speed_range = HEX_ROTATION_SPEED_MAX - HEX_ROTATION_SPEED_MIN
-            random_speed = HEX_ROTATION_SPEED_MIN + random.random() * speed_range
-            # 50% de probabilidad de rotar en sentido contrario
-            if random.random() < 0.5:
-                random_speed = -random_speed
-            
-            self.hex_rotation_speed = random_speed
-            self.hex_rotation_timer = 0.0
-            # Programar próximo cambio aleatorio
-            self.hex_rotation_change_time = random.uniform(HEX_ROTATION_CHANGE_MIN, HEX_ROTATION_CHANGE_MAX)
-        
-        # Aplicar rotación con velocidad actual
-        self.hex_angle = (self.hex_angle + self.hex_rotation_speed * delta_time) % 360.0
-
         # Actualizar formas de fondo (rotación lenta)
         for shape in self.background_shapes:
             shape["rotation"] += shape["rotation_speed"] * delta_time * math.pi / 180.0
@@ -1132,72 +853,89 @@ class SnakeGame:
             shape["y"] = math.sin(shape["angle"]) * dist
 
         if self.state != STATE_PLAYING:
+            # el hexágono rota siempre (visual) aunque no se esté jugando
+            if self._world_ready:
+                self.sim.update_rotation(delta_time)
             return
 
-        self._update_snake(delta_time)
-        self._update_rewards(delta_time)
-        self._check_reward_collisions()
-        self._check_self_collision()
-        self._update_particles(delta_time)
+        if self.fixed_timestep:
+            self.sim.advance(delta_time)
+        else:
+            self.sim.step(delta_time)
+        if self.sim.game_over:
+            self._handle_game_over()
 
     # ----------------- DIBUJO -----------------
 
+    def _background_layers(self):
+        """
+        Grid y estrellas pre-renderizados. Solo se regeneran si cambia el
+        tamaño de pantalla, el color de fondo, las estrellas (o cuántas se
+        pintan) o el parallax máximo (la arena); el resto de frames se
+        reutilizan tal cual.
+        """
+        width, height = self.screen.get_size()
+        # Parallax máximo: la cabeza no sale del radio envolvente de la arena
+        margin = math.ceil(self.sim.arena.bounds_radius * PARALLAX_FACTOR) + PARALLAX_MARGIN
+        key = (width, height, self.bg_color, margin, self.star_fraction)
+        if key == self._background_key:
+            return self._grid_layer, self._star_layer
+
+        # Grid: una baldosa de pantalla + un periodo, opaca (incluye el fondo)
+        grid = pygame.Surface((width + GRID_SPACING, height + GRID_SPACING)).convert()
+        grid.fill(self.bg_color)
+        color = GRID_COLOR[:3]  # Solo RGB
+        for x in range(0, grid.get_width(), GRID_SPACING):
+            pygame.draw.line(grid, color, (x, 0), (x, grid.get_height()), 1)
+        for y in range(0, grid.get_height(), GRID_SPACING):
+            pygame.draw.line(grid, color, (0, y), (grid.get_width(), y), 1)
+
+        # Estrellas: la pantalla más el margen de parallax, con colorkey
+        stars = pygame.Surface((width + 2 * margin, height + 2 * margin)).convert()
+        stars.fill((0, 0, 0))
+        stars.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        # Con menos calidad, solo las primeras (están repartidas al azar)
+        for star in self.stars[:round(len(self.stars) * self.star_fraction)]:
+            star_x = int(self.cx + star["x"]) + margin
+            star_y = int(self.cy + star["y"]) + margin
+            color = (star["brightness"], star["brightness"], star["brightness"])
+            pygame.draw.circle(stars, color, (star_x, star_y), int(star["size"]))
+
+        self._background_key = key
+        self._grid_layer = grid
+        self._star_layer = stars
+        self._star_margin = margin
+        return grid, stars
+
+    def _parallax(self):
+        """
+        Offset de parallax basado en la posición de la serpiente. En modo
+        dirty-rects el fondo queda fijo: con parallax cambiaría entero casi
+        cada frame y habría que repintar toda la pantalla igualmente.
+        """
+        if self.dirty_rects:
+            return 0.0, 0.0
+        return (
+            self.sim.snake_head_pos[0] * PARALLAX_FACTOR,
+            self.sim.snake_head_pos[1] * PARALLAX_FACTOR,
+        )
+
     def _draw_background(self):
         """Capa BACK: fondo, estrellas, grid, formas lentas con parallax."""
-        # Calcular offset de parallax basado en la posición de la serpiente
-        parallax_x = self.snake_head_pos[0] * PARALLAX_FACTOR
-        parallax_y = self.snake_head_pos[1] * PARALLAX_FACTOR
-        
-        # Dibujar grid con parallax
-        # El grid se mueve según la posición de la serpiente
-        grid_start_x = self.cx + parallax_x
-        grid_start_y = self.cy + parallax_y
-        
-        # Calcular el offset del grid para que se alinee correctamente
-        grid_offset_x = grid_start_x % GRID_SPACING
-        grid_offset_y = grid_start_y % GRID_SPACING
-        
-        # Líneas verticales del grid
-        start_x = -grid_offset_x
-        for x in range(int(start_x), int(SCREEN_WIDTH + GRID_SPACING), GRID_SPACING):
-            if 0 <= x <= SCREEN_WIDTH:
-                color = GRID_COLOR[:3]  # Solo RGB
-                pygame.draw.line(
-                    self.screen,
-                    color,
-                    (x, 0),
-                    (x, SCREEN_HEIGHT),
-                    1
-                )
-        
-        # Líneas horizontales del grid
-        start_y = -grid_offset_y
-        for y in range(int(start_y), int(SCREEN_HEIGHT + GRID_SPACING), GRID_SPACING):
-            if 0 <= y <= SCREEN_HEIGHT:
-                color = GRID_COLOR[:3]  # Solo RGB
-                pygame.draw.line(
-                    self.screen,
-                    color,
-                    (0, y),
-                    (SCREEN_WIDTH, y),
-                    1
-                )
-        
-        # Dibujar estrellas con parallax
-        for star in self.stars:
-            # Aplicar parallax a las estrellas
-            star_x = self.cx + star["x"] + parallax_x
-            star_y = self.cy + star["y"] + parallax_y
-            
-            # Solo dibujar si está en pantalla (con margen)
-            if -50 <= star_x <= SCREEN_WIDTH + 50 and -50 <= star_y <= SCREEN_HEIGHT + 50:
-                color = (
-                    star["brightness"],
-                    star["brightness"],
-                    star["brightness"]
-                )
-                pygame.draw.circle(self.screen, color, (int(star_x), int(star_y)), int(star["size"]))
-        
+        parallax_x, parallax_y = self._parallax()
+        grid, stars = self._background_layers()
+        width, height = self.screen.get_size()
+
+        # Grid con parallax: periódico, basta con desplazar la baldosa dentro
+        # de un periodo. El grid se mueve según la posición de la serpiente
+        grid_offset_x = int((self.cx + parallax_x) % GRID_SPACING)
+        grid_offset_y = int((self.cy + parallax_y) % GRID_SPACING)
+        self.screen.blit(grid, (0, 0), (grid_offset_x, grid_offset_y, width, height))
+
+        # Estrellas con parallax: recorte de la capa desplazado en sentido contrario
+        margin = self._star_margin
+        self.screen.blit(stars, (0, 0), (margin - int(parallax_x), margin - int(parallax_y), width, height))
+
         # Dibujar cruces grandes tenues con parallax (como en la imagen)
         for shape in self.background_shapes:
             # Aplicar parallax a las formas
@@ -1233,11 +971,15 @@ class SnakeGame:
         self._draw_shadows()
         # Dibujar hexágono
         self._draw_hexagon()
+        # Glow del borde y de las recompensas, sumado sobre el hexágono
+        self._draw_glow()
         # Dibujar recompensas
         self._draw_rewards()
 
     def _draw_front(self):
         """Capa FRONT: snake + luces dinámicas + HUD + partículas."""
+        # Luces sobre el suelo, bajo la serpiente
+        self._draw_lights()
         # Dibujar sombras de la serpiente
         self._draw_snake_shadows()
         # Dibujar serpiente
@@ -1247,10 +989,66 @@ class SnakeGame:
         # HUD siempre al frente
         self._draw_hud()
 
+    # ----------------- ARENA EN COORDS LOCALES -----------------
+
+    def _angle_bucket(self):
+        """Índice del cubo de LOCAL_ANGLE_STEP grados del ángulo actual."""
+        return round(self.sim.hex_angle / LOCAL_ANGLE_STEP) % round(360.0 / LOCAL_ANGLE_STEP)
+
+    def _arena_surface(self):
+        """
+        Arena sin rotar, con el origen local en el centro de la superficie:
+        relleno, puntos naranjas y borde sobre negro (sin colorkey: rotar una
+        superficie con colorkey sale bastante más caro).
+        """
+        if self._arena_local is None:
+            size = 2 * (math.ceil(self.sim.arena.bounds_radius) + LOCAL_PADDING)
+            center = size / 2
+            points = (np.asarray(self.sim.hex_vertices_local) + center).astype(int).tolist()
+
+            arena = pygame.Surface((size, size)).convert()
+            arena.fill((0, 0, 0))
+            pygame.draw.polygon(arena, (20, 30, 50), points)
+            for point in self.hex_noise_points:
+                # Naranja tenue para que no se confunda con las recompensas
+                b = point["brightness"]
+                pygame.draw.circle(
+                    arena, (b // 2, b * 7 // 25, b // 12),
+                    (int(center + point["x"]), int(center + point["y"])), int(point["size"]),
+                )
+            pygame.draw.polygon(arena, (100, 150, 255), points, 3)
+            self._arena_local = arena
+        return self._arena_local
+
+    def _rotated_arena(self):
+        """
+        Arena rotada al cubo de ángulo actual y su esquina en pantalla. Una
+        rotación por cubo; las últimas se guardan en un LRU. La sombra sigue
+        siendo un polígono: los vértices ya se proyectan al ángulo del cubo.
+        """
+        bucket = self._angle_bucket()
+        cache = self._arena_rotations
+        entry = cache.get(bucket)
+        if entry is None:
+            # rotate() gira en sentido antihorario y rellena las esquinas con el
+            # color del píxel superior izquierdo, negro como el resto de fuera
+            arena = pygame.transform.rotate(self._arena_surface(), -bucket * LOCAL_ANGLE_STEP)
+            arena.set_colorkey((0, 0, 0))
+            width, height = arena.get_size()
+            corner = (round(self.cx - width / 2), round(self.cy - height / 2))
+            entry = cache[bucket] = (arena, corner)
+            if len(cache) > LOCAL_ROTATION_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(bucket)
+        return entry
+
     def _draw_hexagon(self):
-        points = [self.world_to_screen(x, y) for (x, y) in self.hex_vertices_local]
+        if self.local_render:
+            self.screen.blit(*self._rotated_arena())
+            return
         # Convertir a enteros para pygame
-        int_points = [(int(px), int(py)) for px, py in points]
+        int_points = self.screen_vertices.astype(int).tolist()
         # Relleno azul oscuro como en la imagen
         pygame.draw.polygon(self.screen, (20, 30, 50), int_points)
         # Borde azul claro pixelado
@@ -1259,132 +1057,255 @@ class SnakeGame:
     def _draw_snake(self):
         # Dibujar cuerpo usando bonificacion.png con filtro verde
         if self.snake_body_image:
-            for idx, segment in enumerate(self.snake_body):
-                sx, sy = self.world_to_screen(segment[0], segment[1])
-                img_width, img_height = self.snake_body_image.get_size()
-                # Centrar la imagen en la posición del segmento
-                img_x = int(sx - img_width / 2)
-                img_y = int(sy - img_height / 2)
-                self.screen.blit(self.snake_body_image, (img_x, img_y))
+            # Centrar la imagen en la posición de cada segmento
+            img_size = self.snake_body_image.get_size()
+            corners = (self.screen_body - np.divide(img_size, 2)).astype(int).tolist()
+            self.screen.blits([(self.snake_body_image, corner) for corner in corners], doreturn=False)
         else:
             # Fallback: círculos verdes si no se puede cargar la imagen
-            for idx, segment in enumerate(self.snake_body):
-                sx, sy = self.world_to_screen(segment[0], segment[1])
-                radius = SNAKE_RADIUS
-                pygame.draw.circle(self.screen, (50, 150, 50), (int(sx), int(sy)), int(radius))
-                pygame.draw.circle(self.screen, (30, 100, 30), (int(sx), int(sy)), int(radius), 1)
+            radius = SNAKE_RADIUS
+            for center in self.screen_body.astype(int).tolist():
+                pygame.draw.circle(self.screen, (50, 150, 50), center, int(radius))
+                pygame.draw.circle(self.screen, (30, 100, 30), center, int(radius), 1)
 
         # Dibujar cabeza (círculo verde sin ojos)
-        hx, hy = self.world_to_screen(self.snake_head_pos[0], self.snake_head_pos[1])
+        hx, hy = self.screen_head
         # Cabeza verde más clara
         pygame.draw.circle(self.screen, (100, 200, 100), (int(hx), int(hy)), int(SNAKE_RADIUS + 2))
         pygame.draw.circle(self.screen, (70, 180, 70), (int(hx), int(hy)), int(SNAKE_RADIUS))
 
     def _draw_rewards(self):
-        for reward in self.rewards:
-            sx, sy = self.world_to_screen(reward["pos"][0], reward["pos"][1])
-            # Dibujar imagen de bonificación si está disponible
-            if self.bonus_image:
-                img_width, img_height = self.bonus_image.get_size()
-                # Centrar la imagen en la posición de la recompensa
-                img_x = int(sx - img_width / 2)
-                img_y = int(sy - img_height / 2)
-                self.screen.blit(self.bonus_image, (img_x, img_y))
-            else:
-                # Fallback: círculos rojos si no se puede cargar la imagen
-                radius = REWARD_RADIUS
-                pygame.draw.circle(self.screen, (255, 50, 50), (int(sx), int(sy)), int(radius))
-                pygame.draw.circle(self.screen, (200, 20, 20), (int(sx), int(sy)), int(radius), 1)
+        # Dibujar imagen de bonificación si está disponible
+        if self.bonus_image:
+            # Centrar la imagen en la posición de cada recompensa
+            img_size = self.bonus_image.get_size()
+            corners = (self.screen_rewards - np.divide(img_size, 2)).astype(int).tolist()
+            self.screen.blits([(self.bonus_image, corner) for corner in corners], doreturn=False)
+        else:
+            # Fallback: círculos rojos si no se puede cargar la imagen
+            radius = REWARD_RADIUS
+            for center in self.screen_rewards.astype(int).tolist():
+                pygame.draw.circle(self.screen, (255, 50, 50), center, int(radius))
+                pygame.draw.circle(self.screen, (200, 20, 20), center, int(radius), 1)
     
+    def _init_shadow_sprites(self):
+        """Sombras pre-horneadas del cuerpo, la cabeza y las recompensas."""
+        self.head_shadow = _shadow_circle(int(SNAKE_RADIUS * 1.1))
+        self.reward_shadow = _shadow_circle(int(REWARD_RADIUS * 1.2))
+        if self.snake_body_image:
+            # Copia oscura y semi-transparente de la imagen del cuerpo
+            body_shadow = self.snake_body_image.copy()
+            body_shadow.fill((0, 0, 0, SHADOW_ALPHA), special_flags=pygame.BLEND_RGBA_MULT)
+            self.body_shadow = (body_shadow, np.divide(body_shadow.get_size(), 2))
+        else:
+            # Fallback: círculos si no hay imagen
+            self.body_shadow = _shadow_circle(int(SNAKE_RADIUS * 0.9))
+
+    def _begin_shadows(self, rect):
+        """Prepara la capa de sombras para pintar dentro de rect."""
+        # Lo que quedó de la pasada anterior se borra; fuera de rect ya está vacía
+        self._shadow_layer.fill((0, 0, 0, 0), self._shadow_dirty)
+        self._shadow_dirty = rect
+        return self._shadow_layer
+
+    def _end_shadows(self):
+        """Compone sobre la pantalla solo la zona pintada de la capa."""
+        rect = self._shadow_dirty
+        self.screen.blit(self._shadow_layer, rect.topleft, rect)
+
     def _draw_shadows(self):
         """Dibuja sombras proyectadas por el hexágono y recompensas."""
-        # Crear superficie temporal para sombras con alpha
-        shadow_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        
+        if not self.shadows_enabled:
+            return
+        # Mismas posiciones de pantalla del frame, desplazadas
+        shadow_offset = (SHADOW_OFFSET_X, SHADOW_OFFSET_Y)
+        shadow_points = self.screen_vertices + shadow_offset
+        reward_centers = (self.screen_rewards + shadow_offset).astype(int)
+        sprite, sprite_offset = self.reward_shadow
+        layer = self._begin_shadows(_bounding_rect(
+            [(shadow_points, 0), (reward_centers, sprite_offset)], self._shadow_layer.get_rect()
+        ))
+
         # Sombra del hexágono
-        points = [self.world_to_screen(x, y) for (x, y) in self.hex_vertices_local]
-        shadow_points = [(px + SHADOW_OFFSET_X, py + SHADOW_OFFSET_Y) for px, py in points]
-        int_shadow_points = [(int(px), int(py)) for px, py in shadow_points]
-        
-        # Dibujar sombra del hexágono
-        shadow_color = (0, 0, 0, SHADOW_ALPHA)
-        pygame.draw.polygon(shadow_surface, shadow_color, int_shadow_points)
-        
-        # Sombras de las recompensas
-        for reward in self.rewards:
-            sx, sy = self.world_to_screen(reward["pos"][0], reward["pos"][1])
-            shadow_x = sx + SHADOW_OFFSET_X
-            shadow_y = sy + SHADOW_OFFSET_Y
-            
-            # Sombra elíptica (más ancha que alta) - usar círculo ligeramente achatado
-            pygame.draw.circle(shadow_surface, shadow_color, (int(shadow_x), int(shadow_y)), int(REWARD_RADIUS * 1.2))
-        
-        # Dibujar superficie de sombras en la pantalla principal
-        self.screen.blit(shadow_surface, (0, 0))
-    
+        pygame.draw.polygon(layer, (0, 0, 0, SHADOW_ALPHA), shadow_points.astype(int).tolist())
+
+        # Sombras de las recompensas: BLEND_RGBA_MAX deja alpha SHADOW_ALPHA donde
+        # se solapan con la del hexágono, igual que pintarlas con draw.circle
+        layer.blits(
+            [(sprite, corner, None, pygame.BLEND_RGBA_MAX)
+             for corner in (reward_centers - sprite_offset).tolist()],
+            doreturn=False,
+        )
+        self._end_shadows()
+
     def _draw_snake_shadows(self):
         """Dibuja sombras proyectadas por la serpiente."""
-        if self.state != STATE_PLAYING:
+        if self.state != STATE_PLAYING or not self.shadows_enabled:
             return
-        
-        # Crear superficie temporal para sombras con alpha
-        shadow_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        
-        # Si estamos usando imagen para el cuerpo, crear sombra basada en la imagen
+
+        shadow_offset = (SHADOW_OFFSET_X, SHADOW_OFFSET_Y)
+        body_sprite, body_offset = self.body_shadow
+        head_sprite, head_offset = self.head_shadow
         if self.snake_body_image:
-            # Sombra del cuerpo de la serpiente usando la imagen
-            for segment in self.snake_body:
-                sx, sy = self.world_to_screen(segment[0], segment[1])
-                shadow_x = sx + SHADOW_OFFSET_X
-                shadow_y = sy + SHADOW_OFFSET_Y
-                
-                img_width, img_height = self.snake_body_image.get_size()
-                img_x = int(shadow_x - img_width / 2)
-                img_y = int(shadow_y - img_height / 2)
-                
-                # Crear una copia oscura y semi-transparente de la imagen para la sombra
-                shadow_img = self.snake_body_image.copy()
-                shadow_img.fill((0, 0, 0, SHADOW_ALPHA), special_flags=pygame.BLEND_RGBA_MULT)
-                shadow_surface.blit(shadow_img, (img_x, img_y))
+            body_corners = (self.screen_body + shadow_offset - body_offset).astype(int)
+            body_flags = 0
         else:
-            # Fallback: usar círculos si no hay imagen
-            for segment in self.snake_body:
-                sx, sy = self.world_to_screen(segment[0], segment[1])
-                shadow_x = sx + SHADOW_OFFSET_X
-                shadow_y = sy + SHADOW_OFFSET_Y
-                
-                shadow_color = (0, 0, 0, SHADOW_ALPHA)
-                pygame.draw.circle(shadow_surface, shadow_color, (int(shadow_x), int(shadow_y)), int(SNAKE_RADIUS * 0.9))
-        
+            body_corners = (self.screen_body + shadow_offset).astype(int) - body_offset
+            body_flags = pygame.BLEND_RGBA_MAX
+        head_center = np.add([self.screen_head], shadow_offset).astype(int)
+        layer = self._begin_shadows(_bounding_rect(
+            [(body_corners + body_offset, np.max(body_offset)), (head_center, head_offset)],
+            self._shadow_layer.get_rect(),
+        ))
+
+        # Las sombras del cuerpo se acumulan donde se solapan los segmentos
+        layer.blits(
+            [(body_sprite, corner, None, body_flags) for corner in body_corners.tolist()],
+            doreturn=False,
+        )
         # Sombra de la cabeza (siempre círculo)
-        hx, hy = self.world_to_screen(self.snake_head_pos[0], self.snake_head_pos[1])
-        shadow_x = hx + SHADOW_OFFSET_X
-        shadow_y = hy + SHADOW_OFFSET_Y
-        
-        shadow_color = (0, 0, 0, SHADOW_ALPHA)
-        pygame.draw.circle(shadow_surface, shadow_color, (int(shadow_x), int(shadow_y)), int(SNAKE_RADIUS * 1.1))
-        
-        # Dibujar superficie de sombras en la pantalla principal
-        self.screen.blit(shadow_surface, (0, 0))
+        layer.blit(head_sprite, (head_center[0] - head_offset).tolist(), None, pygame.BLEND_RGBA_MAX)
+        self._end_shadows()
+
+    # ----------------- CALIDAD -----------------
+
+    def set_quality_level(self, level):
+        """
+        Aplica un nivel de QUALITY_LEVELS: glow (sin pasar de max_glow_quality),
+        sombras, fracción de estrellas, chispas por recompensa y rayos de los
+        flashes. El siguiente frame en modo dirty-rects es completo.
+        """
+        settings = QUALITY_LEVELS[level]
+        self.quality_level = level
+        self.shadows_enabled = settings["shadows"]
+        self.star_fraction = settings["stars"]
+        self.flash_rays = settings["flash_rays"]
+        self.sim.sparks_per_reward = settings["sparks"]
+        glow = min(settings["glow"], self.max_glow_quality, key=GLOW_QUALITIES.index)
+        self.set_glow_quality(glow)
+        self._dirty_prev = None
+
+    def _track_frame_time(self, frame_ms):
+        """Pasa un frame de juego al controlador y aplica su nivel si cambia."""
+        level = self.quality.add(frame_ms)
+        if level is not None:
+            print(f"Calidad adaptativa: nivel {level} (p{QUALITY_PERCENTILE} {self.quality.frame_time:.1f} ms)")
+            self.set_quality_level(level)
+
+    # ----------------- GLOW Y LUCES -----------------
+
+    def set_glow_quality(self, quality):
+        """
+        Cambia la calidad del glow (GLOW_QUALITIES). Los sprites salen de la
+        caché de _radial_glow, así que cambiar de nivel a mitad de partida
+        solo rehace los puntos del contorno.
+        """
+        if quality not in GLOW_QUALITIES:
+            raise ValueError(f"Calidad de glow desconocida: {quality!r} (usa {', '.join(GLOW_QUALITIES)})")
+        self.glow_quality = quality
+        self.reward_glow = None
+        self.hex_glow = None
+        self.head_light = None
+        self.flash_lights = ()
+        if quality == "off":
+            return
+
+        self.reward_glow = _radial_glow(
+            REWARD_RADIUS, REWARD_GLOW_SIZE, REWARD_GLOW_LAYERS, REWARD_GLOW_COLOR, REWARD_GLOW_INTENSITY
+        )
+        # Glow del borde: el mismo sprite repetido a lo largo del contorno. Su
+        # intensidad se reparte para que la suma sobre el borde sea la pedida
+        spacing = HEX_GLOW_SPACING[quality]
+        samples = np.arange(-math.ceil(HEX_GLOW_SIZE / spacing) - 1, math.ceil(HEX_GLOW_SIZE / spacing) + 2)
+        overlap = float(_glow_profile(np.abs(samples * spacing), 0.0, HEX_GLOW_SIZE, HEX_GLOW_LAYERS).sum())
+        self.hex_glow = _radial_glow(
+            0.0, HEX_GLOW_SIZE, HEX_GLOW_LAYERS, HEX_GLOW_COLOR, round(HEX_GLOW_INTENSITY / overlap, 3)
+        )
+        self._hex_glow_points = _contour_points(self.sim.hex_vertices_local, spacing)
+
+        if quality == "high":
+            self.head_light = _radial_glow(0.0, LIGHT_RADIUS, LIGHT_LAYERS, LIGHT_COLOR, LIGHT_INTENSITY)
+            # El flash se apaga en FLASH_LIGHT_STEPS niveles, cada uno un sprite
+            self.flash_lights = tuple(
+                _radial_glow(0.0, FLASH_LIGHT_RADIUS, LIGHT_LAYERS, LIGHT_COLOR,
+                             LIGHT_INTENSITY * 2 * step / FLASH_LIGHT_STEPS)
+                for step in range(FLASH_LIGHT_STEPS, 0, -1)
+            )
+
+    def _glow_margin(self):
+        """Cuánto sobresalen (px) el glow del borde y el de las recompensas."""
+        hex_margin = self.hex_glow[1] if self.hex_glow else 0
+        reward_margin = self.reward_glow[1] if self.reward_glow else 0
+        return hex_margin, reward_margin
+
+    def _draw_glow(self):
+        """Glow del borde de la arena y de cada recompensa: un blit aditivo por sprite."""
+        if self.glow_quality == "off":
+            return
+        add = pygame.BLEND_RGB_ADD
+        sprite, offset = self.hex_glow
+        corners = (self.world_to_screen_array(self._hex_glow_points) - offset).astype(int).tolist()
+        self.screen.blits([(sprite, corner, None, add) for corner in corners], doreturn=False)
+
+        limit = GLOW_MAX_REWARDS[self.glow_quality]
+        if limit is not None and len(self.screen_rewards) > limit:
+            return
+        sprite, offset = self.reward_glow
+        corners = (self.screen_rewards - offset).astype(int).tolist()
+        self.screen.blits([(sprite, corner, None, add) for corner in corners], doreturn=False)
+
+    def _draw_lights(self):
+        """Luces dinámicas (solo en high): la cabeza y los flashes de los rebotes."""
+        if self.head_light is None:
+            return
+        add = pygame.BLEND_RGB_ADD
+        sprite, offset = self.head_light
+        hx, hy = self.screen_head
+        self.screen.blit(sprite, (int(hx) - offset, int(hy) - offset), None, add)
+
+        pool = self.sim.particles
+        n = pool.count
+        if not n:
+            return
+        flashes = np.flatnonzero(pool.kind[:n] == PARTICLE_FLASH)
+        if not len(flashes):
+            return
+        # Nivel de fundido según la vida consumida de cada flash
+        steps = np.minimum(
+            (pool.age[flashes] / pool.lifetime[flashes] * FLASH_LIGHT_STEPS).astype(int),
+            FLASH_LIGHT_STEPS - 1,
+        )
+        offset = self.flash_lights[0][1]
+        corners = (self.screen_particles[flashes] - offset).astype(int).tolist()
+        self.screen.blits(
+            [(self.flash_lights[step][0], corner, None, add) for step, corner in zip(steps.tolist(), corners)],
+            doreturn=False,
+        )
 
     def _draw_hud(self):
+        """
+        HUD en dos franjas persistentes: la superior solo se vuelve a pintar
+        cuando cambian score, best o nº de recompensas, y la inferior es fija.
+        Cada frame solo se componen esas dos franjas, no la pantalla entera.
+        """
+        values = (self.sim.score, self.best_score, len(self.sim.reward_pos))
+        if values != self._hud_values:
+            self._render_hud_top(*values)
+            self._hud_values = values
+        if self._hud_bottom is None:
+            self._render_hud_bottom()
+        self.screen.blit(self._hud_top, (0, 0))
+        self.screen.blit(self._hud_bottom, (0, SCREEN_HEIGHT - HUD_BAR_HEIGHT))
+
+    def _render_hud_top(self, score, best_score, num_rewards):
+        """Franja superior del HUD: SCORE, BEST y REWARDS."""
         # HUD optimizado para formato vertical móvil - con más espacio
         pixel_size = 2
-        
-        # Crear superficie temporal para HUD con transparencia
-        hud_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        
-        # Barra superior con más altura para mejor espaciado
-        hud_height = 65
-        pygame.draw.rect(
-            hud_surface,
-            (10, 10, 30, 200),  # Fondo semi-transparente
-            (0, SCREEN_HEIGHT - hud_height, SCREEN_WIDTH, hud_height)
-        )
-        
+        hud_surface = pygame.Surface((SCREEN_WIDTH, HUD_TOP_HEIGHT), pygame.SRCALPHA)
+
         # SCORE en la parte superior izquierda - con más espacio
         score_label = "SCORE"
-        score_value = f"{self.score:05d}"
+        score_value = f"{score:05d}"
         score_x = 15
         score_y_label = 20  # Parte superior (Y pequeño = arriba en pygame)
         score_y_value = 35
@@ -1393,7 +1314,7 @@ class SnakeGame:
 
         # BEST en el centro superior - con más espacio
         best_label = "BEST"
-        best_value = f"{self.best_score:05d}"
+        best_value = f"{best_score:05d}"
         best_label_width = len(best_label) * 6 * pixel_size
         best_x = SCREEN_WIDTH / 2 - best_label_width / 2
         best_y_label = 20  # Parte superior
@@ -1404,7 +1325,7 @@ class SnakeGame:
 
         # REWARDS en la parte superior derecha - con más espacio
         rewards_label = "REWARDS"
-        rewards_value = f"x{len(self.rewards)}"
+        rewards_value = f"x{num_rewards}"
         rewards_label_width = len(rewards_label) * 6 * pixel_size
         rewards_value_width = len(rewards_value) * 6 * pixel_size
         rewards_x = SCREEN_WIDTH - max(rewards_label_width, rewards_value_width + 8) - 15
@@ -1416,20 +1337,25 @@ class SnakeGame:
         icon_y = rewards_y_value + 7  # Ajustar para que esté alineado
         pygame.draw.circle(hud_surface, (255, 50, 50), (int(icon_x), int(icon_y)), 3)
         draw_pixel_text(hud_surface, rewards_value, rewards_x, rewards_y_value, COLOR_LIGHT_GRAY, pixel_size)
-        
-        # Controles en la parte inferior - con más espacio
-        hint_height = 50
+
+        self._hud_top = hud_surface
+
+    def _render_hud_bottom(self):
+        """Franja inferior del HUD: barra semi-transparente y controles (no cambia)."""
+        pixel_size = 2
+        hud_surface = pygame.Surface((SCREEN_WIDTH, HUD_BAR_HEIGHT), pygame.SRCALPHA)
+
+        # Barra inferior; los controles van en su parte baja
         pygame.draw.rect(
             hud_surface,
             (10, 10, 30, 200),  # Fondo semi-transparente
-            (0, SCREEN_HEIGHT - hint_height, SCREEN_WIDTH, hint_height)
+            (0, 0, SCREEN_WIDTH, HUD_BAR_HEIGHT)
         )
         controls_text = "← ↑ → MOVE"
         text_width = len(controls_text) * 6 * pixel_size
-        draw_pixel_text(hud_surface, controls_text, SCREEN_WIDTH / 2 - text_width / 2, SCREEN_HEIGHT - 25, COLOR_WHITE, pixel_size)
-        
-        # Dibujar HUD en la pantalla principal
-        self.screen.blit(hud_surface, (0, 0))
+        draw_pixel_text(hud_surface, controls_text, SCREEN_WIDTH / 2 - text_width / 2, HUD_BAR_HEIGHT - 25, COLOR_WHITE, pixel_size)
+
+        self._hud_bottom = hud_surface
 
     def _draw_presentation(self):
         """Dibuja la pantalla de presentación con la imagen de presentación"""
@@ -1552,13 +1478,143 @@ class SnakeGame:
         # Dibujar overlay en la pantalla principal
         self.screen.blit(overlay_surface, (0, 0))
 
+    # ----------------- DIRTY RECTS -----------------
+
+    def _world_rect(self):
+        """
+        Rect de pantalla de todo lo que se mueve en el mundo en este frame:
+        hexágono girando, recompensas, serpiente y partículas, con sus sombras.
+        """
+        shadow = max(abs(SHADOW_OFFSET_X), abs(SHADOW_OFFSET_Y))
+        reward_half = max(self.bonus_image.get_size()) / 2 if self.bonus_image else REWARD_RADIUS
+        body_half = max(self.snake_body_image.get_size()) / 2 if self.snake_body_image else SNAKE_RADIUS
+        hex_glow, reward_glow = self._glow_margin()
+        groups = [
+            # Borde de 3 px; los sprites del glow van sobre el contorno, y
+            # entre vértices quedan dentro del rect que cubre los vértices
+            (self.screen_vertices, max(shadow + 2, hex_glow)),
+            (self.screen_rewards, max(max(reward_half, self.reward_shadow[1]) + shadow, reward_glow)),
+        ]
+        if self.state == STATE_PLAYING:
+            groups.append((self.screen_body, body_half + shadow))
+            groups.append((np.array([self.screen_head]), SNAKE_RADIUS + 2 + shadow))
+        if self.head_light is not None:
+            groups.append((np.array([self.screen_head]), self.head_light[1]))
+        pool = self.sim.particles
+        if pool.count:
+            # Los flashes tienen rayos de 1.5 veces su tamaño (y su luz en high)
+            flash_half = float(pool.size[:pool.count].max()) * 1.5 + 2
+            if self.flash_lights:
+                flash_half = max(flash_half, self.flash_lights[0][1])
+            groups.append((self.screen_particles, flash_half))
+        rect = _bounding_rect(groups, self.screen.get_rect())
+        return rect.inflate(2 * DIRTY_MARGIN, 2 * DIRTY_MARGIN).clip(self.screen.get_rect())
+
+    def _cross_rects(self):
+        """
+        (claves, rects) de las cruces del fondo, como en _draw_background. La
+        clave son las coordenadas enteras con que se dibuja cada línea (el
+        centro puede moverse un píxel sin que cambie el rect); None si la
+        cruz no se dibuja.
+        """
+        parallax_x, parallax_y = self._parallax()
+        keys = []
+        rects = []
+        for shape in self.background_shapes:
+            shape_x = self.cx + shape["x"] + parallax_x
+            shape_y = self.cy + shape["y"] + parallax_y
+            size = shape["size"]
+            if (-size * 2 <= shape_x <= SCREEN_WIDTH + size * 2
+                    and -size * 2 <= shape_y <= SCREEN_HEIGHT + size * 2):
+                left, top = int(shape_x - size), int(shape_y - size)
+                right, bottom = int(shape_x + size), int(shape_y + size)
+                keys.append((left, int(shape_x), right, top, int(shape_y), bottom))
+                # Líneas de 2 px de grosor: un píxel de margen a cada lado
+                rects.append(pygame.Rect(left - 2, top - 2, right - left + 5, bottom - top + 5))
+            else:
+                keys.append(None)
+                rects.append(None)
+        return keys, rects
+
+    @staticmethod
+    def _cover_crosses(rect, crosses):
+        """
+        Agranda rect hasta cubrir entera cada cruz que toca: las líneas de
+        2 px recortadas por el clip no salen igual que sin recortar.
+        """
+        grown = True
+        while grown:
+            grown = False
+            for cross in crosses:
+                if cross is not None and rect.colliderect(cross) and not rect.contains(cross):
+                    rect = rect.union(cross)
+                    grown = True
+        return rect
+
+    def _draw_dirty(self):
+        """
+        Repinta solo lo que cambió desde el frame anterior, con la pantalla
+        recortada a cada zona: las cruces del fondo que se movieron y la
+        franja superior del HUD si cambió (fondo + HUD), y la zona del mundo
+        de este frame y del anterior (todas las capas). Devuelve False si
+        hace falta un frame completo (primer frame, menú, game over).
+        """
+        if self.state != STATE_PLAYING:
+            self._dirty_prev = None
+            return False
+
+        world = self._world_rect()
+        cross_keys, crosses = self._cross_rects()
+        previous = self._dirty_prev
+        self._dirty_prev = (world, cross_keys, crosses)
+        if previous is None:
+            return False
+        previous_world, previous_keys, previous_crosses = previous
+
+        # Zonas solo de fondo y HUD: fuera del mundo no hay nada más que pintar
+        rects = []
+        for old_key, new_key, old, new in zip(previous_keys, cross_keys, previous_crosses, crosses):
+            if old_key != new_key:
+                rects.extend(rect for rect in (old, new) if rect is not None)
+        if (self.sim.score, self.best_score, len(self.sim.reward_pos)) != self._hud_values:
+            rects.append(pygame.Rect(0, 0, SCREEN_WIDTH, HUD_TOP_HEIGHT))
+        rects = [self._cover_crosses(rect, crosses) for rect in rects]
+        for rect in rects:
+            self.screen.set_clip(rect)
+            self._draw_background()
+            self._draw_hud()
+
+        # La zona del mundo se repinta la última y entera: tapa lo anterior
+        world = self._cover_crosses(world.union(previous_world), crosses)
+        self.screen.set_clip(world)
+        self._draw_background()
+        self._draw_mid()
+        self._draw_front()
+        self.screen.set_clip(None)
+
+        rects.append(world)
+        self._update_rects = rects
+        return True
+
     def draw(self):
-        # Limpiar pantalla
-        self.screen.fill(self.bg_color)
+        # Por defecto se presenta la pantalla entera
+        self._update_rects = None
 
         # Pantalla de presentación (solo imagen y botón, sin fondo del juego)
         if self.state == STATE_PRESENTATION:
+            # Limpiar pantalla
+            self.screen.fill(self.bg_color)
             self._draw_presentation()
+            self._dirty_prev = None
+            return
+
+        # No hace falta limpiar: la capa del grid es opaca y cubre toda la pantalla
+        self.setup_world()
+
+        # Posiciones de pantalla de este frame (una sola transformación por entidad)
+        self._project_frame()
+
+        if self.dirty_rects and self._draw_dirty():
             return
 
         # Dibujar en orden de capas: BACK -> MID -> FRONT
@@ -1572,11 +1628,22 @@ class SnakeGame:
         elif self.state == STATE_GAME_OVER:
             self._draw_game_over_overlay()
 
+    def present(self):
+        """Lleva el frame a la ventana: solo los rects repintados en modo dirty-rects."""
+        if self._update_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self._update_rects)
+
     def run(self):
         """Loop principal del juego."""
         while self.running:
             # Calcular delta_time
-            delta_time = self.clock.tick(60) / 1000.0  # Convertir a segundos
+            # El primer frame no espera al limitador de FPS: es tiempo de arranque
+            max_fps = TARGET_FPS if self.startup_trace.first_frame_ms is not None else 0
+            delta_time = self.clock.tick(max_fps) / 1000.0  # Convertir a segundos
+            # Tiempo de trabajo del frame (sin la espera del limitador)
+            frame_start = time.perf_counter()
             
             # Manejar eventos
             for event in pygame.event.get():
@@ -1594,15 +1661,48 @@ class SnakeGame:
             self.draw()
             
             # Actualizar pantalla
-            pygame.display.flip()
-        
+            self.present()
+
+            # Calidad adaptativa: solo cuentan los frames de juego
+            if self.quality is not None and self.state == STATE_PLAYING:
+                self._track_frame_time((time.perf_counter() - frame_start) * 1000.0)
+
+            # Con la presentación ya en pantalla, preparar el resto del juego
+            if self.startup_trace.first_frame_ms is None:
+                self.startup_trace.first_frame()
+                self.setup_world()
+
+        # Partida cerrada a medias: también se guarda su replay
+        if self.state == STATE_PLAYING:
+            self._save_replay()
         pygame.quit()
 
 
 # ----------------- MAIN -----------------
 
-def main():
-    game = SnakeGame()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hex Snake")
+    parser.add_argument("--storm", action="store_true",
+                        help="variante lluvia de recompensas (miles de recompensas a la vez)")
+    parser.add_argument("--level", default=None,
+                        help=f"nivel de levels/ ({', '.join(list_levels())}) o ruta a un .json")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="repintar y presentar solo las zonas que cambian (fondo sin parallax)")
+    parser.add_argument("--local-render", action="store_true",
+                        help="arena pintada en coords locales y rotada como superficie (con detalle interior)")
+    parser.add_argument("--glow", choices=GLOW_QUALITIES, default=GLOW_QUALITY,
+                        help="calidad del glow y las luces dinámicas")
+    parser.add_argument("--fixed-quality", action="store_true",
+                        help="no bajar la calidad cuando los frames van lentos (calidad adaptativa)")
+    parser.add_argument("--startup-trace", action="store_true",
+                        help="imprimir los ms de cada fase de arranque (hasta el primer frame y el mundo listo)")
+    args = parser.parse_args(argv)
+
+    arena = load_arena(args.level) if args.level else None
+    game = SnakeGame(params=STORM_PARAMS if args.storm else None, arena=arena,
+                     dirty_rects=args.dirty_rects, local_render=args.local_render,
+                     startup_trace=args.startup_trace, glow=args.glow,
+                     adaptive_quality=not args.fixed_quality)
     game.run()
 
 
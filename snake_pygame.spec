@@ -1,11 +1,18 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import subprocess
+import sys
 
+# Sprites ya procesados en un solo fichero mapeable (ver snake_assets.py):
+# se distribuye el bundle en vez de los PNG sueltos. SPECPATH (carpeta del
+# .spec) para que funcione aunque pyinstaller se lance desde otra carpeta
+subprocess.run([sys.executable, os.path.join(SPECPATH, 'snake_assets.py')], check=True)
 
 a = Analysis(
     ['snake_pygame.py'],
     pathex=[],
     binaries=[],
-    datas=[('assets', 'assets'), ('best_score.json', '.')],
+    datas=[('assets/sprites.hxab', 'assets'), ('levels', 'levels'), ('best_score.json', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
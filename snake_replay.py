@@ -0,0 +1,221 @@
+import argparse
+import os
+import struct
+import sys
+import time
+
+from snake_arena import load_arena
+from snake_sim import SnakeSimulation, DEFAULT_PARAMS, FIXED_TIMESTEP
+
+# ----------------- REPLAYS -----------------
+# Una partida queda determinada por su semilla, sus parámetros, su nivel, el
+# paso de física y las direcciones que se pidieron en cada tick (sim.input_log), así
+# que un replay solo guarda eso. Reproducirlo es volver a simular sin ventana,
+# tan rápido como dé la CPU, y opcionalmente dibujar uno de cada k pasos.
+#
+#   python snake_replay.py replays/20240101-120000-1234.hxr --render-every 4
+
+REPLAY_MAGIC = b"HXRP"
+REPLAY_VERSION = 2  # v2: nivel de la arena (los v1 son todos en el hexágono)
+REPLAY_EXTENSION = ".hxr"
+REPLAY_DIR = "replays"
+
+# Direcciones de pantalla que se pueden grabar (índice = código de 2 bits)
+REPLAY_DIRECTIONS = ((0.0, -1.0), (0.0, 1.0), (-1.0, 0.0), (1.0, 0.0))
+
+# Cabecera: magic, versión, semilla (con signo: SnakeSimulation acepta
+# negativas), paso de física, ticks y score finales (para detectar
+# desincronizaciones), nº de entradas; luego un double por parámetro en el
+# orden de DEFAULT_PARAMS y el nivel (longitud + UTF-8)
+_HEADER = struct.Struct("<4sBqdIII")
+_PARAMS = struct.Struct("<" + "d" * len(DEFAULT_PARAMS))
+_LEVEL_LENGTH = struct.Struct("<H")
+
+
+# ----------------- FORMATO -----------------
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_replay(sim, timestep=FIXED_TIMESTEP):
+    """
+    Serializa la partida de sim (jugada con pasos fijos de timestep). Cada
+    entrada ocupa un varint con los ticks desde la anterior y la dirección
+    en los 2 bits bajos: una partida típica cabe en unos cientos de bytes.
+    """
+    events = bytearray()
+    last_tick = 0
+    for tick, direction in sim.input_log:
+        try:
+            code = REPLAY_DIRECTIONS.index(tuple(direction))
+        except ValueError:
+            raise ValueError(f"Dirección no grabable en replay: {direction}") from None
+        _write_varint(events, ((tick - last_tick) << 2) | code)
+        last_tick = tick
+
+    if not -2 ** 63 <= sim.seed < 2 ** 63:
+        raise ValueError(f"Semilla no grabable en replay (no cabe en 64 bits): {sim.seed}")
+    header = _HEADER.pack(
+        REPLAY_MAGIC, REPLAY_VERSION, sim.seed, timestep,
+        sim.ticks, sim.score, len(sim.input_log),
+    )
+    params = _PARAMS.pack(*(float(sim.params[name]) for name in DEFAULT_PARAMS))
+    level = sim.arena.level.encode("utf-8")
+    return header + params + _LEVEL_LENGTH.pack(len(level)) + level + bytes(events)
+
+
+def decode_replay(data):
+    """bytes -> dict con seed, timestep, params, level, ticks, score e inputs [(tick, dirección)]."""
+    magic, version, seed, timestep, ticks, score, count = _HEADER.unpack_from(data, 0)
+    if magic != REPLAY_MAGIC:
+        raise ValueError("No es un replay de Hex Snake")
+    if version not in (1, REPLAY_VERSION):
+        raise ValueError(f"Versión de replay no soportada: {version}")
+
+    values = _PARAMS.unpack_from(data, _HEADER.size)
+    params = {
+        name: type(default)(value)
+        for (name, default), value in zip(DEFAULT_PARAMS.items(), values)
+    }
+
+    offset = _HEADER.size + _PARAMS.size
+    level = ""
+    if version >= 2:
+        (length,) = _LEVEL_LENGTH.unpack_from(data, offset)
+        offset += _LEVEL_LENGTH.size
+        level = data[offset:offset + length].decode("utf-8")
+        offset += length
+
+    inputs = []
+    tick = 0
+    for _ in range(count):
+        value, offset = _read_varint(data, offset)
+        tick += value >> 2
+        inputs.append((tick, REPLAY_DIRECTIONS[value & 0x3]))
+
+    return {
+        "seed": seed,
+        "timestep": timestep,
+        "params": params,
+        "level": level,
+        "ticks": ticks,
+        "score": score,
+        "inputs": inputs,
+    }
+
+
+def save_replay(sim, path=None, timestep=FIXED_TIMESTEP):
+    """
+    Guarda la partida de sim en path (por defecto replays/<fecha>-<semilla>.hxr
+    en el directorio de trabajo: junto al código no se puede escribir si el
+    juego está instalado, y en el ejecutable de PyInstaller es temporal).
+    """
+    if path is None:
+        folder = REPLAY_DIR
+        os.makedirs(folder, exist_ok=True)
+        name = time.strftime("%Y%m%d-%H%M%S") + f"-{sim.seed}" + REPLAY_EXTENSION
+        path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(encode_replay(sim, timestep))
+    return path
+
+
+def load_replay(path):
+    with open(path, "rb") as f:
+        return decode_replay(f.read())
+
+
+# ----------------- REPRODUCCIÓN -----------------
+
+def play_replay(replay, effects=False, on_step=None):
+    """
+    Re-simula el replay sin ventana y devuelve la SnakeSimulation final.
+    on_step(sim) se llama tras cada paso (p. ej. para dibujar). Se para en
+    el game over o al llegar a los ticks grabados.
+    """
+    arena = load_arena(replay["level"]) if replay["level"] else None
+    sim = SnakeSimulation(seed=replay["seed"], effects=effects, params=replay["params"], arena=arena)
+    inputs = replay["inputs"]
+    timestep = replay["timestep"]
+    next_input = 0
+
+    while not sim.game_over and sim.ticks < replay["ticks"]:
+        # Las entradas de este tick llegan antes del paso, como en el juego
+        while next_input < len(inputs) and inputs[next_input][0] <= sim.ticks:
+            sim.set_direction(inputs[next_input][1])
+            next_input += 1
+        sim.step(timestep)
+        if on_step is not None:
+            on_step(sim)
+    return sim
+
+
+def _render_hook(replay, render_every):
+    """Crea un SnakeGame que dibuja con draw() uno de cada render_every pasos."""
+    import pygame
+    import snake_pygame
+
+    arena = load_arena(replay["level"]) if replay["level"] else None
+    game = snake_pygame.SnakeGame(params=replay["params"], arena=arena)
+    game.setup_world()  # antes de cambiarle la simulación (draw() no debe rehacerla)
+    game.state = snake_pygame.STATE_PLAYING
+
+    def on_step(sim):
+        if sim.ticks % render_every:
+            return
+        pygame.event.pump()
+        game.sim = sim
+        game.draw()
+        pygame.display.flip()
+
+    return on_step
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Reproduce replays de Hex Snake sin ventana y a máxima velocidad."
+    )
+    parser.add_argument("replays", nargs="+", help="ficheros .hxr")
+    parser.add_argument("--render-every", type=int, default=0, metavar="K",
+                        help="dibujar uno de cada K pasos con el renderer del juego (0 = no dibujar)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    desyncs = 0
+    for path in args.replays:
+        replay = load_replay(path)
+        on_step = _render_hook(replay, args.render_every) if args.render_every > 0 else None
+
+        start_time = time.perf_counter()
+        sim = play_replay(replay, effects=on_step is not None, on_step=on_step)
+        elapsed = time.perf_counter() - start_time
+
+        ok = sim.ticks == replay["ticks"] and sim.score == replay["score"]
+        desyncs += not ok
+        speed = sim.elapsed_time / elapsed if elapsed > 0 else float("inf")
+        print(f"{path}: score {sim.score}, {sim.ticks} ticks, {sim.elapsed_time:.1f} s de juego "
+              f"en {elapsed:.2f} s (x{speed:.0f})" + ("" if ok else
+              f"  DESINCRONIZADO (grabado: score {replay['score']}, {replay['ticks']} ticks)"))
+    return 1 if desyncs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1397 @@
+import math
+import random
+import struct
+
+import numpy as np
+
+from snake_arena import Arena
+
+# ----------------- CONSTANTES DE SIMULACIÓN -----------------
+# Este módulo no importa pygame: toda la lógica del juego puede correr sin
+# ventana (tests de resistencia, bots, servidores sin display).
+
+HEX_RADIUS = 150.0   # Radio ajustado para formato vertical
+
+SNAKE_SPEED = 200.0          # píxeles / segundo
+SNAKE_RADIUS = 10.0          # tamaño base "pixel art"
+
+INITIAL_SEGMENTS = 3         # nº inicial de segmentos (esferas) del cuerpo
+SEGMENTS_PER_FOOD = 1         # segmentos que se agregan por cada comida
+SEGMENT_SPACING = SNAKE_RADIUS * 2.2  # distancia entre segmentos
+
+NUM_REWARDS = 5
+REWARD_RADIUS = 8.0
+GRAVITY = -150.0             # hacia abajo en coords locales (más suave)
+REWARD_BOUNCE = 0.85         # rebote con pérdida de energía (más suave)
+
+HEX_ROTATION_SPEED = 20.0    # grados / segundo (velocidad base)
+HEX_ROTATION_CHANGE_MIN = 2.0   # tiempo mínimo entre cambios de rotación (segundos)
+HEX_ROTATION_CHANGE_MAX = 5.0   # tiempo máximo entre cambios de rotación (segundos)
+HEX_ROTATION_SPEED_MIN = 10.0   # velocidad mínima de rotación (grados/segundo)
+HEX_ROTATION_SPEED_MAX = 40.0   # velocidad máxima de rotación (grados/segundo)
+
+# Partículas
+PARTICLE_LIFETIME = 0.4  # segundos de vida de las partículas
+SPARKS_PER_REWARD = 12   # número de chispas al recoger recompensa
+SPARK_SPEED_MIN = 80.0   # velocidad mínima de chispas
+SPARK_SPEED_MAX = 200.0  # velocidad máxima de chispas
+SPARK_SIZE = 3.0         # tamaño de las chispas
+FLASH_LIFETIME = 0.3     # duración del flash de rebote
+FLASH_SIZE = 15.0        # tamaño del flash
+MAX_PARTICLES = 512      # tope del pool; al llenarse se pisa la partícula más vieja
+PARTICLE_SPARK = 0       # tipos de partícula (columna kind del pool)
+PARTICLE_FLASH = 1
+SPARK_FRICTION = 0.98    # la velocidad de las chispas se multiplica por esto cada paso
+
+# Variante "lluvia de recompensas": miles de recompensas a la vez
+REWARD_STORM_COUNT = 2000
+REWARD_RECHECK_ITERATIONS = 5  # empujones extra a las recompensas que siguen fuera
+
+# Hash espacial (coords locales): celda >= mayor radio de consulta (spawn lejos del cuerpo)
+GRID_CELL_SIZE = SNAKE_RADIUS + 30
+GRID_KEY_SHIFT = 20  # clave de celda = (cx << 20) + cy, única mientras |cy| < 2**19 celdas
+GRID_VECTORIZE_MIN = 16  # con más candidatos que esto se filtran con NumPy
+
+# Spawn de recompensas sobre un raster de celdas libres
+SPAWN_CELL_SIZE = 6.0             # lado de las celdas del raster de spawn
+SPAWN_EXTENT = 0.75               # solo dentro de la caja ±bounds_radius * 0.75
+SPAWN_MARGIN = REWARD_RADIUS + 2  # holgura mínima con las paredes
+HEAD_CLEARANCE = SNAKE_RADIUS + 50  # distancia mínima del spawn a la cabeza
+BODY_CLEARANCE = SNAKE_RADIUS + 30  # distancia mínima del spawn a cada segmento
+
+# Paso fijo de simulación
+FIXED_TIMESTEP = 1.0 / 60.0  # segundos por paso de física
+MAX_STEPS_PER_FRAME = 8      # evita la "espiral de la muerte" si un frame tarda mucho
+MAX_SWEEP_BOUNCES = 4        # rebotes resueltos dentro de un mismo paso (esquinas, pasos largos)
+SELF_COLLISION_SUBSTEP = SNAKE_RADIUS / 2  # avance de la cabeza (px) entre comprobaciones con el cuerpo
+# Hasta cuántos lados de una arena convexa compensa recorrerlos todos en vez
+# de preguntar al BVH (medido con Arena.regular: la cabeza ya va más rápida
+# por el BVH con 12 lados; las 2000 recompensas de la tormenta, vectorizadas,
+# siguen ganando con 64 y pierden con 100)
+LINEAR_EDGE_LIMIT = 8        # cabeza: bucle escalar lado a lado
+VECTOR_EDGE_LIMIT = 64       # recompensas: semiplanos con NumPy
+
+# Snapshots binarios del estado completo (ver SnakeSimulation.snapshot)
+SNAPSHOT_MAGIC = b"HXSS"
+SNAPSHOT_VERSION = 3
+# magic, versión, effects, game_over, hay next_direction, seed, ticks,
+# serie de partículas, score, segmentos, recompensas, muestras del path,
+# capacidad y nº de partículas, chispas por recompensa, nº de inputs, bytes
+# del motivo de game over, bytes del nivel (al final de todo)
+_SNAPSHOT_HEADER = struct.Struct("<4sB???qQQ10I")  # seed con signo, como acepta reset()
+# tiempo, acumulador, rotación (4), cabeza, velocidad, cabeza anterior,
+# next_direction (2 cada uno) y longitud total del path
+_SNAPSHOT_FLOATS = struct.Struct("<15d")
+# Estado de un random.Random: 625 enteros de Mersenne Twister + gauss_next
+_SNAPSHOT_RNG = struct.Struct("<625I?d")
+
+# Parámetros de balance que se pueden cambiar por partida (barridos, variantes)
+DEFAULT_PARAMS = {
+    "snake_speed": SNAKE_SPEED,
+    "gravity": GRAVITY,
+    "reward_bounce": REWARD_BOUNCE,
+    "rotation_speed_min": HEX_ROTATION_SPEED_MIN,
+    "rotation_speed_max": HEX_ROTATION_SPEED_MAX,
+    "num_rewards": NUM_REWARDS,
+}
+
+STORM_PARAMS = {**DEFAULT_PARAMS, "num_rewards": REWARD_STORM_COUNT}
+
+
+# ----------------- HELPERS DE VECTORES -----------------
+
+def vec_dot(a, b):
+    return a[0] * b[0] + a[1] * b[1]
+
+
+def vec_scale(a, s):
+    return [a[0] * s, a[1] * s]
+
+
+def vec_length(a):
+    return math.hypot(a[0], a[1])
+
+
+def vec_reflect(v, n):
+    """Refleja el vector v contra una normal n (unitaria)."""
+    dot = vec_dot(v, n)
+    return [v[0] - 2 * dot * n[0], v[1] - 2 * dot * n[1]]
+
+
+def _copy_rng(rng):
+    """Copia de un random.Random con el mismo estado (sin sembrarla desde el SO)."""
+    copy = random.Random.__new__(random.Random)
+    copy.setstate(rng.getstate())
+    return copy
+
+
+# ----------------- PATH DE LA SERPIENTE -----------------
+
+class SnakePath:
+    """
+    Historial de posiciones de la cabeza en un buffer circular preasignado,
+    con la longitud de arco acumulada de cada muestra. Cada muestra se
+    escribe dos veces (en i y en i + capacity) para que la ventana viva sea
+    siempre un slice contiguo: colocar los segmentos a distancias exactas
+    detrás de la cabeza es un solo np.interp, y olvidar muestras viejas es
+    mover un índice.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.xs = np.zeros(2 * capacity)
+        self.ys = np.zeros(2 * capacity)
+        self.arc = np.zeros(2 * capacity)  # longitud acumulada (monótona)
+        self.start = 0   # índice físico de la muestra más vieja
+        self.count = 0
+        self.total_length = 0.0  # longitud de arco de la muestra más nueva
+        self._last_x = 0.0
+        self._last_y = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def copy(self):
+        """Copia independiente (arrays copiados, sin pasar por __init__)."""
+        path = SnakePath.__new__(SnakePath)
+        path.__dict__.update(self.__dict__)
+        path.xs = self.xs.copy()
+        path.ys = self.ys.copy()
+        path.arc = self.arc.copy()
+        return path
+
+    def window(self):
+        """Muestras vivas (xs, ys, arc), de la más vieja a la más nueva."""
+        live = slice(self.start, self.start + self.count)
+        return self.xs[live], self.ys[live], self.arc[live]
+
+    def load(self, xs, ys, arc, total_length):
+        """Reemplaza el historial por estas muestras (p. ej. al restaurar un snapshot)."""
+        count = len(xs)
+        capacity = self.capacity
+        while capacity < count:
+            capacity *= 2
+        if capacity != self.capacity:
+            self.__init__(capacity)
+        for name, values in (("xs", xs), ("ys", ys), ("arc", arc)):
+            column = getattr(self, name)
+            column[:count] = values
+            column[capacity:capacity + count] = values
+        self.start = 0
+        self.count = count
+        self.total_length = total_length
+        if count:
+            self._last_x = float(xs[-1])
+            self._last_y = float(ys[-1])
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+        self.total_length = 0.0
+
+    def _grow(self):
+        """Duplica la capacidad (solo se llama lleno) dejando la muestra más vieja en 0."""
+        capacity = self.capacity * 2
+        window = slice(self.start, self.start + self.count)
+        for name in ("xs", "ys", "arc"):
+            old = getattr(self, name)[window]
+            new = np.zeros(2 * capacity)
+            new[:self.count] = old
+            new[capacity:capacity + self.count] = old
+            setattr(self, name, new)
+        self.start = 0
+        self.capacity = capacity
+
+    def append(self, x, y):
+        """Agrega una muestra al final (la cabeza) y acumula la distancia recorrida."""
+        if self.count == self.capacity:
+            self._grow()
+        if self.count:
+            self.total_length += math.hypot(x - self._last_x, y - self._last_y)
+        else:
+            self.total_length = 0.0
+        self._last_x = x
+        self._last_y = y
+        index = (self.start + self.count) % self.capacity
+        mirror = index + self.capacity
+        self.xs[index] = self.xs[mirror] = x
+        self.ys[index] = self.ys[mirror] = y
+        self.arc[index] = self.arc[mirror] = self.total_length
+        self.count += 1
+
+    def trim(self, keep_length):
+        """Descarta muestras viejas que quedan más de keep_length detrás de la cabeza."""
+        arc = self.arc[self.start:self.start + self.count]
+        # Se conserva siempre una muestra anterior al límite para poder interpolar
+        drop = int(np.searchsorted(arc, self.total_length - keep_length, side="right")) - 1
+        drop = min(drop, self.count - 2)
+        if drop > 0:
+            self.start = (self.start + drop) % self.capacity
+            self.count -= drop
+
+    def points_at(self, distances):
+        """
+        Posiciones (n, 2) a las distancias de arco dadas detrás de la cabeza,
+        interpoladas entre muestras. Lo que cae antes del historial se queda
+        en la muestra más vieja.
+        """
+        window = slice(self.start, self.start + self.count)
+        arc = self.arc[window]
+        targets = self.total_length - distances
+        points = np.empty((len(targets), 2))
+        points[:, 0] = np.interp(targets, arc, self.xs[window])
+        points[:, 1] = np.interp(targets, arc, self.ys[window])
+        return points
+
+
+# ----------------- POOL DE PARTÍCULAS -----------------
+
+class ParticlePool:
+    """
+    Partículas en arrays paralelos preasignados: las filas 0..count-1 están
+    vivas. Crear una no asigna memoria, las que caducan se quitan moviendo
+    las últimas vivas a sus huecos, y con el pool lleno la nueva pisa a la
+    más vieja.
+    """
+
+    # Arrays paralelos del pool (una fila por partícula)
+    COLUMNS = ("kind", "pos", "vel", "normal", "size", "age", "lifetime", "color", "serial")
+
+    def __init__(self, capacity=MAX_PARTICLES):
+        self.capacity = capacity
+        self.count = 0
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.normal = np.zeros((capacity, 2))  # normal de la pared (solo flashes)
+        self.size = np.zeros(capacity)
+        self.age = np.zeros(capacity)
+        self.lifetime = np.ones(capacity)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)  # RGB
+        self.serial = np.zeros(capacity, dtype=np.int64)  # orden de creación, para desalojar
+        self._next_serial = 0
+
+    def __len__(self):
+        return self.count
+
+    def copy(self):
+        """Copia independiente del pool (columnas copiadas)."""
+        pool = ParticlePool.__new__(ParticlePool)
+        pool.__dict__.update(self.__dict__)
+        for name in self.COLUMNS:
+            setattr(pool, name, getattr(self, name).copy())
+        return pool
+
+    def clear(self):
+        self.count = 0
+
+    def spawn(self, kind, x, y, vx, vy, size, lifetime, color, nx=0.0, ny=0.0):
+        """Escribe una partícula en una fila libre (o en la de la más vieja si está lleno)."""
+        if self.count < self.capacity:
+            i = self.count
+            self.count += 1
+        else:
+            i = int(self.serial.argmin())
+        self.kind[i] = kind
+        self.pos[i] = (x, y)
+        self.vel[i] = (vx, vy)
+        self.normal[i] = (nx, ny)
+        self.size[i] = size
+        self.age[i] = 0.0
+        self.lifetime[i] = lifetime
+        self.color[i] = color
+        self.serial[i] = self._next_serial
+        self._next_serial += 1
+
+    def update(self, delta_time):
+        """Envejece, mueve las chispas y quita las caducadas con swap-remove."""
+        n = self.count
+        if not n:
+            return
+        self.age[:n] += delta_time
+
+        sparks = self.kind[:n] == PARTICLE_SPARK
+        self.pos[:n][sparks] += self.vel[:n][sparks] * delta_time
+        # Aplicar fricción ligera
+        self.vel[:n][sparks] *= SPARK_FRICTION
+
+        expired = np.flatnonzero(self.age[:n] >= self.lifetime[:n])
+        if not len(expired):
+            return
+        # Los huecos por debajo de la nueva cuenta se rellenan con las vivas del final
+        alive = n - len(expired)
+        tail = np.ones(n - alive, dtype=bool)
+        tail[expired[expired >= alive] - alive] = False
+        holes = expired[expired < alive]
+        movers = np.flatnonzero(tail) + alive
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            column[holes] = column[movers]
+        self.count = alive
+
+
+# ----------------- HASH ESPACIAL -----------------
+
+class SpatialHash:
+    """
+    Rejilla uniforme sobre las coords locales del hexágono: celda -> ids.
+    Los ids son enteros (índice del segmento). sync_points solo toca la
+    rejilla para los ids que cambian de celda, y una consulta solo mira las
+    celdas que cubren el círculo pedido.
+    """
+
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self.inv_cell_size = 1.0 / cell_size
+        self.cells = {}       # clave de celda -> set de ids
+        self.item_cells = {}  # id -> clave de celda
+        # Claves de sync_points() como array para detectar cambios en bloque
+        self._point_keys = np.zeros(0, dtype=np.int64)
+
+    def copy(self):
+        """Copia independiente de la rejilla (sets por celda copiados)."""
+        grid = SpatialHash.__new__(SpatialHash)
+        grid.__dict__.update(self.__dict__)
+        grid.cells = {key: bucket.copy() for key, bucket in self.cells.items()}
+        grid.item_cells = self.item_cells.copy()
+        return grid
+
+    def clear(self):
+        self.cells.clear()
+        self.item_cells.clear()
+        self._point_keys = np.zeros(0, dtype=np.int64)
+
+    def _place(self, item, key):
+        old = self.item_cells.get(item)
+        if old == key:
+            return
+        if old is not None:
+            bucket = self.cells[old]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[old]
+        self.item_cells[item] = key
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = {item}
+        else:
+            bucket.add(item)
+
+    def remove(self, item):
+        key = self.item_cells.pop(item, None)
+        if key is not None:
+            bucket = self.cells[key]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[key]
+
+    def sync_points(self, points):
+        """
+        Sincroniza los ids 0..n-1 con las filas de points (n, 2). Las claves
+        se calculan vectorizadas y solo se tocan los ids que cambiaron de
+        celda (más los que aparecen o desaparecen).
+        """
+        cell = np.floor(points * self.inv_cell_size).astype(np.int64)
+        keys = (cell[:, 0] << GRID_KEY_SHIFT) + cell[:, 1]
+        old_keys = self._point_keys
+        old_n = len(old_keys)
+        n = len(keys)
+        common = min(old_n, n)
+
+        changed = np.flatnonzero(keys[:common] != old_keys[:common]).tolist()
+        changed.extend(range(common, n))
+        if changed:
+            place = self._place
+            for i, key in zip(changed, keys[changed].tolist()):
+                place(i, key)
+        for i in range(n, old_n):
+            self.remove(i)
+
+        self._point_keys = keys
+
+    def query(self, x, y, radius):
+        """Ids en las celdas que cubren el círculo (x, y, radius). Hay que filtrar por distancia."""
+        inv = self.inv_cell_size
+        y0 = math.floor((y - radius) * inv)
+        y1 = math.floor((y + radius) * inv) + 1
+        cells = self.cells
+        found = []
+        for cx in range(math.floor((x - radius) * inv), math.floor((x + radius) * inv) + 1):
+            base = cx << GRID_KEY_SHIFT
+            for key in range(base + y0, base + y1):
+                bucket = cells.get(key)
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+
+# ----------------- SPAWN -----------------
+
+class SpawnSampler:
+    """
+    Raster de la zona de spawn de una arena: celdas de cell_size cuyo
+    cuadrado entero cabe en la arena con margin de holgura (fijo por arena).
+    Las zonas de exclusión de la serpiente (un disco de clearances[i]
+    alrededor de cada punto del grupo i) se estampan encima con NumPy, y
+    elegir un sitio libre es elegir una celda de la lista: O(1) por spawn,
+    sin reintentos, por muy llena que esté la arena.
+    El raster se rehace entero en los pasos con spawn en vez de mantenerlo
+    al día paso a paso: todo el cuerpo se mueve en cada paso, así que quitar
+    y poner los sellos de los segmentos que cambian de celda cuesta más
+    (~110 µs en cada paso) que rehacerlo solo cuando hace falta (80-220 µs
+    uno de cada ~30 pasos).
+    """
+
+    def __init__(self, arena, clearances=(HEAD_CLEARANCE, BODY_CLEARANCE),
+                 cell_size=SPAWN_CELL_SIZE, margin=SPAWN_MARGIN, extent=SPAWN_EXTENT):
+        self.cell_size = cell_size
+        self.clearances = clearances
+        # Un círculo de radio r + half_diagonal alrededor del centro cubre la celda entera
+        half_diagonal = cell_size * math.sqrt(0.5)
+        size = max(1, int(2 * arena.bounds_radius * extent // cell_size))
+        self.origin = -size * cell_size / 2
+
+        # Raster con borde: los discos de puntos fuera de la caja (hasta
+        # bounds_radius) caen en el borde sin salirse del array
+        reach = max(math.ceil((r + 2 * half_diagonal) / cell_size) for r in clearances)
+        self.reach = reach
+        self.pad = reach + math.ceil((arena.bounds_radius + self.origin) / cell_size) + 1
+        self.width = size + 2 * self.pad
+
+        # Sello de cada holgura como desplazamientos de índice plano. La
+        # celda del punto se toma por su centro, así que el disco se agranda
+        # media diagonal por cada lado para no dejar libre ninguna celda tocada
+        offsets = np.arange(-reach, reach + 1)
+        dx, dy = np.meshgrid(offsets, offsets)
+        dx = dx.ravel()
+        dy = dy.ravel()
+        center_dist = np.hypot(dx, dy) * cell_size
+        self.stamps = [
+            dy[keep] * self.width + dx[keep]
+            for keep in (center_dist < r + 2 * half_diagonal for r in clearances)
+        ]
+
+        # Celdas válidas: centro e índice plano en el raster con borde
+        iy, ix = np.divmod(np.arange(size * size), size)
+        centers = self.origin + (np.stack([ix, iy], axis=1) + 0.5) * cell_size
+        valid = arena.inside_mask(centers, margin + half_diagonal)
+        self.centers = centers[valid]
+        self.raster_index = ((iy + self.pad) * self.width + ix + self.pad)[valid]
+
+    def free_cells(self, groups):
+        """
+        groups[i]: puntos (n, 2) con holgura clearances[i]. Devuelve las
+        celdas (índices de self.centers) fuera de toda zona de exclusión; si
+        no queda ninguna, las más alejadas de todas.
+        """
+        indices = []
+        for points, stamp in zip(groups, self.stamps):
+            if not len(points):
+                continue
+            cell = np.floor((points - self.origin) / self.cell_size).astype(np.intp) + self.pad
+            np.clip(cell, self.reach, self.width - 1 - self.reach, out=cell)
+            indices.append(((cell[:, 1] * self.width + cell[:, 0])[:, None] + stamp).ravel())
+        if not indices:
+            return np.arange(len(self.centers))
+        indices = np.concatenate(indices)
+
+        blocked = np.zeros(self.width * self.width, dtype=bool)
+        blocked[indices] = True
+        free = np.flatnonzero(~blocked[self.raster_index])
+        if len(free) or not len(self.centers):
+            return free
+
+        # Arena llena: de las celdas que tapan menos zonas, las más alejadas
+        # de todas (distancia exacta, solo para esas candidatas)
+        counts = np.bincount(indices, minlength=len(blocked))[self.raster_index]
+        candidates = np.flatnonzero(counts == counts.min())
+        centers = self.centers[candidates]
+        slack = np.full(len(candidates), np.inf)
+        for points, clearance in zip(groups, self.clearances):
+            if len(points):
+                offset = centers[:, None, :] - points[None, :, :]
+                dist = np.sqrt((offset ** 2).sum(axis=2)).min(axis=1)
+                slack = np.minimum(slack, dist - clearance)
+        return candidates[slack >= slack.max() - self.cell_size]
+
+    def sample(self, rng, cells):
+        """Punto uniforme dentro de una celda de cells elegida al azar."""
+        cx, cy = self.centers[cells[int(rng.random() * len(cells))]].tolist()
+        half = self.cell_size / 2
+        return [cx + rng.uniform(-half, half), cy + rng.uniform(-half, half)]
+
+
+# ----------------- SIMULACIÓN -----------------
+
+class SnakeSimulation:
+    """
+    Estado y reglas de una partida, sin nada de pygame.
+    Todo está en coordenadas locales del hexágono (centro = (0,0));
+    la rotación del escenario solo afecta a cómo se interpreta el input.
+    seed: semilla de la partida; con la misma semilla, los mismos inputs en
+          los mismos pasos dan exactamente la misma partida.
+    effects: si es False no se generan partículas (útil para bots/headless).
+             Las partículas usan su propio RNG, así que no cambian la partida.
+    params: dict con valores de DEFAULT_PARAMS a sobrescribir.
+    arena: Arena (snake_arena.py) con la forma del escenario; por defecto el
+           hexágono regular de HEX_RADIUS. Las arenas convexas con pocos lados
+           usan la física por semiplanos; las cóncavas y las de muchos lados,
+           las consultas del BVH (ver LINEAR_EDGE_LIMIT y VECTOR_EDGE_LIMIT).
+    """
+
+    def __init__(self, seed=None, effects=True, params=None, max_particles=MAX_PARTICLES,
+                 arena=None):
+        self.effects = effects
+        # Chispas por recompensa recogida (solo visual: el juego lo baja con la
+        # calidad adaptativa)
+        self.sparks_per_reward = SPARKS_PER_REWARD
+
+        # Parámetros de balance
+        self._set_params(params)
+
+        self.seed = None
+        self.rng = random.Random()     # RNG de juego (rotación, recompensas)
+        self.fx_rng = random.Random()  # RNG de efectos visuales (chispas)
+        self.ticks = 0                 # pasos simulados en la partida actual
+        self.elapsed_time = 0.0        # segundos simulados en la partida actual
+        self._accumulator = 0.0        # tiempo real pendiente de simular (modo paso fijo)
+
+        # Geometría de la arena en coords locales (centro = (0,0))
+        self.arena = arena if arena is not None else Arena.regular(HEX_RADIUS, 6)
+        self.hex_vertices_local = self.arena.vertices
+        self.hex_edges = self.arena.edges
+        # Los mismos lados como arrays para la física vectorizada de recompensas
+        self._edge_origins = np.array([v0 for v0, _ in self.hex_edges], dtype=float)
+        self._edge_normals = np.array([n for _, n in self.hex_edges], dtype=float)
+        # Qué física usa cada cosa: semiplanos (todos los lados) o BVH
+        self._linear_walls = self.arena.convex and len(self.hex_edges) <= LINEAR_EDGE_LIMIT
+        self._vector_walls = self.arena.convex and len(self.hex_edges) <= VECTOR_EDGE_LIMIT
+        # Zona de spawn (fija) y celdas libres para el estado actual (se
+        # recalculan, como mucho una vez por paso, cuando hace falta un spawn)
+        self.spawner = SpawnSampler(self.arena)
+        self._spawn_cells = None
+
+        # Rotación del escenario
+        self.hex_angle = 0.0
+        self.hex_rotation_speed = HEX_ROTATION_SPEED  # Velocidad actual de rotación
+        self.hex_rotation_timer = 0.0  # Temporizador para cambios aleatorios
+        self.hex_rotation_change_time = HEX_ROTATION_CHANGE_MAX
+
+        self.score = 0
+        self.game_over = False
+        self.game_over_reason = ""
+
+        self.snake_head_pos = [0.0, 0.0]
+        self.snake_velocity = [self.snake_speed, 0.0]
+        self.snake_body = np.zeros((0, 2))  # Posiciones de los segmentos (esferas), (n, 2)
+        self.last_head_pos = [0.0, 0.0]  # Para rastrear movimiento
+        self.snake_path = SnakePath()  # Historial de la cabeza que siguen los segmentos
+        self.snake_length = 0  # nº de segmentos del cuerpo
+        self._segment_distances = np.zeros(0)  # distancia de arco de cada segmento a la cabeza
+        self.next_direction = None  # Dirección pendiente para cambiar
+        self.input_log = []  # (tick, dirección de pantalla) de cada set_direction, para replays
+
+        # Recompensas como estructura de arrays: fila i = recompensa i
+        self.reward_pos = np.zeros((0, 2))
+        self.reward_vel = np.zeros((0, 2))
+        self.particles = ParticlePool(max_particles)  # Partículas activas
+
+        # Hash espacial de los segmentos del cuerpo (ids = índices)
+        self.body_grid = SpatialHash()
+
+        self.reset(seed)
+
+    # ----------------- SETUP MUNDO -----------------
+
+    def _set_params(self, params):
+        self.params = dict(DEFAULT_PARAMS)
+        if params:
+            unknown = set(params) - set(DEFAULT_PARAMS)
+            if unknown:
+                raise ValueError(f"Parámetros desconocidos: {sorted(unknown)}")
+            self.params.update(params)
+        self.snake_speed = float(self.params["snake_speed"])
+        self.gravity = float(self.params["gravity"])
+        self.reward_bounce = float(self.params["reward_bounce"])
+        self.rotation_speed_min = float(self.params["rotation_speed_min"])
+        self.rotation_speed_max = float(self.params["rotation_speed_max"])
+        self.num_rewards = int(self.params["num_rewards"])
+
+    def reset(self, seed=None):
+        """
+        Resetea la partida: serpiente, recompensas, partículas y score.
+        Sin semilla se elige una nueva al azar (queda en self.seed).
+        """
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.fx_rng.seed(seed ^ 0x5EED)
+        self.ticks = 0
+        self.elapsed_time = 0.0
+        self._accumulator = 0.0
+
+        self.score = 0
+        self.game_over = False
+        self.game_over_reason = ""
+        self.hex_angle = 0.0
+        self.hex_rotation_speed = HEX_ROTATION_SPEED
+        self.hex_rotation_timer = 0.0
+        self.hex_rotation_change_time = self.rng.uniform(HEX_ROTATION_CHANGE_MIN, HEX_ROTATION_CHANGE_MAX)
+
+        self.snake_head_pos = [0.0, 0.0]
+        self.snake_velocity = [self.snake_speed, 0.0]
+        self.last_head_pos = [0.0, 0.0]
+        self.next_direction = None
+        self.input_log = []
+        # Path inicial: línea recta detrás de la cabeza, con historial de sobra
+        self.snake_path.clear()
+        self.snake_path.append(-(INITIAL_SEGMENTS + 2) * SEGMENT_SPACING, 0.0)
+        self.snake_path.append(0.0, 0.0)
+
+        # Inicializar con algunos segmentos iniciales
+        self.snake_length = INITIAL_SEGMENTS
+        self.body_grid.clear()
+        self._place_segments()
+        self._segments_before = self.snake_length  # segmentos al empezar el paso
+        self._head_travel = 0.0                    # arco recorrido por la cabeza en el paso
+
+        self.reward_pos = np.zeros((0, 2))
+        self.reward_vel = np.zeros((0, 2))
+        self._reward_prev_pos = self.reward_pos
+
+        # Limpiar partículas al iniciar nuevo juego
+        self.particles.clear()
+
+        self._spawn_rewards(self.num_rewards)
+
+    # ----------------- PARTÍCULAS -----------------
+
+    def _create_sparks(self, pos, count=None):
+        """Crea chispas en la posición dada cuando se recoge una recompensa."""
+        if not self.effects:
+            return
+        if count is None:
+            count = self.sparks_per_reward
+        for _ in range(count):
+            angle = self.fx_rng.uniform(0, 2 * math.pi)
+            speed = self.fx_rng.uniform(SPARK_SPEED_MIN, SPARK_SPEED_MAX)
+            vel_x = math.cos(angle) * speed
+            vel_y = math.sin(angle) * speed
+
+            # Color amarillo/dorado para las chispas
+            color_brightness = self.fx_rng.randint(200, 255)
+            size = self.fx_rng.uniform(SPARK_SIZE * 0.7, SPARK_SIZE * 1.3)
+            color = (color_brightness, color_brightness, self.fx_rng.randint(100, 200))
+            self.particles.spawn(
+                PARTICLE_SPARK, pos[0], pos[1], vel_x, vel_y, size, PARTICLE_LIFETIME, color
+            )
+
+    def _create_bounce_flash(self, pos, normal):
+        """Crea un flash en el punto de impacto cuando rebota contra la pared."""
+        if not self.effects:
+            return
+        nx, ny = normal
+        # Crear flash radial desde el punto de impacto (color blanco/amarillo brillante)
+        self.particles.spawn(
+            PARTICLE_FLASH, pos[0], pos[1], 0.0, 0.0, FLASH_SIZE, FLASH_LIFETIME,
+            (255, 255, 200), nx, ny
+        )
+
+    def _update_particles(self, delta_time):
+        """Actualiza todas las partículas activas."""
+        self.particles.update(delta_time)
+
+    # ----------------- GEOMETRÍA / COLISIONES -----------------
+
+    def _is_inside_hex(self, pos, radius=0.0):
+        px, py = pos
+        if not self._linear_walls:
+            return self.arena.is_inside(px, py, radius)
+        for v0, n in self.hex_edges:
+            nx, ny = n
+            dist = (px - v0[0]) * nx + (py - v0[1]) * ny
+            if dist + radius > 0:
+                return False
+        return True
+
+    def _sweep_collision(self, pos, vel, radius, delta_time, bounce_factor=1.0, create_flash=False):
+        """
+        Mueve un círculo delta_time segundos contra los lados del hex de forma
+        continua: calcula el instante de impacto, rebota y sigue con el tiempo
+        que queda (hasta MAX_SWEEP_BOUNCES veces). Así no atraviesa paredes
+        aunque el paso sea largo. Devuelve (pos, vel, puntos_de_contacto).
+        """
+        if not self._linear_walls:
+            return self._sweep_collision_arena(pos, vel, radius, delta_time, bounce_factor, create_flash)
+        px, py = pos
+        vx, vy = vel
+        contacts = []
+        remaining = delta_time
+
+        for _ in range(MAX_SWEEP_BOUNCES):
+            hit_time = remaining
+            hit_normal = None
+            for v0, n in self.hex_edges:
+                nx, ny = n
+                approach = vx * nx + vy * ny
+                if approach <= 0.0:
+                    continue  # se aleja de este lado (o va paralelo)
+                gap = -((px - v0[0]) * nx + (py - v0[1]) * ny + radius)
+                t = max(gap, 0.0) / approach
+                if t < hit_time:
+                    hit_time = t
+                    hit_normal = n
+
+            px += vx * hit_time
+            py += vy * hit_time
+            if hit_normal is None:
+                break
+
+            remaining -= hit_time
+            nx, ny = hit_normal
+            contacts.append([px, py])
+            if create_flash and math.hypot(vx, vy) > 50.0:
+                self._create_bounce_flash([px - nx * radius, py - ny * radius], hit_normal)
+            # Reflejar velocidad
+            dot = vx * nx + vy * ny
+            vx = (vx - 2 * dot * nx) * bounce_factor
+            vy = (vy - 2 * dot * ny) * bounce_factor
+        else:
+            # Sin rebotes libres: avanzar lo que queda y corregir por penetración
+            px += vx * remaining
+            py += vy * remaining
+            (px, py), (vx, vy) = self._handle_collision([px, py], [vx, vy], radius, bounce_factor)
+
+        return [px, py], [vx, vy], contacts
+
+    def _sweep_collision_arena(self, pos, vel, radius, delta_time, bounce_factor=1.0, create_flash=False):
+        """_sweep_collision para arenas cóncavas o de muchos lados: los lados candidatos salen del BVH."""
+        px, py, vx, vy, hits = self.arena.sweep(
+            pos[0], pos[1], vel[0], vel[1], radius, delta_time, bounce_factor, MAX_SWEEP_BOUNCES
+        )
+        contacts = []
+        for center, point, normal, old_vel in hits:
+            contacts.append(list(center))
+            if create_flash and math.hypot(*old_vel) > 50.0:
+                self._create_bounce_flash(point, normal)
+        return [px, py], [vx, vy], contacts
+
+    def _handle_collision(self, pos, vel, radius, bounce_factor=1.0, create_flash=False):
+        """Colisión círculo–arena. Devuelve (pos_corregida, vel_reflejada)."""
+        if not self._linear_walls:
+            px, py, vx, vy, contact = self.arena.resolve(pos[0], pos[1], vel[0], vel[1], radius, bounce_factor)
+            if contact is not None and create_flash and vec_length(vel) > 50.0:
+                self._create_bounce_flash(*contact)
+            return [px, py], [vx, vy]
+        px, py = pos
+        max_penetration = 0.0
+        collision_normal = None
+        collision_point = None
+
+        for v0, n in self.hex_edges:
+            nx, ny = n
+            dist = (px - v0[0]) * nx + (py - v0[1]) * ny
+            penetration = dist + radius
+
+            if penetration > max_penetration:
+                max_penetration = penetration
+                collision_normal = n
+                # Calcular punto de impacto aproximado
+                collision_point = [px - nx * radius, py - ny * radius]
+
+        if collision_normal is not None and max_penetration > 0.0:
+            nx, ny = collision_normal
+
+            # Reposicionar dentro
+            px -= nx * max_penetration
+            py -= ny * max_penetration
+            pos = [px, py]
+
+            # Reflejar velocidad
+            old_vel = vel.copy()
+            vel = vec_reflect(vel, collision_normal)
+            vel = vec_scale(vel, bounce_factor)
+
+            # Crear flash si hay rebote significativo y se solicita
+            if create_flash and vec_length(old_vel) > 50.0:
+                self._create_bounce_flash(collision_point, collision_normal)
+
+        return pos, vel
+
+    def _free_spawn_cells(self):
+        """Celdas de spawn lejos de la cabeza y del cuerpo en este paso."""
+        if self._spawn_cells is None:
+            head = np.array([self.snake_head_pos])
+            self._spawn_cells = self.spawner.free_cells([head, self.snake_body])
+        return self._spawn_cells
+
+    def _spawn_point(self):
+        """Posición libre al azar dentro de la arena, lejos de la serpiente."""
+        cells = self._free_spawn_cells()
+        if not len(cells):
+            return [0.0, 0.0]  # arena sin sitio para una recompensa
+        return self.spawner.sample(self.rng, cells)
+
+    def _create_reward(self):
+        """Crea una recompensa en posición aleatoria dentro de la arena."""
+        pos = self._spawn_point()
+        # Crear velocidad inicial aleatoria
+        angle = self.rng.uniform(0, 2 * math.pi)
+        speed = self.rng.uniform(60.0, 120.0)
+        vel = [math.cos(angle) * speed, math.sin(angle) * speed]
+        return pos, vel
+
+    def _spawn_rewards(self, count):
+        """Agrega count recompensas nuevas al final de los arrays."""
+        if count <= 0:
+            return
+        spawned = [self._create_reward() for _ in range(count)]
+        self.reward_pos = np.concatenate([self.reward_pos, [pos for pos, _ in spawned]])
+        self.reward_vel = np.concatenate([self.reward_vel, [vel for _, vel in spawned]])
+
+    def _body_within(self, x, y, radius):
+        """True si algún segmento está a menos de radius de (x, y) (solo mira celdas vecinas)."""
+        candidates = self.body_grid.query(x, y, radius)
+        radius2 = radius * radius
+        if len(candidates) > GRID_VECTORIZE_MIN:
+            near = self.snake_body[candidates]
+            dx = near[:, 0] - x
+            dy = near[:, 1] - y
+            return bool((dx * dx + dy * dy < radius2).any())
+        # Pocos candidatos: un bucle sale más barato que indexar el array
+        body = self.snake_body
+        for i in candidates:
+            dx = body[i, 0] - x
+            dy = body[i, 1] - y
+            if dx * dx + dy * dy < radius2:
+                return True
+        return False
+
+    # ----------------- INPUT -----------------
+
+    def set_direction(self, screen_direction):
+        """
+        Establece la dirección deseada de la serpiente (Snake clásico).
+        screen_direction es en coordenadas de pantalla (arriba = +Y).
+        La dirección cambia inmediatamente si no es opuesta a la actual.
+        Cada llamada queda en input_log con el tick en que llega.
+        """
+        self.input_log.append((self.ticks, (screen_direction[0], screen_direction[1])))
+
+        # Normalizar el vector de dirección de pantalla
+        length = vec_length(screen_direction)
+        if length == 0:
+            return
+
+        # Convertir dirección de pantalla a coordenadas locales del hexágono
+        angle_rad = math.radians(-self.hex_angle)
+        cos_a = math.cos(angle_rad)
+        sin_a = math.sin(angle_rad)
+
+        # Rotar el vector de dirección de pantalla a coordenadas locales
+        local_x = screen_direction[0] * cos_a - screen_direction[1] * sin_a
+        local_y = screen_direction[0] * sin_a + screen_direction[1] * cos_a
+
+        # Normalizar
+        local_length = math.hypot(local_x, local_y)
+        if local_length > 0:
+            local_x /= local_length
+            local_y /= local_length
+
+        # Obtener dirección actual normalizada
+        current_vel = self.snake_velocity
+        speed = vec_length(current_vel)
+        if speed == 0:
+            speed = self.snake_speed
+
+        current_dir_x = current_vel[0] / speed if speed > 0 else 1.0
+        current_dir_y = current_vel[1] / speed if speed > 0 else 0.0
+
+        # Verificar si la dirección es opuesta (producto punto negativo)
+        dot_product = current_dir_x * local_x + current_dir_y * local_y
+        if dot_product < -0.5:  # Dirección opuesta (no permitir)
+            return
+
+        # Cambiar dirección inmediatamente (Snake clásico)
+        self.snake_velocity = [local_x * speed, local_y * speed]
+        self.next_direction = None  # Limpiar dirección pendiente
+
+    # ----------------- UPDATE -----------------
+
+    def update_rotation(self, delta_time):
+        """El hexágono rota siempre (también fuera de partida) con velocidad variable."""
+        # Actualizar temporizador para cambios aleatorios
+        self.hex_rotation_timer += delta_time
+
+        # Cambiar velocidad/dirección de rotación aleatoriamente
+        if self.hex_rotation_timer >= self.hex_rotation_change_time:
+            # Cambiar a nueva velocidad aleatoria (puede ser positiva o negativa)
+            speed_range = self.rotation_speed_max - self.rotation_speed_min
+            random_speed = self.rotation_speed_min + self.rng.random() * speed_range
+            # 50% de probabilidad de rotar en sentido contrario
+            if self.rng.random() < 0.5:
+                random_speed = -random_speed
+
+            self.hex_rotation_speed = random_speed
+            self.hex_rotation_timer = 0.0
+            # Programar próximo cambio aleatorio
+            self.hex_rotation_change_time = self.rng.uniform(HEX_ROTATION_CHANGE_MIN, HEX_ROTATION_CHANGE_MAX)
+
+        # Aplicar rotación con velocidad actual
+        self.hex_angle = (self.hex_angle + self.hex_rotation_speed * delta_time) % 360.0
+
+    def _update_snake(self, delta_time):
+        # Guardar posición anterior de la cabeza (y lo que hace falta para la
+        # colisión barrida con el cuerpo)
+        self.last_head_pos = self.snake_head_pos.copy()
+        self._segments_before = self.snake_length
+        total_length = self.snake_path.total_length
+
+        # Mover cabeza con rebote continuo contra las paredes (con flash de impacto)
+        self.snake_head_pos, self.snake_velocity, contacts = self._sweep_collision(
+            self.snake_head_pos, self.snake_velocity, SNAKE_RADIUS, delta_time,
+            bounce_factor=1.0, create_flash=True
+        )
+
+        # Agregar al path los puntos de rebote y la posición actual, y olvidar
+        # lo que ya no sigue ningún segmento (uno de margen para crecer)
+        for x, y in contacts:
+            self.snake_path.append(x, y)
+        self.snake_path.append(self.snake_head_pos[0], self.snake_head_pos[1])
+        self._head_travel = self.snake_path.total_length - total_length
+        self.snake_path.trim((self.snake_length + 2) * SEGMENT_SPACING)
+
+        # Cada segmento va a su distancia exacta de arco detrás de la cabeza
+        self._place_segments()
+
+    def _place_segments(self):
+        """El segmento i va a (i + 1) * SEGMENT_SPACING de arco detrás de la cabeza."""
+        if len(self._segment_distances) != self.snake_length:
+            self._segment_distances = SEGMENT_SPACING * np.arange(1, self.snake_length + 1)
+        self.snake_body = self.snake_path.points_at(self._segment_distances)
+        self.body_grid.sync_points(self.snake_body)
+        self._spawn_cells = None  # la serpiente se movió: el raster libre ya no vale
+
+    def _grow(self, segments):
+        """Alarga la serpiente: los nuevos segmentos salen del historial del path."""
+        self.snake_length += segments
+        self._place_segments()
+
+    def _edge_penetration(self, pos, radius):
+        """Penetración (m, lados) de cada círculo en cada lado de una arena convexa (> 0 = fuera)."""
+        origins = self._edge_origins
+        normals = self._edge_normals
+        return (
+            (pos[:, 0:1] - origins[:, 0]) * normals[:, 0]
+            + (pos[:, 1:2] - origins[:, 1]) * normals[:, 1]
+            + radius
+        )
+
+    def _resolve_reward_walls(self, rows, bounce_factor):
+        """
+        _handle_collision para las recompensas de rows a la vez: saca cada una
+        por el lado más penetrado y refleja su velocidad. Devuelve las filas
+        que chocaron.
+        """
+        if not self._vector_walls:
+            return self._resolve_reward_walls_arena(rows, bounce_factor)
+        pos = self.reward_pos[rows]
+        penetration = self._edge_penetration(pos, REWARD_RADIUS)
+        edge = penetration.argmax(axis=1)
+        depth = penetration[np.arange(len(rows)), edge]
+        hit = depth > 0.0
+        if not hit.any():
+            return rows[hit]
+
+        rows = rows[hit]
+        pos = pos[hit]
+        depth = depth[hit]
+        normal = self._edge_normals[edge[hit]]
+        vel = self.reward_vel[rows]
+
+        # Reposicionar dentro y reflejar velocidad
+        pos -= normal * depth[:, None]
+        dot = vel[:, 0] * normal[:, 0] + vel[:, 1] * normal[:, 1]
+        vel -= 2 * dot[:, None] * normal
+        vel *= bounce_factor
+
+        self.reward_pos[rows] = pos
+        self.reward_vel[rows] = vel
+        return rows
+
+    def _resolve_reward_walls_arena(self, rows, bounce_factor):
+        """_resolve_reward_walls en arenas cóncavas o de muchos lados, recompensa a recompensa."""
+        hit = []
+        arena = self.arena
+        for row in rows.tolist():
+            x, y = self.reward_pos[row].tolist()
+            vx, vy = self.reward_vel[row].tolist()
+            x, y, vx, vy, contact = arena.resolve(x, y, vx, vy, REWARD_RADIUS, bounce_factor)
+            if contact is not None:
+                self.reward_pos[row] = (x, y)
+                self.reward_vel[row] = (vx, vy)
+                hit.append(row)
+        return np.array(hit, dtype=np.intp)
+
+    def _rewards_outside(self, rows):
+        """Máscara de las recompensas de rows que no están del todo dentro de la arena."""
+        if not self._vector_walls:
+            inside = self.arena.is_inside
+            return np.array(
+                [not inside(x, y, REWARD_RADIUS) for x, y in self.reward_pos[rows].tolist()], dtype=bool
+            )
+        return (self._edge_penetration(self.reward_pos[rows], REWARD_RADIUS) > 0).any(axis=1)
+
+    def _sweep_rewards(self, delta_time):
+        """
+        _sweep_collision para todas las recompensas a la vez. En cada vuelta
+        solo siguen las que rebotaron. Devuelve las filas que agotaron los
+        rebotes (pueden haber quedado fuera).
+        """
+        if not self._vector_walls:
+            return self._sweep_rewards_arena(delta_time)
+        normals = self._edge_normals
+        rows = np.arange(len(self.reward_pos))
+        remaining = np.full(len(rows), delta_time)
+
+        for _ in range(MAX_SWEEP_BOUNCES):
+            pos = self.reward_pos[rows]
+            vel = self.reward_vel[rows]
+            approach = vel[:, 0:1] * normals[:, 0] + vel[:, 1:2] * normals[:, 1]
+            gap = np.maximum(-self._edge_penetration(pos, REWARD_RADIUS), 0.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                times = np.where(approach > 0.0, gap / approach, np.inf)
+            edge = times.argmin(axis=1)
+            hit_time = np.minimum(times[np.arange(len(rows)), edge], remaining)
+            hit = hit_time < remaining
+
+            pos += vel * hit_time[:, None]
+            self.reward_pos[rows] = pos
+            if not hit.any():
+                return rows[hit]
+
+            # Reflejar la velocidad de las que tocaron pared y seguir con ellas
+            rows = rows[hit]
+            remaining = remaining[hit] - hit_time[hit]
+            normal = normals[edge[hit]]
+            vel = vel[hit]
+            dot = vel[:, 0] * normal[:, 0] + vel[:, 1] * normal[:, 1]
+            vel -= 2 * dot[:, None] * normal
+            vel *= self.reward_bounce
+            self.reward_vel[rows] = vel
+
+        # Sin rebotes libres: avanzar lo que queda y corregir por penetración
+        self.reward_pos[rows] += self.reward_vel[rows] * remaining[:, None]
+        return self._resolve_reward_walls(rows, self.reward_bounce)
+
+    def _sweep_rewards_arena(self, delta_time):
+        """
+        _sweep_rewards en arenas cóncavas o de muchos lados: cada recompensa
+        barre contra los lados que le da el BVH. Devuelve las filas que
+        quedaron fuera.
+        """
+        sweep = self.arena.sweep
+        pos = self.reward_pos.tolist()
+        vel = self.reward_vel.tolist()
+        for row, ((x, y), (vx, vy)) in enumerate(zip(pos, vel)):
+            x, y, vx, vy, _ = sweep(x, y, vx, vy, REWARD_RADIUS, delta_time,
+                                    self.reward_bounce, MAX_SWEEP_BOUNCES)
+            pos[row] = (x, y)
+            vel[row] = (vx, vy)
+        self.reward_pos = np.array(pos).reshape(-1, 2)
+        self.reward_vel = np.array(vel).reshape(-1, 2)
+        rows = np.arange(len(pos))
+        return rows[self._rewards_outside(rows)]
+
+    def _update_rewards(self, delta_time):
+        # Posiciones al empezar el paso (para recogerlas aunque el paso sea largo)
+        self._reward_prev_pos = self.reward_pos.copy()
+        if not len(self.reward_pos):
+            return
+
+        # Gravedad en coordenadas locales (hacia abajo en Y negativo)
+        self.reward_vel[:, 1] += self.gravity * delta_time
+
+        # Movimiento continuo con rebote contra las paredes de la arena
+        rows = self._sweep_rewards(delta_time)
+
+        # Asegurar que siempre estén dentro de la arena: solo las que agotaron
+        # los rebotes pueden seguir fuera, y se empujan dentro unas cuantas veces más
+        for _ in range(REWARD_RECHECK_ITERATIONS):
+            if not len(rows):
+                return
+            rows = self._resolve_reward_walls(rows[self._rewards_outside(rows)], 0.5)
+
+        if not len(rows):
+            return
+        outside = self._rewards_outside(rows)
+
+        # Si aún están fuera después de intentos, reposicionarlas en un sitio libre de la arena
+        for row in rows[outside].tolist():
+            new_pos = self._spawn_point()
+            self.reward_pos[row] = new_pos
+            self._reward_prev_pos[row] = new_pos  # teletransporte: no barre el camino
+            # Dar velocidad aleatoria
+            angle = self.rng.uniform(0, 2 * math.pi)
+            speed = self.rng.uniform(60.0, 100.0)
+            self.reward_vel[row] = [math.cos(angle) * speed, math.sin(angle) * speed]
+
+    def _check_reward_collisions(self):
+        # Distancia mínima entre cabeza y recompensa durante el paso (movimiento
+        # relativo lineal), así un paso largo no salta por encima de ninguna
+        head = self.snake_head_pos
+        last = self.last_head_pos
+        start_x = self._reward_prev_pos[:, 0] - last[0]
+        start_y = self._reward_prev_pos[:, 1] - last[1]
+        move_x = (self.reward_pos[:, 0] - head[0]) - start_x
+        move_y = (self.reward_pos[:, 1] - head[1]) - start_y
+        move2 = move_x * move_x + move_y * move_y
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.clip(-(start_x * move_x + start_y * move_y) / move2, 0.0, 1.0)
+        t[move2 == 0.0] = 0.0
+        dx = start_x + move_x * t
+        dy = start_y + move_y * t
+        eaten = np.flatnonzero(dx * dx + dy * dy <= (SNAKE_RADIUS + REWARD_RADIUS) ** 2)
+
+        if len(eaten):
+            for pos in self.reward_pos[eaten].tolist():
+                self.score += 1
+                # Crear chispas cuando se come una recompensa
+                self._create_sparks(pos)
+                # Agregar nuevos segmentos cuando se come comida
+                self._grow(SEGMENTS_PER_FOOD)
+
+            self.reward_pos = np.delete(self.reward_pos, eaten, axis=0)
+            self.reward_vel = np.delete(self.reward_vel, eaten, axis=0)
+
+        # Mantener siempre num_rewards recompensas
+        self._spawn_rewards(self.num_rewards - len(self.reward_pos))
+
+    def _set_game_over(self, reason: str):
+        self.game_over = True
+        self.game_over_reason = reason
+
+    def _check_self_collision(self):
+        """
+        Si la cabeza toca el cuerpo en algún momento del paso => game over.
+        Los segmentos siguen el path de la cabeza, así que su posición a
+        mitad de paso sale del propio path: se comprueba cada
+        SELF_COLLISION_SUBSTEP de avance, y con pasos largos (--step-hz 10)
+        la cabeza no cruza el cuerpo entre dos comprobaciones. A 60 Hz el
+        paso es más corto que eso y basta con el final.
+        """
+        head = self.snake_head_pos
+        radius = SNAKE_RADIUS * 1.5
+        # Final del paso: solo se miran los segmentos en celdas vecinas
+        if self._body_within(head[0], head[1], radius):
+            self._set_game_over("Te has chocado con tu propio cuerpo.")
+            return
+        travel = self._head_travel
+        samples = math.ceil(travel / SELF_COLLISION_SUBSTEP)
+        if samples <= 1:
+            return
+
+        # Un segmento que toque la cabeza durante el paso acaba a menos de esto
+        # de ella (cada uno avanza como mucho el arco que avanza la cabeza). Los
+        # que salen al crecer en este paso aún no existían
+        candidates = [i for i in self.body_grid.query(head[0], head[1], radius + 2 * travel)
+                      if i < self._segments_before]
+        if not candidates:
+            return
+        distances = self._segment_distances[candidates]
+        for k in range(1, samples):
+            back = travel * k / samples  # cuánto más atrás en el path iba la cabeza
+            points = self.snake_path.points_at(np.append(back, back + distances))
+            offset = points[1:] - points[0]
+            if ((offset * offset).sum(axis=1) < radius * radius).any():
+                self._set_game_over("Te has chocado con tu propio cuerpo.")
+                return
+
+    def step(self, delta_time: float = FIXED_TIMESTEP):
+        """Avanza la partida delta_time segundos (no hace nada si ya terminó)."""
+        self.update_rotation(delta_time)
+
+        if self.game_over:
+            return
+
+        self.ticks += 1
+        self.elapsed_time += delta_time
+
+        self._update_snake(delta_time)
+        self._update_rewards(delta_time)
+        self._check_reward_collisions()
+        self._check_self_collision()
+        self._update_particles(delta_time)
+
+    def advance(self, frame_time: float):
+        """
+        Modo paso fijo: acumula el tiempo real del frame y lo consume en pasos
+        de FIXED_TIMESTEP. La física no depende de los FPS y, con la misma
+        semilla, la partida es reproducible a cualquier frame rate.
+        Devuelve el número de pasos simulados.
+        """
+        self._accumulator += frame_time
+        steps = 0
+        while self._accumulator >= FIXED_TIMESTEP and steps < MAX_STEPS_PER_FRAME:
+            self.step(FIXED_TIMESTEP)
+            self._accumulator -= FIXED_TIMESTEP
+            steps += 1
+        if steps == MAX_STEPS_PER_FRAME:
+            # Frame demasiado largo: descartar el retraso en vez de acumularlo
+            self._accumulator = min(self._accumulator, FIXED_TIMESTEP)
+        return steps
+
+    # ----------------- SNAPSHOTS -----------------
+
+    def clone(self):
+        """
+        Copia independiente de la partida para ramificarla (bots de búsqueda,
+        análisis "qué pasaría si"). Copia solo el estado mutable: los arrays
+        con .copy() y los RNG por getstate/setstate; la arena (inmutable) y
+        los parámetros se comparten.
+        """
+        sim = SnakeSimulation.__new__(SnakeSimulation)
+        sim.__dict__.update(self.__dict__)
+        sim.rng = _copy_rng(self.rng)
+        sim.snake_head_pos = self.snake_head_pos.copy()
+        sim.snake_velocity = self.snake_velocity.copy()
+        sim.last_head_pos = self.last_head_pos.copy()
+        if self.next_direction is not None:
+            sim.next_direction = list(self.next_direction)
+        sim.snake_body = self.snake_body.copy()
+        sim.snake_path = self.snake_path.copy()
+        sim.body_grid = self.body_grid.copy()
+        sim.reward_pos = self.reward_pos.copy()
+        sim.reward_vel = self.reward_vel.copy()
+        sim._reward_prev_pos = self._reward_prev_pos.copy()
+        sim.input_log = self.input_log.copy()
+        # También sin efectos: restore() escribe en el pool y el RNG de efectos
+        # de la copia, y no debe tocar los del original
+        sim.fx_rng = _copy_rng(self.fx_rng)
+        sim.particles = self.particles.copy()
+        return sim
+
+    def snapshot(self):
+        """
+        Estado completo de la partida en bytes: cabecera fija, parámetros,
+        estado de los dos RNG y luego los arrays vivos (path, recompensas,
+        partículas, inputs). El cuerpo no se guarda: sale del path. De la
+        arena solo se guarda el nivel (arena.level, como en los replays):
+        restore() no acepta el snapshot en una sim con otro nivel.
+        """
+        path_xs, path_ys, path_arc = self.snake_path.window()
+        pool = self.particles
+        n = pool.count
+        reason = self.game_over_reason.encode("utf-8")
+        level = self.arena.level.encode("utf-8")
+        next_direction = self.next_direction or (0.0, 0.0)
+
+        parts = [
+            _SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.effects, self.game_over,
+                self.next_direction is not None, self.seed, self.ticks, pool._next_serial,
+                self.score, self.snake_length, len(self.reward_pos), self.snake_path.count,
+                pool.capacity, n, self.sparks_per_reward, len(self.input_log), len(reason),
+                len(level),
+            ),
+            _SNAPSHOT_FLOATS.pack(
+                self.elapsed_time, self._accumulator, self.hex_angle, self.hex_rotation_speed,
+                self.hex_rotation_timer, self.hex_rotation_change_time,
+                *self.snake_head_pos, *self.snake_velocity, *self.last_head_pos,
+                *next_direction, self.snake_path.total_length,
+            ),
+            struct.pack("<%dd" % len(DEFAULT_PARAMS), *(float(self.params[k]) for k in DEFAULT_PARAMS)),
+        ]
+        for rng in (self.rng, self.fx_rng):
+            _, state, gauss_next = rng.getstate()
+            parts.append(_SNAPSHOT_RNG.pack(*state, gauss_next is not None, gauss_next or 0.0))
+
+        parts += [path_xs.tobytes(), path_ys.tobytes(), path_arc.tobytes(),
+                  self.reward_pos.tobytes(), self.reward_vel.tobytes()]
+        parts += [getattr(pool, name)[:n].tobytes() for name in ParticlePool.COLUMNS]
+        parts.append(np.array([tick for tick, _ in self.input_log], dtype=np.int64).tobytes())
+        parts.append(np.array([d for _, d in self.input_log], dtype=float).tobytes())
+        parts.append(reason)
+        parts.append(level)
+        return b"".join(parts)
+
+    def restore(self, data):
+        """Deja la partida exactamente como estaba al hacer snapshot()."""
+        (magic, version, effects, game_over, has_next_direction, seed, ticks, next_serial,
+         score, snake_length, num_rewards, path_count, particle_capacity, particle_count,
+         sparks_per_reward, num_inputs, reason_len, level_len) = _SNAPSHOT_HEADER.unpack_from(data, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("No es un snapshot de Hex Snake")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Versión de snapshot no soportada: {version}")
+        level = bytes(data[len(data) - level_len:]).decode("utf-8") if level_len else ""
+        if level != self.arena.level:
+            raise ValueError(
+                f"El snapshot es de otra arena (nivel {level!r}; esta partida usa {self.arena.level!r})"
+            )
+        offset = _SNAPSHOT_HEADER.size
+
+        floats = _SNAPSHOT_FLOATS.unpack_from(data, offset)
+        offset += _SNAPSHOT_FLOATS.size
+        params = struct.unpack_from("<%dd" % len(DEFAULT_PARAMS), data, offset)
+        offset += 8 * len(DEFAULT_PARAMS)
+        self._set_params({
+            name: type(default)(value)
+            for (name, default), value in zip(DEFAULT_PARAMS.items(), params)
+        })
+
+        for rng in (self.rng, self.fx_rng):
+            *state, has_gauss, gauss_next = _SNAPSHOT_RNG.unpack_from(data, offset)
+            offset += _SNAPSHOT_RNG.size
+            rng.setstate((3, tuple(state), gauss_next if has_gauss else None))
+
+        def take(count, dtype=np.float64, columns=None):
+            nonlocal offset
+            values = np.frombuffer(data, dtype=dtype, count=count * (columns or 1), offset=offset)
+            offset += values.nbytes
+            if columns is not None:
+                values = values.reshape(count, columns)
+            return values.copy()
+
+        self.effects = effects
+        self.sparks_per_reward = sparks_per_reward
+        self.seed = seed
+        self.ticks = ticks
+        self.score = score
+        self.game_over = game_over
+        (self.elapsed_time, self._accumulator, self.hex_angle, self.hex_rotation_speed,
+         self.hex_rotation_timer, self.hex_rotation_change_time) = floats[:6]
+        self.snake_head_pos = list(floats[6:8])
+        self.snake_velocity = list(floats[8:10])
+        self.last_head_pos = list(floats[10:12])
+        self.next_direction = list(floats[12:14]) if has_next_direction else None
+
+        path_xs = take(path_count)
+        path_ys = take(path_count)
+        path_arc = take(path_count)
+        self.snake_path.load(path_xs, path_ys, path_arc, floats[14])
+        self.snake_length = snake_length
+        self.body_grid.clear()
+        self._place_segments()
+        self._segments_before = snake_length
+        self._head_travel = 0.0
+
+        self.reward_pos = take(num_rewards, columns=2)
+        self.reward_vel = take(num_rewards, columns=2)
+        self._reward_prev_pos = self.reward_pos.copy()
+
+        if self.particles.capacity != particle_capacity:
+            self.particles = ParticlePool(particle_capacity)
+        pool = self.particles
+        for name in ParticlePool.COLUMNS:
+            column = getattr(pool, name)
+            column[:particle_count] = take(particle_count, column.dtype, *column.shape[1:])
+        pool.count = particle_count
+        pool._next_serial = next_serial
+
+        input_ticks = take(num_inputs, np.int64).tolist()
+        input_directions = take(num_inputs, columns=2).tolist()
+        self.input_log = [(tick, tuple(d)) for tick, d in zip(input_ticks, input_directions)]
+
+        self.game_over_reason = data[offset:offset + reason_len].decode("utf-8")
@@ -0,0 +1,278 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from snake_arena import load_arena
+from snake_sim import (
+    SnakeSimulation,
+    DEFAULT_PARAMS,
+    SNAKE_RADIUS,
+    SEGMENT_SPACING,
+    FIXED_TIMESTEP,
+)
+
+# ----------------- BARRIDO DE PARÁMETROS -----------------
+# Juega muchas partidas headless sobre una rejilla de parámetros de balance
+# usando todos los núcleos, y vuelca los resultados a CSV (uno por partida,
+# según van llegando) y JSON (resumen por combinación).
+#
+#   python snake_sweep.py --games 200 --snake-speed 150,200,250 --gravity -100,-150 --out sweep
+
+SCREEN_DIRECTIONS = ([0.0, -1.0], [0.0, 1.0], [-1.0, 0.0], [1.0, 0.0])
+
+DEFAULT_MAX_TIME = 300.0        # segundos simulados por partida como máximo
+DEFAULT_DECISION_INTERVAL = 0.1  # el bot decide cada ~100 ms (reacción humana)
+DEFAULT_STEP_HZ = 1.0 / FIXED_TIMESTEP  # pasos de física por segundo simulado
+TIMEOUT_REASON = "Tiempo máximo alcanzado."
+
+CSV_FIELDS = ["combo", *DEFAULT_PARAMS, "seed", "score", "survival_time", "ticks", "cause"]
+
+
+# ----------------- BOTS -----------------
+
+def _local_direction(sim, screen_direction):
+    """Dirección de pantalla -> coords locales (igual que set_direction)."""
+    angle_rad = math.radians(-sim.hex_angle)
+    cos_a = math.cos(angle_rad)
+    sin_a = math.sin(angle_rad)
+    return (
+        screen_direction[0] * cos_a - screen_direction[1] * sin_a,
+        screen_direction[0] * sin_a + screen_direction[1] * cos_a,
+    )
+
+
+def greedy_policy(sim, rng):
+    """Va hacia la recompensa más cercana evitando el cuerpo a corta distancia."""
+    head = sim.snake_head_pos
+    speed = math.hypot(*sim.snake_velocity) or 1.0
+    current = (sim.snake_velocity[0] / speed, sim.snake_velocity[1] / speed)
+    lookahead = SEGMENT_SPACING * 1.5
+    danger2 = (SNAKE_RADIUS * 2.5) ** 2
+    body = sim.snake_body[2:]
+
+    best_direction = None
+    best_cost = None
+    for screen_direction in SCREEN_DIRECTIONS:
+        lx, ly = _local_direction(sim, screen_direction)
+        if current[0] * lx + current[1] * ly < -0.5:
+            continue
+        px = head[0] + lx * lookahead
+        py = head[1] + ly * lookahead
+
+        rewards = sim.reward_pos
+        cost = float(np.hypot(rewards[:, 0] - px, rewards[:, 1] - py).min()) if len(rewards) else 0.0
+        # El cuello (primeros segmentos) siempre está cerca: no cuenta como peligro
+        dx = body[:, 0] - px
+        dy = body[:, 1] - py
+        if (dx * dx + dy * dy < danger2).any():
+            cost += 1000.0
+        if not sim._is_inside_hex([px, py], SNAKE_RADIUS):
+            cost += 100.0
+
+        if best_cost is None or cost < best_cost:
+            best_cost = cost
+            best_direction = screen_direction
+    return best_direction
+
+
+def random_policy(sim, rng):
+    """Cambia de dirección al azar de vez en cuando."""
+    if rng.random() < 0.3:
+        return rng.choice(SCREEN_DIRECTIONS)
+    return None
+
+
+POLICIES = {
+    "greedy": greedy_policy,
+    "random": random_policy,
+}
+
+
+# ----------------- WORKERS -----------------
+
+def play_game(params, seed, policy="greedy", max_time=DEFAULT_MAX_TIME,
+              decision_interval=DEFAULT_DECISION_INTERVAL, step_hz=DEFAULT_STEP_HZ, arena=None):
+    """
+    Juega una partida headless completa y devuelve su resultado. Con step_hz
+    bajo (10-20) la partida cuesta muchos menos pasos: la colisión continua
+    evita que recompensas y cabeza atraviesen paredes con pasos largos.
+    arena: Arena en la que se juega (None = hexágono).
+    """
+    sim = SnakeSimulation(seed=seed, effects=False, params=params, arena=arena)
+    choose = POLICIES[policy]
+    bot_rng = random.Random(seed)
+    delta_time = 1.0 / step_hz
+    max_ticks = int(max_time * step_hz)
+    decision_ticks = max(1, round(decision_interval * step_hz))
+
+    while not sim.game_over and sim.ticks < max_ticks:
+        if sim.ticks % decision_ticks == 0:
+            direction = choose(sim, bot_rng)
+            if direction is not None:
+                sim.set_direction(direction)
+        sim.step(delta_time)
+
+    return {
+        "seed": seed,
+        "score": sim.score,
+        "survival_time": round(sim.elapsed_time, 4),
+        "ticks": sim.ticks,
+        "cause": sim.game_over_reason if sim.game_over else TIMEOUT_REASON,
+    }
+
+
+def run_chunk(combo, params, seeds, policy, max_time, step_hz=DEFAULT_STEP_HZ, level=None):
+    """
+    Tarea de un proceso del pool: varias partidas con los mismos parámetros.
+    El nivel llega por nombre y cada proceso carga su arena una vez por tarea.
+    """
+    arena = load_arena(level) if level else None
+    results = []
+    for seed in seeds:
+        result = play_game(params, seed, policy, max_time, step_hz=step_hz, arena=arena)
+        result["combo"] = combo
+        result.update(params)
+        results.append(result)
+    return results
+
+
+# ----------------- INFORME -----------------
+
+def summarize(params_grid, results):
+    """Agrega los resultados por combinación de parámetros."""
+    by_combo = {}
+    for result in results:
+        by_combo.setdefault(result["combo"], []).append(result)
+
+    summary = []
+    for combo, params in enumerate(params_grid):
+        games = by_combo.get(combo, [])
+        scores = [g["score"] for g in games]
+        survival = [g["survival_time"] for g in games]
+        causes = {}
+        for g in games:
+            causes[g["cause"]] = causes.get(g["cause"], 0) + 1
+        summary.append({
+            "combo": combo,
+            "params": params,
+            "games": len(games),
+            "score_mean": statistics.fmean(scores) if scores else 0.0,
+            "score_median": statistics.median(scores) if scores else 0.0,
+            "score_max": max(scores, default=0),
+            "survival_mean": statistics.fmean(survival) if survival else 0.0,
+            "survival_median": statistics.median(survival) if survival else 0.0,
+            "causes": causes,
+        })
+    return summary
+
+
+def build_grid(args):
+    """Producto cartesiano de los valores pedidos para cada parámetro."""
+    axes = []
+    for name, default in DEFAULT_PARAMS.items():
+        values = getattr(args, name)
+        axes.append(values if values else [default])
+    return [dict(zip(DEFAULT_PARAMS, combo)) for combo in itertools.product(*axes)]
+
+
+def _value_list(kind):
+    def parse(text):
+        return [kind(v) for v in text.split(",") if v.strip()]
+    return parse
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Barrido de parámetros de Hex Snake con partidas headless en paralelo."
+    )
+    for name, default in DEFAULT_PARAMS.items():
+        kind = int if isinstance(default, int) else float
+        parser.add_argument(
+            "--" + name.replace("_", "-"),
+            dest=name,
+            type=_value_list(kind),
+            default=None,
+            help=f"lista separada por comas (por defecto {default})",
+        )
+    parser.add_argument("--games", type=int, default=100, help="partidas por combinación")
+    parser.add_argument("--seed", type=int, default=0, help="semilla base (la partida i usa seed + i en cada combinación)")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--max-time", type=float, default=DEFAULT_MAX_TIME,
+                        help="segundos simulados máximos por partida")
+    parser.add_argument("--step-hz", type=float, default=DEFAULT_STEP_HZ,
+                        help="pasos de física por segundo simulado (10-20 para barridos rápidos)")
+    parser.add_argument("--level", default=None,
+                        help="nivel de levels/ o ruta a un .json (por defecto el hexágono)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="procesos del pool (por defecto todos los núcleos)")
+    parser.add_argument("--chunk", type=int, default=10, help="partidas por tarea del pool")
+    parser.add_argument("--out", default="sweep", help="prefijo de los ficheros .csv y .json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    grid = build_grid(args)
+    if args.level:
+        load_arena(args.level)  # un nivel que no existe falla aquí y no en cada proceso
+
+    # Cada partida tiene su semilla; la misma lista de semillas se repite en
+    # todas las combinaciones para que se comparen sobre las mismas partidas
+    seeds = list(range(args.seed, args.seed + args.games))
+    tasks = []
+    for combo, params in enumerate(grid):
+        for start in range(0, args.games, args.chunk):
+            tasks.append((combo, params, seeds[start:start + args.chunk]))
+
+    total_games = len(grid) * args.games
+    print(f"{len(grid)} combinaciones x {args.games} partidas = {total_games} partidas "
+          f"en {args.workers} procesos")
+
+    results = []
+    start_time = time.perf_counter()
+    with open(args.out + ".csv", "w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [
+                pool.submit(run_chunk, combo, params, seeds, args.policy, args.max_time,
+                            args.step_hz, args.level)
+                for combo, params, seeds in tasks
+            ]
+            for future in as_completed(futures):
+                chunk = future.result()
+                writer.writerows(chunk)
+                csv_file.flush()
+                results.extend(chunk)
+                print(f"\r{len(results)}/{total_games} partidas", end="", file=sys.stderr)
+    elapsed = time.perf_counter() - start_time
+    print(file=sys.stderr)
+
+    report = {
+        "policy": args.policy,
+        "games_per_combo": args.games,
+        "max_time": args.max_time,
+        "step_hz": args.step_hz,
+        "level": args.level,
+        "elapsed_seconds": round(elapsed, 2),
+        "combos": summarize(grid, results),
+    }
+    with open(args.out + ".json", "w") as json_file:
+        json.dump(report, json_file, indent=2, ensure_ascii=False)
+
+    print(f"{total_games} partidas en {elapsed:.1f} s -> {args.out}.csv, {args.out}.json")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Los módulos del juego están en la raíz del repo; pygame sin ventana ni audio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,25 @@
+import random
+
+from snake_sim import FIXED_TIMESTEP
+from snake_sweep import greedy_policy
+
+BOT_EVERY = 6  # pasos entre decisiones del bot (0.1 s a 60 Hz, como snake_sweep.py)
+
+
+def bot_input(sim, rng):
+    """Cada BOT_EVERY pasos, la dirección que pide el bot greedy (como la jugaría el juego)."""
+    if sim.ticks % BOT_EVERY == 0:
+        direction = greedy_policy(sim, rng)
+        if direction is not None:
+            sim.set_direction(direction)
+
+
+def play(sim, ticks, seed=0):
+    """Avanza sim hasta ticks pasos de paso fijo (o hasta el game over) con bot_input."""
+    rng = random.Random(seed)
+    for _ in range(ticks):
+        if sim.game_over:
+            break
+        bot_input(sim, rng)
+        sim.step(FIXED_TIMESTEP)
+    return sim
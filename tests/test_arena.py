@@ -0,0 +1,79 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from snake_arena import Arena, load_arena
+from snake_sim import SnakeSimulation, FIXED_TIMESTEP, SNAKE_RADIUS
+
+
+ARENAS = [
+    ("hexagono", lambda: Arena.regular(150.0, 6)),
+    ("poligono_120", lambda: Arena.regular(150.0, 120)),
+    ("cruz", lambda: load_arena("cruz")),
+    ("engranaje", lambda: load_arena("engranaje")),
+]
+
+
+def _linear(arena):
+    """La misma arena, pero query() devuelve todos los lados (sin BVH)."""
+    linear = Arena(arena.vertices)
+    everything = list(range(len(arena.edges)))
+    linear.query = lambda x, y, radius: everything
+    return linear
+
+
+def _samples(arena, count, seed=0):
+    rng = random.Random(seed)
+    reach = arena.bounds_radius * 1.1
+    for _ in range(count):
+        angle = rng.uniform(0, 2 * math.pi)
+        yield (rng.uniform(-reach, reach), rng.uniform(-reach, reach),
+               300 * math.cos(angle), 300 * math.sin(angle))
+
+
+@pytest.mark.parametrize("name, make", ARENAS)
+def test_bvh_queries_match_linear_scan(name, make):
+    arena = make()
+    linear = _linear(arena)
+    points = np.array([(x, y) for x, y, _, _ in _samples(arena, 400)])
+    assert [arena.contains(x, y) for x, y in points.tolist()] == arena.inside_mask(points).tolist()
+    assert ([arena.is_inside(x, y, 10.0) for x, y in points.tolist()]
+            == arena.inside_mask(points, 10.0).tolist())
+
+    for x, y, vx, vy in _samples(arena, 400):
+        # En un vértice empatan dos lados: vale cualquiera, el punto es el mismo
+        for radius in (None, 12.0):
+            bvh, scan = arena.nearest(x, y, radius), linear.nearest(x, y, radius)
+            assert (bvh is None) == (scan is None)
+            if bvh is not None:
+                assert bvh[:3] == scan[:3]
+        assert arena.resolve(x, y, vx, vy, 8.0) == linear.resolve(x, y, vx, vy, 8.0)
+        bvh, scan = arena.time_of_impact(x, y, vx, vy, 8.0, 0.1), linear.time_of_impact(x, y, vx, vy, 8.0, 0.1)
+        assert (bvh and bvh[0]) == (scan and scan[0])
+        # Un círculo que ya pisa dos paredes empata en t = 0 con cualquiera de
+        # las dos; la simulación siempre barre desde dentro
+        if arena.is_inside(x, y, 8.0):
+            assert bvh == scan
+            assert arena.sweep(x, y, vx, vy, 8.0, 0.1) == linear.sweep(x, y, vx, vy, 8.0, 0.1)
+
+
+def test_many_sided_convex_arena_uses_bvh_like_half_planes():
+    """Una arena convexa de muchos lados va por el BVH y rebota como los semiplanos."""
+    sim = SnakeSimulation(seed=1, effects=False, arena=Arena.regular(150.0, 120))
+    assert not sim._linear_walls and not sim._vector_walls
+
+    rng = random.Random(2)
+    for _ in range(300):
+        angle = rng.uniform(0, 2 * math.pi)
+        distance = rng.uniform(0, 130)
+        pos = [distance * math.cos(angle), distance * math.sin(angle)]
+        vel = [400 * math.cos(angle + 0.3), 400 * math.sin(angle + 0.3)]
+        bvh = sim._sweep_collision(pos, vel, SNAKE_RADIUS, FIXED_TIMESTEP * 4)
+        sim._linear_walls = True
+        linear = sim._sweep_collision(pos, vel, SNAKE_RADIUS, FIXED_TIMESTEP * 4)
+        sim._linear_walls = False
+        np.testing.assert_allclose(bvh[0], linear[0], atol=1e-6)
+        np.testing.assert_allclose(bvh[1], linear[1], atol=1e-6)
+        assert len(bvh[2]) == len(linear[2])
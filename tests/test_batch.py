@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+import pytest
+
+from snake_batch import (
+    BatchSnakeEnv,
+    ACTION_DIRECTIONS,
+    ACTION_NONE,
+    ACTION_UP,
+    ACTION_DOWN,
+    ACTION_LEFT,
+    ACTION_RIGHT,
+    NUM_ACTIONS,
+)
+from snake_sim import SnakeSimulation, FIXED_TIMESTEP, SNAKE_SPEED
+
+
+# Reglas que el entorno vectorizado comparte con SnakeSimulation (el resto
+# de diferencias está documentado al principio de snake_batch.py)
+
+def test_actions_match_set_direction():
+    rng = np.random.default_rng(0)
+    n = 64
+    env = BatchSnakeEnv(n, seed=0)
+    env.reset()
+    env.hex_angle[:] = rng.uniform(0.0, 360.0, n)
+    angle = rng.uniform(0.0, 2 * math.pi, n)
+    env.velocity[:] = np.stack([np.cos(angle), np.sin(angle)], axis=1) * SNAKE_SPEED
+    actions = rng.integers(0, NUM_ACTIONS, n)
+
+    expected = []
+    for i in range(n):
+        sim = SnakeSimulation(seed=i, effects=False)
+        sim.hex_angle = float(env.hex_angle[i])
+        sim.snake_velocity = env.velocity[i].tolist()
+        if actions[i] != ACTION_NONE:
+            sim.set_direction(ACTION_DIRECTIONS[actions[i]].tolist())
+        expected.append(sim.snake_velocity)
+
+    env._apply_actions(actions)
+    np.testing.assert_allclose(env.velocity, expected, atol=1e-9)
+
+
+def test_head_and_rotation_follow_the_scalar_sim():
+    # Antes del primer cambio de rotación (>= 2 s) y sin tocar paredes, la
+    # cabeza, su velocidad y el ángulo siguen exactamente a SnakeSimulation
+    env = BatchSnakeEnv(1, seed=0)
+    env.reset()
+    sim = SnakeSimulation(seed=0, effects=False)
+    # Giros sin cerrar bucles; el de la vuelta atrás (tick 10) se ignora en los dos
+    script = {5: ACTION_UP, 10: ACTION_DOWN, 15: ACTION_RIGHT, 25: ACTION_UP, 35: ACTION_LEFT}
+
+    for tick in range(40):
+        action = script.get(tick, ACTION_NONE)
+        if action != ACTION_NONE:
+            sim.set_direction(ACTION_DIRECTIONS[action].tolist())
+        sim.step(FIXED_TIMESTEP)
+        env.step(np.array([action]))
+        assert not sim.game_over
+        np.testing.assert_allclose(env.head[0], sim.snake_head_pos, atol=1e-9)
+        np.testing.assert_allclose(env.velocity[0], sim.snake_velocity, atol=1e-9)
+        assert env.hex_angle[0] == pytest.approx(sim.hex_angle, abs=1e-9)
+
+
+def test_reward_flight_matches_the_scalar_sim():
+    rng = np.random.default_rng(1)
+    env = BatchSnakeEnv(1, seed=0)
+    env.reset()
+    sim = SnakeSimulation(seed=0, effects=False)
+    # Lejos de las paredes: solo gravedad y movimiento
+    pos = rng.uniform(-40.0, 40.0, (env.num_rewards, 2))
+    vel = rng.uniform(-60.0, 60.0, (env.num_rewards, 2))
+    env.reward_pos[0] = pos
+    env.reward_vel[0] = vel
+    sim.reward_pos = pos.copy()
+    sim.reward_vel = vel.copy()
+
+    for _ in range(10):
+        env._update_rewards(FIXED_TIMESTEP)
+        sim._update_rewards(FIXED_TIMESTEP)
+    np.testing.assert_allclose(env.reward_pos[0], sim.reward_pos, atol=1e-9)
+    np.testing.assert_allclose(env.reward_vel[0], sim.reward_vel, atol=1e-9)
+
+
+def test_growing_past_max_segments_is_an_error():
+    env = BatchSnakeEnv(1, seed=0, max_segments=4)
+    env.reset()
+    env.body_length[:] = 4
+    env.reward_pos[0, 0] = env.head[0]
+    env.reward_vel[0, 0] = 0.0
+    with pytest.raises(RuntimeError):
+        env.step(np.array([ACTION_NONE]))
@@ -0,0 +1,120 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from snake_arena import load_arena
+from snake_sim import (
+    SnakeSimulation, DEFAULT_PARAMS, SNAKE_RADIUS, REWARD_RADIUS, FIXED_TIMESTEP, MAX_SWEEP_BOUNCES,
+)
+
+# Pasos largos como los de snake_sweep.py --step-hz
+LONG_STEPS = [1 / 10, 1 / 15]
+
+
+def _inside_points(sim, radius, count, seed):
+    rng = random.Random(seed)
+    reach = sim.arena.bounds_radius
+    points = []
+    while len(points) < count:
+        x, y = rng.uniform(-reach, reach), rng.uniform(-reach, reach)
+        if sim.arena.is_inside(x, y, radius):
+            angle = rng.uniform(0, 2 * math.pi)
+            speed = rng.uniform(100, 400)
+            points.append(([x, y], [speed * math.cos(angle), speed * math.sin(angle)]))
+    return points
+
+
+@pytest.mark.parametrize("level", [None, "cruz", "engranaje"])
+@pytest.mark.parametrize("delta_time", LONG_STEPS)
+def test_sweep_collision_long_step_matches_short_steps(level, delta_time):
+    """Un paso largo rebota igual que seis cortos y nunca deja la cabeza fuera."""
+    sim = SnakeSimulation(seed=0, effects=False, arena=load_arena(level) if level else None)
+    for pos, vel in _inside_points(sim, SNAKE_RADIUS, 200, seed=1):
+        long_pos, long_vel, _ = sim._sweep_collision(pos, vel, SNAKE_RADIUS, delta_time)
+        short_pos, short_vel = pos, vel
+        for _ in range(6):
+            short_pos, short_vel, _ = sim._sweep_collision(short_pos, short_vel, SNAKE_RADIUS, delta_time / 6)
+        assert sim.arena.is_inside(*long_pos, SNAKE_RADIUS - 1e-6)
+        np.testing.assert_allclose(long_pos, short_pos, atol=1e-6)
+        np.testing.assert_allclose(long_vel, short_vel, atol=1e-6)
+
+
+@pytest.mark.parametrize("level", [None, "cruz", "engranaje"])
+@pytest.mark.parametrize("delta_time", LONG_STEPS)
+def test_sweep_rewards_long_step_matches_short_steps(level, delta_time):
+    """
+    Sin gravedad, un paso largo de las recompensas es igual que seis cortos
+    (salvo las que agotan MAX_SWEEP_BOUNCES en el paso largo: esas acaban
+    corregidas por penetración, no barridas).
+    """
+    arena = load_arena(level) if level else None
+    params = {**DEFAULT_PARAMS, "gravity": 0.0}
+    long_sim = SnakeSimulation(seed=0, effects=False, params=params, arena=arena)
+    short_sim = SnakeSimulation(seed=0, effects=False, params=params, arena=arena)
+    pos, vel = zip(*_inside_points(long_sim, REWARD_RADIUS, 300, seed=2))
+    for sim in (long_sim, short_sim):
+        sim.reward_pos = np.array(pos)
+        sim.reward_vel = np.array(vel)
+    swept = [
+        len(long_sim.arena.sweep(*p, *v, REWARD_RADIUS, delta_time, long_sim.reward_bounce,
+                                 MAX_SWEEP_BOUNCES)[4]) < MAX_SWEEP_BOUNCES
+        for p, v in zip(pos, vel)
+    ]
+    assert sum(swept) >= len(swept) - 2
+
+    long_sim._sweep_rewards(delta_time)
+    for _ in range(6):
+        short_sim._sweep_rewards(delta_time / 6)
+    np.testing.assert_allclose(long_sim.reward_pos[swept], short_sim.reward_pos[swept], atol=1e-6)
+    np.testing.assert_allclose(long_sim.reward_vel[swept], short_sim.reward_vel[swept], atol=1e-6)
+    assert all(long_sim.arena.is_inside(x, y, REWARD_RADIUS - 1e-6) for x, y in long_sim.reward_pos.tolist())
+
+
+def _hook(speed, path, head_velocity):
+    """Partida sin recompensas con el cuerpo tendido a lo largo de path (la cabeza al final)."""
+    sim = SnakeSimulation(seed=0, effects=False, params={**DEFAULT_PARAMS, "snake_speed": speed})
+    sim.reward_pos = np.zeros((0, 2))
+    sim.reward_vel = np.zeros((0, 2))
+    sim.snake_path.clear()
+    for x, y in path:
+        sim.snake_path.append(float(x), float(y))
+    sim.snake_length = 20
+    sim.snake_head_pos = [float(c) for c in path[-1]]
+    sim.snake_velocity = list(head_velocity)
+    sim._place_segments()
+    return sim
+
+
+@pytest.mark.parametrize("delta_time", LONG_STEPS)
+def test_long_step_cannot_cross_the_body(delta_time):
+    """
+    La cabeza baja atravesando el tramo del cuerpo tendido en y = 0 y en un
+    solo paso pasa de 15.5 px por encima a 14.5 px por debajo, entre dos
+    segmentos: al final del paso ninguno está a menos del radio de colisión.
+    """
+    speed = 30.0 / delta_time
+    path = [(100, 0), (-100, 0), (-100, 40), (0, 40), (0, 15.5)]
+    sim = _hook(speed, path, (0.0, -speed))
+    sim.step(delta_time)
+    head = sim.snake_head_pos
+    assert head == pytest.approx([0.0, -14.5])
+    assert not sim._body_within(head[0], head[1], SNAKE_RADIUS * 1.5)  # la comprobación del final no lo ve
+    assert sim.game_over
+
+    # Lo mismo en pasos de 60 Hz
+    reference = _hook(speed, path, (0.0, -speed))
+    for _ in range(round(delta_time / FIXED_TIMESTEP)):
+        reference.step(FIXED_TIMESTEP)
+    assert reference.game_over
+
+
+@pytest.mark.parametrize("delta_time", LONG_STEPS)
+def test_long_step_beside_the_body_is_not_a_collision(delta_time):
+    """En paralelo al cuerpo, a 20 px (más que el radio de colisión), no hay game over."""
+    speed = 30.0 / delta_time
+    sim = _hook(speed, [(100, 0), (-100, 0), (-100, 20), (-40, 20)], (speed, 0.0))
+    for _ in range(3):
+        sim.step(delta_time)
+    assert not sim.game_over
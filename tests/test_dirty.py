@@ -0,0 +1,63 @@
+import random
+
+import pygame
+import pytest
+
+import snake_pygame
+from snake_sim import STORM_PARAMS
+
+from helpers import bot_input
+
+
+def _game(params):
+    random.seed(0)  # estrellas y cruces iguales en las dos partidas
+    game = snake_pygame.SnakeGame(params=params, dirty_rects=True)
+    game.setup_world()
+    game.state = snake_pygame.STATE_PLAYING
+    game._handle_game_over = lambda: None  # sin tocar best_score.json
+    return game
+
+
+@pytest.mark.parametrize("params, frames", [(None, 400), (STORM_PARAMS, 60)])
+def test_dirty_frames_match_full_repaint(params, frames):
+    """Cada frame en modo dirty-rects tiene que salir igual, píxel a píxel, que repintado entero."""
+    dirty = _game(params)
+    full = _game(params)
+    # Misma partida y mismas cruces; full pinta en su propia superficie
+    full.screen = pygame.Surface(dirty.screen.get_size(), 0, dirty.screen)
+    full.sim = dirty.sim
+    full.background_shapes = dirty.background_shapes
+
+    sim = dirty.sim
+    rng = random.Random(3)
+    partial = 0
+    for frame in range(frames):
+        if sim.game_over:
+            break
+        bot_input(sim, rng)
+        dirty.update(1 / 60)  # mueve las cruces del fondo y avanza la partida
+        if frame % 50 == 0:
+            sim._create_sparks([100.0, 0.0], 20)
+        if frame % 97 == 0:
+            dirty.best_score = full.best_score = dirty.best_score + 1
+
+        dirty.draw()
+        full._dirty_prev = None
+        full.draw()
+        if dirty._update_rects is not None:
+            partial += 1
+        assert pygame.image.tobytes(dirty.screen, "RGB") == pygame.image.tobytes(full.screen, "RGB"), frame
+    assert partial > frames // 2
+
+
+def test_new_game_drops_surfaces_from_a_closed_window():
+    """Las cachés de glow y texto no pueden devolver superficies de antes de pygame.quit()."""
+    game = _game(None)
+    glow = game.reward_glow
+    label = snake_pygame.render_pixel_text("SCORE", (255, 255, 255))
+    pygame.quit()
+
+    game = _game(None)
+    assert game.reward_glow[0] is not glow[0]
+    assert snake_pygame.render_pixel_text("SCORE", (255, 255, 255)) is not label
+    game.draw()  # blitea glow y HUD sobre la ventana nueva
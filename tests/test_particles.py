@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+import pytest
+
+from snake_sim import ParticlePool, PARTICLE_SPARK, PARTICLE_FLASH
+
+
+def _live(pool):
+    """Filas vivas como {serial: (x, y, size, color, age)}; cada columna lleva el serial codificado."""
+    n = pool.count
+    return {
+        serial: (x, y, size, tuple(color), age)
+        for serial, (x, y), size, color, age in zip(
+            pool.serial[:n].tolist(), pool.pos[:n].tolist(), pool.size[:n].tolist(),
+            pool.color[:n].tolist(), pool.age[:n].tolist())
+    }
+
+
+def _spawn(pool, serial, lifetime, kind=PARTICLE_FLASH):
+    # Quietas (velocidad 0): la posición, el tamaño y el color siguen identificando al serial
+    pool.spawn(kind, serial, -serial, 0.0, 0.0, serial * 0.5, lifetime,
+               (serial % 256, (serial * 7) % 256, (serial * 13) % 256))
+
+
+def _expected_row(serial, age):
+    return (float(serial), float(-serial), serial * 0.5,
+            (serial % 256, (serial * 7) % 256, (serial * 13) % 256), age)
+
+
+def test_full_pool_evicts_the_oldest():
+    pool = ParticlePool(capacity=8)
+    for serial in range(8):
+        _spawn(pool, serial, 10.0)
+    # Desordenar las filas: caducan algunas y se rellenan los huecos
+    pool.lifetime[[1, 4]] = 0.0
+    pool.update(0.0)
+    _spawn(pool, 8, 10.0)
+    _spawn(pool, 9, 10.0)
+    assert pool.count == 8
+
+    for serial in range(10, 30):
+        oldest = int(pool.serial[:pool.count].min())
+        before = set(_live(pool))
+        _spawn(pool, serial, 10.0)
+        assert pool.count == 8
+        assert set(_live(pool)) == before - {oldest} | {serial}
+
+
+def test_expiring_an_interleaved_subset_keeps_the_survivors():
+    pool = ParticlePool(capacity=16)
+    for serial in range(12):
+        # Caducan las impares, repartidas entre los huecos y la cola
+        _spawn(pool, serial, 0.5 if serial % 2 else 2.0)
+    pool.update(1.0)
+    assert _live(pool) == {serial: _expected_row(serial, 1.0) for serial in range(0, 12, 2)}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pool_matches_a_plain_list(seed):
+    """Mismas altas, bajas y desalojos que una lista de diccionarios."""
+    rng = random.Random(seed)
+    pool = ParticlePool(capacity=rng.choice([1, 5, 32]))
+    reference = {}  # serial -> (lifetime, age)
+    next_serial = 0
+    for _ in range(400):
+        if rng.random() < 0.6:
+            for _ in range(rng.randint(1, 6)):
+                if len(reference) == pool.capacity:
+                    del reference[min(reference)]
+                lifetime = rng.choice([0.05, 0.1, 0.3, 1.0])
+                kind = rng.choice([PARTICLE_SPARK, PARTICLE_FLASH])
+                _spawn(pool, next_serial, lifetime, kind)
+                reference[next_serial] = (lifetime, 0.0)
+                next_serial += 1
+        else:
+            dt = rng.choice([0.0, 0.02, 0.1])
+            pool.update(dt)
+            reference = {
+                serial: (lifetime, age + dt)
+                for serial, (lifetime, age) in reference.items()
+                if age + dt < lifetime
+            }
+        live = _live(pool)
+        assert set(live) == set(reference)
+        for serial, row in live.items():
+            expected = _expected_row(serial, reference[serial][1])
+            assert row[:4] == expected[:4]
+            assert row[4] == pytest.approx(expected[4])
@@ -0,0 +1,78 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from snake_sim import SnakePath
+
+
+def _naive_point(points, distance):
+    """Punto a distance de arco detrás del último de points, recorriendo la polilínea a mano."""
+    remaining = distance
+    for (x1, y1), (x0, y0) in zip(reversed(points), list(reversed(points))[1:]):
+        length = math.hypot(x1 - x0, y1 - y0)
+        if remaining <= length:
+            u = remaining / length if length else 0.0
+            return x1 + (x0 - x1) * u, y1 + (y0 - y1) * u
+        remaining -= length
+    return points[0]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_points_at_matches_naive_polyline(seed):
+    rng = random.Random(seed)
+    path = SnakePath(capacity=2)  # diminuto: _grow() y la vuelta del buffer se ejercitan enseguida
+    points = []
+    kept_from = 0.0  # arco desde el que ningún trim ha descartado nada
+    grew = wrapped = False
+    x = y = 0.0
+
+    for step in range(600):
+        # Pasos normales, algunos nulos (muestras repetidas) y algún salto largo
+        length = rng.choice([0.0, rng.uniform(0.5, 6.0), rng.uniform(20.0, 60.0)])
+        angle = rng.uniform(0, 2 * math.pi)
+        x += length * math.cos(angle)
+        y += length * math.sin(angle)
+        capacity = path.capacity
+        path.append(x, y)
+        points.append((x, y))
+        grew |= path.capacity != capacity
+        wrapped |= path.start + path.count > path.capacity
+
+        if rng.random() < 0.3:
+            keep = rng.uniform(10.0, 150.0)
+            path.trim(keep)
+            kept_from = max(kept_from, path.total_length - keep)
+
+        # La ventana viva es siempre la cola del historial completo
+        xs, ys, arc = path.window()
+        assert path.count >= min(2, len(points))
+        np.testing.assert_array_equal(np.stack([xs, ys], axis=1), points[-path.count:])
+        assert np.all(np.diff(arc) >= 0)
+        assert arc[-1] == path.total_length
+
+        # Dentro de lo conservado, igual que interpolar sobre todo el historial
+        reach = path.total_length - kept_from
+        distances = np.array([rng.uniform(0, reach) for _ in range(8)] + [0.0, reach])
+        expected = [_naive_point(points, d) for d in distances]
+        np.testing.assert_allclose(path.points_at(distances), expected, atol=1e-9)
+
+    assert grew and wrapped
+
+
+def test_copy_and_load_keep_the_window():
+    rng = random.Random(1)
+    path = SnakePath(capacity=4)
+    for _ in range(50):
+        path.append(rng.uniform(-100, 100), rng.uniform(-100, 100))
+        path.trim(300.0)
+    distances = np.linspace(0, 250, 11)
+
+    copy = path.copy()
+    path.append(0.0, 0.0)  # no toca la copia
+    loaded = SnakePath(capacity=2)
+    loaded.load(*copy.window(), copy.total_length)
+    np.testing.assert_array_equal(loaded.points_at(distances), copy.points_at(distances))
+    for a, b in zip(loaded.window(), copy.window()):
+        np.testing.assert_array_equal(a, b)
@@ -0,0 +1,55 @@
+from snake_pygame import (
+    QualityController, QUALITY_COOLDOWN, QUALITY_UP_DELAY, QUALITY_WINDOW, QUALITY_LEVELS,
+)
+
+SLOW = 16.0  # ms, por encima de QUALITY_DOWN_RATIO de 16.7 ms
+FAST = 4.0   # ms, por debajo de QUALITY_UP_RATIO
+
+
+def _feed(controller, frame_ms, frames):
+    """Pasa frames iguales; devuelve [(frame, nivel)] de cada cambio."""
+    changes = []
+    for frame in range(frames):
+        level = controller.add(frame_ms)
+        if level is not None:
+            changes.append((frame, level))
+    return changes
+
+
+def test_waits_for_a_full_window():
+    controller = QualityController()
+    assert _feed(controller, SLOW, QUALITY_COOLDOWN - 1) == []
+    assert controller.add(SLOW) == 1
+
+
+def test_window_is_kept_across_changes_with_a_cooldown():
+    controller = QualityController()
+    changes = _feed(controller, SLOW, QUALITY_COOLDOWN * 3)
+    # Un nivel por cooldown, nunca dos seguidos
+    assert [frame for frame, _ in changes] == [QUALITY_COOLDOWN * (i + 1) - 1 for i in range(3)]
+    assert [level for _, level in changes] == [1, 2, 3]
+    assert len(controller.samples) == QUALITY_WINDOW
+
+
+def test_stale_slow_frames_do_not_cascade():
+    """Tras bajar, los frames lentos del nivel anterior no vuelven a bajarlo."""
+    controller = QualityController()
+    _feed(controller, SLOW, QUALITY_COOLDOWN)
+    assert controller.level == 1
+    assert _feed(controller, FAST, QUALITY_COOLDOWN * 2) == []
+    assert controller.level == 1
+
+
+def test_spikes_below_the_percentile_are_ignored():
+    controller = QualityController()
+    for frame in range(QUALITY_WINDOW * 5):
+        # Un frame lento de cada 20 (5%): el percentil 90 no lo ve
+        assert controller.add(SLOW if frame % 20 == 0 else 10.0) is None
+
+
+def test_goes_up_only_after_the_delay_and_stays_in_range():
+    controller = QualityController(level=len(QUALITY_LEVELS) - 1)
+    assert _feed(controller, SLOW, QUALITY_COOLDOWN * 2) == []  # ya en el peor nivel
+    controller = QualityController(level=2)
+    changes = _feed(controller, FAST, QUALITY_UP_DELAY * 3)
+    assert changes == [(QUALITY_UP_DELAY - 1, 1), (QUALITY_UP_DELAY * 2 - 1, 0)]
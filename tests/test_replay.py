@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pytest
+
+from snake_arena import load_arena
+from snake_replay import encode_replay, decode_replay, save_replay, load_replay, play_replay, REPLAY_DIR
+from snake_sim import SnakeSimulation
+
+from helpers import play
+
+
+def _play(seed, ticks=600, level=None):
+    """Partida con el bot greedy en el nivel dado (None = hexágono)."""
+    arena = load_arena(level) if level else None
+    return play(SnakeSimulation(seed=seed, arena=arena), ticks, seed)
+
+
+def _assert_same_game(replayed, sim):
+    assert replayed.ticks == sim.ticks
+    assert replayed.score == sim.score
+    assert replayed.game_over == sim.game_over
+    np.testing.assert_array_equal(replayed.snake_head_pos, sim.snake_head_pos)
+    np.testing.assert_array_equal(replayed.reward_pos, sim.reward_pos)
+
+
+@pytest.mark.parametrize("seed, level", [(7, None), (123456789, None), (-42, None), (3, "cruz")])
+def test_round_trip_replays_the_same_game(seed, level):
+    sim = _play(seed, level=level)
+    assert sim.input_log
+
+    replay = decode_replay(encode_replay(sim))
+    assert replay["seed"] == seed
+    assert replay["level"] == (level or "")
+    assert replay["inputs"] == [(tick, tuple(direction)) for tick, direction in sim.input_log]
+    _assert_same_game(play_replay(replay), sim)
+
+
+def test_save_replay_defaults_to_the_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sim = _play(11, ticks=120)
+    path = save_replay(sim)
+    assert os.path.dirname(os.path.abspath(path)) == str(tmp_path / REPLAY_DIR)
+    _assert_same_game(play_replay(load_replay(path)), sim)
+
+
+def test_seed_out_of_range_is_rejected():
+    sim = SnakeSimulation(seed=2 ** 64, effects=False)
+    with pytest.raises(ValueError):
+        encode_replay(sim)
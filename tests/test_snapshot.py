@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from snake_arena import load_arena
+from snake_sim import SnakeSimulation
+
+from helpers import play
+
+
+def _state(sim):
+    """Lo que tiene que coincidir entre dos partidas iguales."""
+    pool = sim.particles
+    return (
+        sim.ticks, sim.score, sim.game_over, sim.hex_angle,
+        tuple(sim.snake_head_pos), tuple(sim.snake_velocity),
+        sim.snake_body.tobytes(), sim.reward_pos.tobytes(), sim.reward_vel.tobytes(),
+        pool.count, pool.pos[:pool.count].tobytes(),
+        sim.rng.getstate(), sim.fx_rng.getstate(), tuple(sim.input_log),
+    )
+
+
+@pytest.mark.parametrize("seed, level", [(5, None), (-9, None), (8, "engranaje")])
+def test_restore_continues_the_same_game(seed, level):
+    arena = load_arena(level) if level else None
+    sim = play(SnakeSimulation(seed=seed, arena=arena), 200)
+    sim.sparks_per_reward = 3  # lo baja la calidad adaptativa
+    data = sim.snapshot()
+
+    restored = SnakeSimulation(arena=arena)
+    restored.restore(data)
+    assert restored.sparks_per_reward == 3
+    assert _state(restored) == _state(sim)
+    assert restored.snapshot() == data
+
+    play(sim, 200, seed=1)
+    play(restored, 200, seed=1)
+    assert _state(restored) == _state(sim)
+
+
+@pytest.mark.parametrize("effects", [True, False])
+def test_clone_is_independent(effects):
+    sim = play(SnakeSimulation(seed=3, effects=effects), 150)
+    before = _state(sim)
+
+    clone = sim.clone()
+    play(clone, 150, seed=2)
+    assert _state(sim) == before
+
+    # Restaurar en la copia un estado con partículas no toca el original
+    other = play(SnakeSimulation(seed=4, effects=True), 150)
+    other._create_sparks([0.0, 0.0])
+    clone.restore(other.snapshot())
+    assert clone.particles.count == other.particles.count
+    assert _state(sim) == before
+
+    # Y el original sigue igual que una partida que nunca se clonó
+    twin = play(SnakeSimulation(seed=3, effects=effects), 150)
+    play(sim, 100, seed=6)
+    play(twin, 100, seed=6)
+    np.testing.assert_array_equal(sim.snake_body, twin.snake_body)
+    assert _state(sim) == _state(twin)
+
+
+@pytest.mark.parametrize("saved, target", [("cruz", None), (None, "cruz"), ("cruz", "engranaje")])
+def test_restore_rejects_another_arena(saved, target):
+    sim = play(SnakeSimulation(seed=2, arena=load_arena(saved) if saved else None), 100)
+    other = play(SnakeSimulation(seed=3, arena=load_arena(target) if target else None), 50)
+    before = _state(other)
+    with pytest.raises(ValueError, match="otra arena"):
+        other.restore(sim.snapshot())
+    assert _state(other) == before  # no se ha tocado nada
@@ -0,0 +1,97 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from snake_arena import Arena, load_arena
+from snake_sim import (
+    SnakeSimulation, SpawnSampler, HEAD_CLEARANCE, BODY_CLEARANCE, SPAWN_MARGIN,
+)
+
+from helpers import play
+
+
+def _exact(sampler, groups):
+    """
+    Por fuerza bruta, para cada celda válida: cuántas zonas la tapan (mismo
+    criterio que los sellos: centro de celda a menos de clearance + diagonal
+    del centro de la celda del punto) y su holgura exacta con la serpiente.
+    """
+    half_diagonal = sampler.cell_size * math.sqrt(0.5)
+    centers = sampler.centers
+    counts = np.zeros(len(centers), dtype=int)
+    slack = np.full(len(centers), np.inf)
+    for points, clearance in zip(groups, sampler.clearances):
+        cell_centers = sampler.origin + (np.floor((points - sampler.origin) / sampler.cell_size) + 0.5) * sampler.cell_size
+        stamp_dist = np.hypot(*(centers[:, None, :] - cell_centers[None, :, :]).transpose(2, 0, 1))
+        counts += (stamp_dist < clearance + 2 * half_diagonal).sum(axis=1)
+        dist = np.hypot(*(centers[:, None, :] - points[None, :, :]).transpose(2, 0, 1))
+        slack = np.minimum(slack, dist.min(axis=1) - clearance)
+    return counts, slack
+
+
+@pytest.mark.parametrize("level", [None, "cruz", "engranaje"])
+def test_spawn_points_keep_clear_of_the_snake_and_walls(level):
+    sim = SnakeSimulation(seed=4, effects=False, arena=load_arena(level) if level else None)
+    sampler = sim.spawner
+    rng = random.Random(0)
+    checked = 0
+    for length in (3, 15, 40, 80):
+        sim.reset(seed=length)
+        sim._grow(length - sim.snake_length)
+        for _ in range(5):
+            play(sim, 40, seed=length)
+            if sim.game_over:
+                break
+            head = np.array([sim.snake_head_pos])
+            groups = [head, sim.snake_body]
+            counts, _ = _exact(sampler, groups)
+            if not (counts == 0).any():
+                continue  # arena llena: eso es el fallback (ver el test de abajo)
+            cells = sampler.free_cells(groups)
+            assert len(cells)
+            for _ in range(50):
+                x, y = sampler.sample(rng, cells)
+                assert math.hypot(x - head[0, 0], y - head[0, 1]) >= HEAD_CLEARANCE
+                assert np.hypot(*(sim.snake_body - (x, y)).T).min() >= BODY_CLEARANCE
+                assert sim.arena.is_inside(x, y, SPAWN_MARGIN)
+            checked += 1
+    assert checked >= 10
+
+
+def test_full_arena_takes_the_least_covered_farthest_cells():
+    arena = Arena.regular(150.0, 6)
+    sampler = SpawnSampler(arena)
+    # Cuerpo en rejilla de 25 px por toda la arena: ninguna celda queda libre.
+    # Con este desfase hay celdas igual de poco tapadas pero más cerca del cuerpo.
+    grid = np.arange(-150, 151, 25.0) + 7
+    body = np.array([(x, y) for x in grid for y in grid if arena.is_inside(x, y)])
+    head = np.array([[0.0, 0.0]])
+    groups = [head, body]
+
+    counts, slack = _exact(sampler, groups)
+    assert counts.min() > 0  # de verdad sin sitio libre
+    least = np.flatnonzero(counts == counts.min())
+    expected = least[slack[least] >= slack[least].max() - sampler.cell_size]
+    assert 0 < len(expected) < len(least)  # el filtro por distancia descarta algo
+
+    cells = sampler.free_cells(groups)
+    assert sorted(cells.tolist()) == sorted(expected.tolist())
+
+
+def test_spawn_cells_are_recomputed_after_moving_or_restoring():
+    sim = play(SnakeSimulation(seed=9, effects=False), 120)
+    data = sim.snapshot()
+
+    sim._free_spawn_cells()
+    assert sim._spawn_cells is not None
+    sim._place_segments()
+    assert sim._spawn_cells is None
+
+    play(sim, 120, seed=1)
+    sim._free_spawn_cells()
+    sim.restore(data)
+    assert sim._spawn_cells is None
+    head = np.array([sim.snake_head_pos])
+    np.testing.assert_array_equal(sim._free_spawn_cells(), sim.spawner.free_cells([head, sim.snake_body]))